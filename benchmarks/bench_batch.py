@@ -0,0 +1,93 @@
+# bench_batch.py - compare the threaded batch (delFeatures, sent by ._sendBatch in a thread pool)
+#  with the awaitable batch (delFeaturesAsync, sent by ._sendBatchAsync with httpx on the calling
+#  event loop) against a local HTTP server that answers each request after --delay milliseconds.
+#  The async batch is run on an event loop that also runs syncLoopAsync's polling, as an
+#  application driving several sessions from one loop would.
+#
+#  usage: python benchmarks/bench_batch.py [--requests 200] [--workers 10] [--delay 20] [--repeat 5]
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+from caltopo_python import CaltopoSession
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version='HTTP/1.1' # keep-alive, as CalTopo Desktop does
+    delay=0.02
+    def reply(self):
+        length=int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        time.sleep(self.delay)
+        body=json.dumps({'status':'ok','timestamp':int(time.time()*1000),
+                'result':{'id':self.path.rsplit('/',1)[-1],'timestamp':int(time.time()*1000),'state':{'features':[]}}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    do_GET=do_POST=do_DELETE=reply
+    def log_message(self,*args):
+        pass
+
+def makeSession(port):
+    cts=CaltopoSession(domainAndPort='127.0.0.1:'+str(port),sync=False)
+    cts.mapID='BENCH' # no openMap: the server only answers the batch and 'since' requests
+    return cts
+
+def deleteList(n):
+    return [{'id':'m'+str(i),'class':'Marker'} for i in range(n)]
+
+def timeThreaded(cts,n,workers):
+    t0=time.perf_counter()
+    rval=cts.delFeatures(deleteList(n),maxWorkers=workers)
+    assert all(rval)
+    return time.perf_counter()-t0
+
+async def timeAsync(cts,n,workers):
+    poll=asyncio.ensure_future(cts.syncLoopAsync()) # the same loop keeps polling
+    await asyncio.sleep(0)
+    t0=time.perf_counter()
+    rval=await cts.delFeaturesAsync(deleteList(n),maxWorkers=workers)
+    elapsed=time.perf_counter()-t0
+    assert all(rval)
+    await cts.closeAsync()
+    await poll
+    return elapsed
+
+def run(n,workers,delay,repeat):
+    Handler.delay=delay/1000
+    server=ThreadingHTTPServer(('127.0.0.1',0),Handler)
+    server.daemon_threads=True
+    threading.Thread(target=server.serve_forever,daemon=True).start()
+    cts=makeSession(server.server_address[1])
+    cts.syncInterval=cts.currentSyncInterval=0.05
+    threaded=[]
+    awaited=[]
+    for i in range(repeat):
+        threaded.append(timeThreaded(cts,n,workers))
+        awaited.append(asyncio.run(timeAsync(cts,n,workers)))
+    server.shutdown()
+    for [label,times] in [['threaded (delFeatures)',threaded],['async (delFeaturesAsync)',awaited]]:
+        times.sort()
+        print('%-26s %d requests, %d workers, %d ms server delay: median %.0f ms, best %.0f ms'%(
+                label,n,workers,delay,1000*times[len(times)//2],1000*times[0]))
+
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='time threaded and async batches of deletes against a local server')
+    parser.add_argument('--requests',type=int,default=200)
+    parser.add_argument('--workers',type=int,default=10)
+    parser.add_argument('--delay',type=float,default=20,help='server response delay in milliseconds')
+    parser.add_argument('--repeat',type=int,default=5)
+    args=parser.parse_args()
+    logging.disable(logging.INFO) # time the requests, not the log output
+    run(args.requests,args.workers,args.delay,args.repeat)
@@ -0,0 +1,65 @@
+# bench_prepare_request.py - time CaltopoSession._prepareRequest per verb (GET, POST, DELETE),
+#  unsigned (CalTopo Desktop on localhost) and signed (caltopo.com); the POST body is a shape
+#  of --points points.  No request is sent, and no map connection is made.
+#
+#  usage: python benchmarks/bench_prepare_request.py [--calls 3000] [--points 200] [--log-level WARNING]
+
+import argparse
+import base64
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+from caltopo_python import CaltopoSession
+
+def makeSession(domainAndPort):
+    cts=object.__new__(CaltopoSession)
+    cts.mapID='BENCH'
+    cts.apiVersion=1
+    cts.apiUrlMid='/api/v1/map/[MAPID]/'
+    cts.domainAndPort=domainAndPort
+    cts._httpAdapters={domainAndPort:None} # already mounted: don't build a requests session
+    cts.sync=False
+    cts.syncTimeout=10
+    cts.validatePoints=None
+    cts.accountId='ACCOUNT'
+    cts.accountIdInternet='ACCOUNT'
+    cts.id='BENCHID'
+    cts.key=base64.b64encode(os.urandom(32)).decode()
+    return cts
+
+def shape(points):
+    return {'properties':{'title':'bench','class':'Shape','stroke':'#FF0000'},
+            'geometry':{'type':'LineString','coordinates':[[-120+n*1e-4,39+n*1e-4] for n in range(points)]}}
+
+def timeCalls(cts,type,apiUrlEnd,j,id,calls):
+    t0=time.perf_counter()
+    for n in range(calls):
+        cts._prepareRequest(type,apiUrlEnd,j,id=id)
+    return 1e6*(time.perf_counter()-t0)/calls
+
+def run(calls,points):
+    j=shape(points)
+    for [label,domainAndPort] in [['unsigned','localhost:8080'],['signed','caltopo.com']]:
+        cts=makeSession(domainAndPort)
+        get=timeCalls(cts,'get','since/0',None,'',calls)
+        post=timeCalls(cts,'post','Shape',j,'',calls)
+        delete=timeCalls(cts,'delete','Shape',None,'abcd-1234',calls)
+        print('%-8s (%s): get %.1f us, post %.1f us, delete %.1f us'%(label,domainAndPort,get,post,delete))
+
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='time _prepareRequest per verb, signed and unsigned')
+    parser.add_argument('--calls',type=int,default=3000)
+    parser.add_argument('--points',type=int,default=200)
+    parser.add_argument('--log-level',default='WARNING',help='root logger level; INFO includes the cost of request log lines')
+    args=parser.parse_args()
+    # keep the log formatting cost, but send the output nowhere
+    root=logging.getLogger()
+    for h in root.handlers[:]:
+        root.removeHandler(h)
+    root.addHandler(logging.StreamHandler(open(os.devnull,'w')))
+    root.setLevel(args.log_level)
+    run(args.calls,args.points)
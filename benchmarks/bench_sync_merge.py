@@ -0,0 +1,69 @@
+# bench_sync_merge.py - time CaltopoSession._mergeSyncResult on a synthetic map:
+#  a cache of --features features (spread over several classes) receives one 'since'
+#  response whose 'ids' drops --deletes of them, with deletedFeatureCallback and
+#  deletedFeaturesCallback set.  No map connection is made, and INFO logging is off.
+#
+#  usage: python benchmarks/bench_sync_merge.py [--features 10000] [--deletes 1000] [--repeat 20]
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+from caltopo_python import CaltopoSession
+
+classes=['Marker','Shape','Assignment','AppTrack','Clue']
+
+def makeSession(featureCount):
+    cts=object.__new__(CaltopoSession)
+    cts.mapID='BENCH'
+    cts.apiVersion=1
+    cts.sync=False
+    cts.cacheRevision=0
+    cts._cacheLock=threading.RLock()
+    cts.mapData={'ids':{},'state':{'features':[]}}
+    cts.propertyUpdateCallback=None
+    cts.geometryUpdateCallback=None
+    cts.newFeatureCallback=None
+    cts.deletedFeatureCallback=lambda id,c: None
+    cts.deletedFeaturesCallback=lambda deleted: None
+    cts._clearIndex()
+    for n in range(featureCount):
+        c=classes[n%len(classes)]
+        cts._cacheFeature({'type':'Feature','id':'f'+str(n),
+                'properties':{'class':c,'title':c[0]+str(n),'folderId':'folder'+str(n%20)},
+                'geometry':{'type':'Point','coordinates':[-120+n*1e-5,39]}})
+    return cts
+
+def run(featureCount,deleteCount,repeat):
+    times=[]
+    for i in range(repeat):
+        cts=makeSession(featureCount)
+        ids={c:list(v) for [c,v] in cts.mapData['ids'].items()}
+        deleted=set(random.Random(i).sample(range(featureCount),deleteCount))
+        for n in deleted:
+            ids[classes[n%len(classes)]].remove('f'+str(n))
+        rjr={'ids':ids,'state':{'features':[]},'timestamp':0}
+        t0=time.perf_counter()
+        callbacks=cts._mergeSyncResult(rjr)
+        for [callback,args] in callbacks:
+            callback(*args)
+        times.append(time.perf_counter()-t0)
+        assert len(cts.mapData['state']['features'])==featureCount-deleteCount
+    times.sort()
+    print('%d features, %d deleted, %d runs: median %.2f ms, best %.2f ms'%(
+            featureCount,deleteCount,repeat,1000*times[len(times)//2],1000*times[0]))
+
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='time _mergeSyncResult with deletes on a synthetic cache')
+    parser.add_argument('--features',type=int,default=10000)
+    parser.add_argument('--deletes',type=int,default=1000)
+    parser.add_argument('--repeat',type=int,default=20)
+    args=parser.parse_args()
+    logging.disable(logging.INFO) # time the merge, not the log output
+    run(args.features,args.deletes,args.repeat)
@@ -97,6 +97,9 @@
 import hmac
 import base64
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import socket
 import json
 import configparser
 import os
@@ -105,10 +108,18 @@ import logging
 import sys
 import threading
 import copy
+import random
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import functools
 
+# httpx is optional: if installed, it is used by the async transport (see _sendRequestAsync);
+#  otherwise the async methods run the blocking requests calls in executor threads
+try:
+    import httpx
+except ImportError:
+    httpx=None
+
 # import objgraph
 # import psutil
 
@@ -121,12 +132,57 @@ import functools
 from shapely.geometry import LineString,Point,Polygon,MultiLineString,MultiPolygon,GeometryCollection
 from shapely.ops import split,unary_union
 
+# subsystem loggers: their levels can be set separately from the root logger (see setLogLevels),
+#  for example to keep 'since' responses and request bodies out of a production log
+syncLog=logging.getLogger('caltopo_python.sync')
+requestLog=logging.getLogger('caltopo_python.request')
+
+# maximum number of characters of any one payload logged through LogPayload; 0 means no limit
+payloadLogLimit=2000
+
+# LogPayload - lazy, size-capped representation of a (possibly large) object for logging:
+#  the object is only formatted if the log record is actually emitted, e.g.
+#    syncLog.debug('since response: %s',LogPayload(rjr))
+class LogPayload():
+    def __init__(self,obj,formatter=str,limit=None):
+        self.obj=obj
+        self.formatter=formatter
+        self.limit=limit # if None, use payloadLogLimit at the time of formatting
+
+    def __str__(self):
+        s=self.formatter(self.obj)
+        limit=payloadLogLimit if self.limit is None else self.limit
+        if limit and len(s)>limit:
+            s=s[:limit]+'... ['+str(len(s)-limit)+' more characters]'
+        return s
+
 # silent exception class to be raised during __init__ and handlded by the caller,
 #  since __init__ should always return None: https://stackoverflow.com/questions/20059766
 class CTSException(BaseException):
     pass
 
+# HTTP adapter that enables TCP keep-alive on pooled connections, so that idle connections
+#  to the same host (between sync requests, for example) are less likely to be dropped by
+#  NAT or firewalls and replaced by a new TCP/TLS connection
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    def __init__(self,keepAlive=True,**kwargs):
+        self.keepAlive=keepAlive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self,*args,**kwargs):
+        if self.keepAlive:
+            opts=[(socket.IPPROTO_TCP,socket.TCP_NODELAY,1),(socket.SOL_SOCKET,socket.SO_KEEPALIVE,1)]
+            # idle time and probe interval are not settable on all platforms
+            if hasattr(socket,'TCP_KEEPIDLE'):
+                opts.append((socket.IPPROTO_TCP,socket.TCP_KEEPIDLE,60))
+            if hasattr(socket,'TCP_KEEPINTVL'):
+                opts.append((socket.IPPROTO_TCP,socket.TCP_KEEPINTVL,15))
+            kwargs['socket_options']=opts
+        super().init_poolmanager(*args,**kwargs)
+
 class CaltopoSession():
+    adapterRetryMethods=frozenset(['GET','DELETE']) # idempotent methods retried by the http adapter (see ._mountHttpAdapter)
+
     def __init__(self,
             domainAndPort: str='localhost:8080',
             mapID=None,
@@ -139,16 +195,26 @@ class CaltopoSession():
             sync=True,
             syncInterval=5,
             syncTimeout=10,
+            adaptiveSync=True,
+            syncIntervalMin=1,
+            syncIntervalMax=None,
+            syncBackoffMax=120,
             syncDumpFile=None,
             cacheDumpFile=None,
             propertyUpdateCallback=None,
             geometryUpdateCallback=None,
             newFeatureCallback=None,
             deletedFeatureCallback=None,
+            deletedFeaturesCallback=None,
             syncCallback=None,
             useFiddlerProxy=False,
             caseSensitiveComparisons=False,  # case-insensitive comparisons by default, see _caseMatch()
-            validatePoints='modify'):
+            validatePoints='modify',
+            poolConnections=4,
+            poolMaxSize=20,
+            httpRetries=3,
+            httpRetryBackoff=0.3,
+            keepAlive=True):
         """The core session object.
 
         :param domainAndPort: Domain-and-port portion of the URL; defaults to 'localhost:8080'; common values are 'caltopo.com' for the web interface, and 'localhost:8080' (or different hostname or port as needed) for CalTopo Desktop
@@ -173,6 +239,14 @@ class CaltopoSession():
         :type syncInterval: int, optional
         :param syncTimeout: Sync timeout in seconds; defaults to 10
         :type syncTimeout: int, optional
+        :param adaptiveSync: If True, the sync interval adapts between syncIntervalMin and syncIntervalMax: it drops to syncIntervalMin after local writes or remote changes, and grows by 1.5x after each empty 'since' response; if False, syncInterval is always used between successful syncs; defaults to True
+        :type adaptiveSync: bool, optional
+        :param syncIntervalMin: Shortest sync interval in seconds when adaptiveSync is True; defaults to 1
+        :type syncIntervalMin: int, optional
+        :param syncIntervalMax: Longest sync interval in seconds when adaptiveSync is True; defaults to None, meaning three times syncInterval
+        :type syncIntervalMax: int, optional
+        :param syncBackoffMax: Longest delay in seconds between sync attempts after consecutive sync failures; defaults to 120
+        :type syncBackoffMax: int, optional
         :param syncDumpFile: Base filename (will be appended by timestamp) to dump the results of each sync call; defaults to None
         :type syncDumpFile: str, optional
         :param cacheDumpFile: Base filename (will be appended by timestamp) to dump the local cache contents on each sync call; defaults to None
@@ -185,6 +259,8 @@ class CaltopoSession():
         :type newFeatureCallback: function, optional
         :param deletedFeatureCallback: Function to call when a feature was deleted from the local cache during sync; the function will be called with the deleted feature object as the only argument; defaults to None
         :type deletedFeatureCallback: function, optional
+        :param deletedFeaturesCallback: Function to call once per sync when features were deleted from the local cache; the function will be called with a list of (id,class) tuples of all features deleted by that sync as the only argument; can be used instead of, or along with, deletedFeatureCallback; defaults to None
+        :type deletedFeaturesCallback: function, optional
         :param syncCallback: Function to call on each successful sync; the function will be called with no arguments; defaults to None
         :type syncCallback: function, optional
         :param useFiddlerProxy: If True, all requests for this session will be sent through the Fiddler proxy, which allows Fiddler to watch outgoing network traffic for debug purposes; defaults to False
@@ -193,17 +269,35 @@ class CaltopoSession():
         :type caseSensitiveComparisons: bool, optional
         :param validatePoints: one of 'modify', 'warn', or False: should coordinates be checked or modified for correct longitude-then-latitide sequence as requests are sent; defaults to 'modify'; setting to False disables calls to ._validatePoints from ._sendRequest
         :type validatePoints: optional
+        :param poolConnections: Number of per-host connection pools to keep for each domainAndPort adapter; defaults to 4
+        :type poolConnections: int, optional
+        :param poolMaxSize: Maximum number of connections to keep open to one host; should be at least the number of concurrent batch requests plus one for sync; defaults to 20
+        :type poolMaxSize: int, optional
+        :param httpRetries: Number of times to retry a GET or DELETE request after a connection error or 502/503/504 response; POST requests are never retried at this level; defaults to 3
+        :type httpRetries: int, optional
+        :param httpRetryBackoff: Backoff factor in seconds between HTTP retries (see urllib3 Retry); defaults to 0.3
+        :type httpRetryBackoff: float, optional
+        :param keepAlive: If True, enable TCP keep-alive on pooled connections; defaults to True
+        :type keepAlive: bool, optional
         """            
-        self.s=requests.session()
+        self.poolConnections=poolConnections
+        self.poolMaxSize=poolMaxSize
+        self.httpRetries=httpRetries
+        self.httpRetryBackoff=httpRetryBackoff
+        self.keepAlive=keepAlive
         self.apiVersion=-1
         self.mapID=mapID
         self.domainAndPort=domainAndPort
+        self.s=self._newHttpSession()
         # configpath, account, id, and key are used to build
         #  signed requests for caltopo.com
         self.configpath=configpath
         self.account=account
         self.queue={}
         self.mapData={'ids':{},'state':{'features':[]}}
+        self._cacheLock=threading.RLock() # held while the cache and its index are being modified or searched
+        self.cacheRevision=0 # incremented on every change to the cache; if unchanged since a previous read, the cache has not changed
+        self._clearIndex()
         self.id=id
         self.key=key
         self.accountId=accountId
@@ -215,8 +309,17 @@ class CaltopoSession():
         self.geometryUpdateCallback=geometryUpdateCallback
         self.newFeatureCallback=newFeatureCallback
         self.deletedFeatureCallback=deletedFeatureCallback
+        self.deletedFeaturesCallback=deletedFeaturesCallback
         self.syncCallback=syncCallback
         self.syncInterval=syncInterval
+        self.adaptiveSync=adaptiveSync
+        self.syncIntervalMin=min(syncIntervalMin,syncInterval)
+        self.syncIntervalMax=syncIntervalMax or 3*syncInterval
+        self.syncBackoffMax=syncBackoffMax
+        self.currentSyncInterval=syncInterval # seconds until the next sync from the sync loop; see _nextSyncInterval
+        self.syncFailureCount=0 # number of consecutive failed syncs in the sync loop; 0 means the link is healthy
+        self._localWriteFlag=False # set by post and delete requests; tells the sync loop to sync soon
+        self._lastSyncChanged=False # True if the latest 'since' response contained any changes
         self.syncCompletedCount=0
         self.lastSuccessfulSyncTimestamp=0 # the server's integer milliseconds 'sincce' request completion time
         self.lastSuccessfulSyncTSLocal=0 # this object's integer milliseconds sync completion time
@@ -224,6 +327,10 @@ class CaltopoSession():
         self.cacheDumpFile=cacheDumpFile
         self.useFiddlerProxy=useFiddlerProxy
         self.syncing=False
+        self.syncThreadStarted=False
+        self.syncPauseManual=False
+        self._batchCount=0 # number of batches (see _sendBatch) in progress; sync waits until this is zero
+        self._batchLock=threading.Lock()
         self.caseSensitiveComparisons=caseSensitiveComparisons
         self.validatePoints=validatePoints
         self.accountData=None
@@ -316,7 +423,7 @@ class CaltopoSession():
             r=self._sendRequest('post','[NEW]',j,domainAndPort=self.domainAndPort)
             if r:
                 self.mapID=r.rstrip('/').split('/')[-1]
-                self.s=requests.session()
+                self.s=self._newHttpSession()
                 self._sendUserdata() # to get session cookies for new session
                 time.sleep(1) # to avoid a 401 on the subsequent get request
                 self.delMarker('11111111-1111-1111-1111-111111111111')
@@ -456,6 +563,66 @@ class CaltopoSession():
 
         return True
 
+    def _newHttpSession(self) -> requests.Session:
+        """Internal method to create the requests session used by ._sendRequest, with a pooled adapter mounted for .domainAndPort.\n
+        Called from __init__, and from .openMap when a new map is created.
+
+        :return: The new session
+        :rtype: requests.Session
+        """
+        self.s=requests.session()
+        self._httpAdapters={}
+        if self.domainAndPort:
+            self._mountHttpAdapter(self.domainAndPort)
+        return self.s
+
+    def _mountHttpAdapter(self,domainAndPort: str):
+        """Internal method to mount a pooled, keep-alive adapter with retries on the current requests session, for both http and https requests to the specified domainAndPort.\n
+        Only idempotent methods (GET and DELETE) are retried; POST requests are left to the caller (see ._sendRetry).
+
+        :param domainAndPort: Domain-and-port portion of the URL
+        :type domainAndPort: str
+        """
+        retry=Retry(
+            total=self.httpRetries,
+            backoff_factor=self.httpRetryBackoff,
+            status_forcelist=(502,503,504),
+            allowed_methods=self.adapterRetryMethods,
+            raise_on_status=False)
+        adapter=KeepAliveHTTPAdapter(
+            keepAlive=self.keepAlive,
+            pool_connections=self.poolConnections,
+            pool_maxsize=self.poolMaxSize,
+            max_retries=retry)
+        for prefix in ['http://','https://']:
+            self.s.mount(prefix+domainAndPort,adapter)
+        self._httpAdapters[domainAndPort]=adapter
+
+    def getConnectionStats(self) -> dict:
+        """Get connection reuse counters for each domainAndPort that this session has sent requests to.\n
+        Counts are taken from the urllib3 connection pools of the current requests session, so they start over
+        if the session is replaced (see .openMap), and a host's counts are lost if its pool is discarded.
+
+        :return: Dict, keyed by domainAndPort; each value is a dict: \n
+            - *requests* -> number of requests sent
+            - *connections* -> number of new connections opened
+            - *reused* -> number of requests that reused an existing connection
+        :rtype: dict
+        """
+        stats={}
+        for [domainAndPort,adapter] in self._httpAdapters.items():
+            managers=[adapter.poolmanager]+list(adapter.proxy_manager.values())
+            nRequests=0
+            nConnections=0
+            for manager in managers:
+                for key in list(manager.pools.keys()):
+                    pool=manager.pools.get(key)
+                    if pool is not None:
+                        nRequests+=pool.num_requests
+                        nConnections+=pool.num_connections
+            stats[domainAndPort]={'requests':nRequests,'connections':nConnections,'reused':max(0,nRequests-nConnections)}
+        return stats
+
     def _caseMatch(self,a:str,b:str) -> bool:
         """Compare two input strings to see if they are equal, based on the value of .caseSensitiveComparisons.
     
@@ -763,14 +930,15 @@ class CaltopoSession():
            - called once from .openMap, when the map is first opened \n
            - called as needed from ._refresh
 
+        :return: True if the sync succeeded, False if it failed, or None if it was skipped because another sync is in progress
         """        
-        logging.info('sync marker: '+self.mapID+' begin')
+        syncLog.info('sync marker: '+self.mapID+' begin')
         if not self.mapID or self.apiVersion<0:
-            logging.error('sync request invalid: this caltopo session is not associated with a map.')
+            syncLog.error('sync request invalid: this caltopo session is not associated with a map.')
             return False
         if self.syncing:
-            logging.warning('sync-within-sync requested; returning to calling code.')
-            return False
+            syncLog.warning('sync-within-sync requested; returning to calling code.')
+            return None # skipped, not failed: the sync loop leaves the interval and failure count unchanged
         self.syncing=True
 
         # Keys under 'result':
@@ -784,9 +952,41 @@ class CaltopoSession():
 
         # logging.info('Sending caltopo "since" request...')
         rj=self._sendRequest('get','since/'+str(max(0,self.lastSuccessfulSyncTimestamp-500)),None,returnJson='ALL',timeout=self.syncTimeout)
-        logging.info("At request to sync")
+        return self._processSyncResponse(rj)
+
+    async def _doSyncAsync(self):
+        """Internal coroutine equivalent of ._doSync, sending the 'since' request through ._sendRequestAsync. **Calling this method directly could cause sync problems.** \n
+           - called on a regular interval from .syncLoopAsync
+
+        :return: True if the sync succeeded, False if it failed, or None if it was skipped because another sync is in progress
+        """
+        syncLog.info('sync marker: '+self.mapID+' begin (async)')
+        if not self.mapID or self.apiVersion<0:
+            syncLog.error('sync request invalid: this caltopo session is not associated with a map.')
+            return False
+        if self.syncing:
+            syncLog.warning('sync-within-sync requested; returning to calling code.')
+            return None # skipped, not failed: the sync loop leaves the interval and failure count unchanged
+        self.syncing=True
+        try:
+            rj=await self._sendRequestAsync('get','since/'+str(max(0,self.lastSuccessfulSyncTimestamp-500)),None,returnJson='ALL',timeout=self.syncTimeout)
+        except:
+            self.syncing=False
+            raise
+        return self._processSyncResponse(rj)
+
+    def _processSyncResponse(self,rj):
+        """Internal method to process the response to a 'since' request; called from ._doSync and ._doSyncAsync after the request completes.\n
+        Merges the response into the cache, calls the callbacks, and clears .syncing.
+
+        :param rj: Return value of the 'since' request (entire response json, or False)
+        :return: True if the response was valid and was processed; False otherwise
+        :rtype: bool
+        """
+        rval=False
+        syncLog.debug("At request to sync")
         if rj and rj['status']=='ok':
-            logging.info("At request to sync2")
+            syncLog.debug("At request to sync2")
             if self.syncDumpFile:
                 with open(insertBeforeExt(self.syncDumpFile,'.since'+str(max(0,self.lastSuccessfulSyncTimestamp-500))),"w") as f:
                     f.write(json.dumps(rj,indent=3))
@@ -797,87 +997,149 @@ class CaltopoSession():
             if self.syncCallback:
                 self.syncCallback()
             rjr=rj['result']
+            self._lastSyncChanged='ids' in rjr.keys() or len(rjr['state']['features'])>0
+            callbacks=self._mergeSyncResult(rjr)
+            # call the feature callbacks after the cache is consistent and unlocked
+            for [callback,args] in callbacks:
+                callback(*args)
+
+            if self.cacheDumpFile:
+                with open(insertBeforeExt(self.cacheDumpFile,'.cache'+str(max(0,self.lastSuccessfulSyncTimestamp))),"w") as f:
+                    f.write('sync cleanup:')
+                    f.write('  mapIDs='+str(self.mapID)+'\n\n')
+                    # f.write('  mapSFIDs='+str(mapSFIDs)+'\n\n')
+                    with self._cacheLock:
+                        f.write(json.dumps(self.mapData,indent=3))
+
+            # self.syncing=False
+            self.lastSuccessfulSyncTSLocal=int(time.time()*1000)
+            rval=True
+            if self.sync:
+                if not threading.main_thread().is_alive():
+                    syncLog.info('Main thread has ended; sync is stopping...')
+                    self.sync=False
+                # if threading.main_thread().is_alive():
+                #     # this is where the blocking sleep happens, instead of spawning a new thread;
+                #     #  normally this function is being called in a separate thread anyway, so
+                #     #  the main thread can continue while this thread sleeps
+                #     logging.info('  sleeping for specified sync interval ('+str(self.syncInterval)+' seconds)...')
+                #     time.sleep(self.syncInterval)
+                #     while self.syncPause: # wait until at least one second after sendRequest finishes
+                #         logging.info('  sync is paused - sleeping for one second')
+                #         time.sleep(1)
+                #     self._doSync() # will this trigger the recursion limit eventually?  Rethink looping method!
+                # else:
+                #     logging.info('Main thread has ended; sync is stopping...')
+
+        elif self.syncThreadStarted:
+            # the sync loop keeps trying, with backoff (see _nextSyncInterval); the link is degraded but not dead
+            syncLog.error('Sync returned invalid or no response; sync will be retried: %s',LogPayload(rj))
+        else:
+            syncLog.error('Sync returned invalid or no response; sync aborted: %s',LogPayload(rj))
+            self.sync=False
+            self.apiVersion=-1 # downstream tools may use apiVersion as indicator of link status
+        self.syncing=False
+        syncLog.info('sync marker: '+self.mapID+' end')
+        return rval
+
+    def _mergeSyncResult(self,rjr: dict) -> list:
+        """Internal method to merge the 'result' of a 'since' response into the cache (.mapData).\n
+        The cache is modified while holding ._cacheLock; feature callbacks are not called here, since they
+        may need to read the cache or block on other threads.  Instead, they are returned to the caller
+        (._doSync) to be called after the lock is released.
+
+        :param rjr: The 'result' value of the 'since' response
+        :type rjr: dict
+        :return: List of (callback,args) tuples, in the sequence they should be called
+        :rtype: list
+        """
+        callbacks=[]
+        with self._cacheLock:
             rjrsf=rjr['state']['features']
-            logging.info("At request to sync3:"+str(rjr)+":"+str(rjrsf))
+            syncLog.debug('since response: %s',LogPayload(rjr))
             
             # 1 - if 'ids' exists, use it verbatim; cleanup happens later
+            #  (the old ids dict is replaced rather than modified, so a reference is enough for cleanup)
             idsBefore=None
             if 'ids' in rjr.keys():
-                idsBefore=copy.deepcopy(self.mapData['ids'])
+                idsBefore=self.mapData['ids']
                 self.mapData['ids']=rjr['ids']
-                logging.info('  Updating "ids"')
+                syncLog.info('  Updating "ids"')
             
             # 2 - update existing features as needed
             if len(rjrsf)>0:
-                logging.info('  processing '+str(len(rjrsf))+' feature(s):'+str([x['id'] for x in rjrsf]))
+                syncLog.info('  processing %d feature(s): %s',len(rjrsf),LogPayload(rjrsf,formatter=lambda fl: str([x['id'] for x in fl])))
                 # logging.info(json.dumps(rj,indent=3))
                 for f in rjrsf:
                     rjrfid=f['id']
                     prop=f['properties']
                     title=str(prop.get('title',None))
                     featureClass=str(prop['class'])
-                    processed=False
-                    for i in range(len(self.mapData['state']['features'])):
-                        # only modify existing cache data if id and class are both matches:
-                        #  subset apptracks can have the same id as the finished apptrack shape
-                        if self.mapData['state']['features'][i]['id']==rjrfid and self.mapData['state']['features'][i]['properties']['class']==featureClass:
-                            # don't simply overwrite the entire feature entry:
-                            #  - if only geometry was changed, indicated by properties['nop']=true,
-                            #    then leave properties alone and just overwrite geometry;
-                            #  - if only properties were changed, geometry will not be in the response,
-                            #    so leave geometry alone
-                            #  SO:
-                            #  - if f->prop->title exists, replace the entire prop dict
-                            #  - if f->geometry exists, replace the entire geometry dict
-                            if 'title' in prop.keys():
-                                if self.mapData['state']['features'][i]['properties']!=prop:
-                                    logging.info('  Updating properties for '+featureClass+':'+title)
-                                    # logging.info('    old:'+json.dumps(self.mapData['state']['features'][i]['properties']))
-                                    # logging.info('    new:'+json.dumps(prop))
-                                    self.mapData['state']['features'][i]['properties']=prop
-                                    if self.propertyUpdateCallback:
-                                        self.propertyUpdateCallback(f)
-                                else:
-                                    logging.info('  response contained properties for '+featureClass+':'+title+' but they matched the cache, so no cache update or callback is performed')
-                            if title=='None':
-                                title=self.mapData['state']['features'][i]['properties']['title']
-                            if 'geometry' in f.keys():
-                                if self.mapData['state']['features'][i]['geometry']!=f['geometry']:
-                                    logging.info('  Updating geometry for '+featureClass+':'+title)
-                                    # if geometry.incremental exists and is true, append new coordinates to existing coordinates
-                                    # otherwise, replace the entire geometry value
-                                    fg=f['geometry']
-                                    mdsfg=self.mapData['state']['features'][i]['geometry']
-                                    if fg.get('incremental',None):
-                                        mdsfgc=mdsfg['coordinates']
-                                        latestExistingTS=mdsfgc[-1][3]
-                                        fgc=fg.get('coordinates',[])
-                                        # avoid duplicates without walking the entire existing list of points;
-                                        #  assume that timestamps are strictly increasing in list item sequence
-                                        # walk forward through new points:
-                                        # if timestamp is more recent than latest existing point, then append the rest of the new point list
-                                        for n in range(len(fgc)):
-                                            if fgc[n][3]>latestExistingTS:
-                                                mdsfgc+=fgc[n:]
-                                                break
-                                        mdsfg['size']=len(mdsfgc)
-                                    else:
-                                        self.mapData['state']['features'][i]['geometry']=f['geometry']
-                                    if self.geometryUpdateCallback:
-                                        self.geometryUpdateCallback(f)
+                    # only modify existing cache data if id and class are both matches:
+                    #  subset apptracks can have the same id as the finished apptrack shape
+                    cached=self._classIndex.get(featureClass,{}).get(rjrfid)
+                    if cached is not None:
+                        # don't simply overwrite the entire feature entry:
+                        #  - if only geometry was changed, indicated by properties['nop']=true,
+                        #    then leave properties alone and just overwrite geometry;
+                        #  - if only properties were changed, geometry will not be in the response,
+                        #    so leave geometry alone
+                        #  SO:
+                        #  - if f->prop->title exists, replace the entire prop dict
+                        #  - if f->geometry exists, replace the entire geometry dict
+                        if 'title' in prop.keys():
+                            if cached['properties']!=prop:
+                                syncLog.info('  Updating properties for '+featureClass+':'+title)
+                                # logging.info('    old:'+json.dumps(cached['properties']))
+                                # logging.info('    new:'+json.dumps(prop))
+                                cached['properties']=prop
+                                self._indexFeature(cached) # title, letter, or folder may have changed
+                                if self.propertyUpdateCallback:
+                                    callbacks.append((self.propertyUpdateCallback,(f,)))
+                            else:
+                                syncLog.info('  response contained properties for '+featureClass+':'+title+' but they matched the cache, so no cache update or callback is performed')
+                        if title=='None':
+                            title=cached['properties']['title']
+                        if 'geometry' in f.keys():
+                            if cached['geometry']!=f['geometry']:
+                                syncLog.info('  Updating geometry for '+featureClass+':'+title)
+                                # if geometry.incremental exists and is true, append new coordinates to existing coordinates
+                                # otherwise, replace the entire geometry value
+                                fg=f['geometry']
+                                mdsfg=cached['geometry']
+                                if fg.get('incremental',None):
+                                    mdsfgc=mdsfg['coordinates']
+                                    latestExistingTS=mdsfgc[-1][3]
+                                    fgc=fg.get('coordinates',[])
+                                    # avoid duplicates without walking the entire existing list of points;
+                                    #  assume that timestamps are strictly increasing in list item sequence
+                                    # walk forward through new points:
+                                    # if timestamp is more recent than latest existing point, then append the rest of the new point list
+                                    for n in range(len(fgc)):
+                                        if fgc[n][3]>latestExistingTS:
+                                            mdsfgc+=fgc[n:]
+                                            break
+                                    mdsfg['size']=len(mdsfgc)
                                 else:
-                                    logging.info('  response contained geometry for '+featureClass+':'+title+' but it matched the cache, so no cache update or callback is performed')
-                            processed=True
-                            break
+                                    cached['geometry']=f['geometry']
+                                self._geometryChanged((rjrfid,featureClass))
+                                if self.geometryUpdateCallback:
+                                    callbacks.append((self.geometryUpdateCallback,(f,)))
+                            else:
+                                syncLog.info('  response contained geometry for '+featureClass+':'+title+' but it matched the cache, so no cache update or callback is performed')
                     # 2b - otherwise, create it - and add to ids so it doesn't get cleaned
-                    if not processed:
+                    else:
                         # logging.info('Adding to cache:'+featureClass+':'+title)
                         self.mapData['state']['features'].append(f)
-                        if f['id'] not in self.mapData['ids'][prop['class']]:
-                            self.mapData['ids'][prop['class']].append(f['id'])
+                        self._indexFeature(f)
+                        # if 'ids' was part of this response, it already includes the new feature
+                        if idsBefore is None:
+                            cids=self.mapData['ids'].setdefault(prop['class'],[])
+                            if f['id'] not in cids:
+                                cids.append(f['id'])
                         # logging.info('mapData immediate:\n'+json.dumps(self.mapData,indent=3))
                         if self.newFeatureCallback:
-                            self.newFeatureCallback(f)
+                            callbacks.append((self.newFeatureCallback,(f,)))
 
             # 3 - cleanup - remove features from the cache whose ids are no longer in cached id list
             #  (ids will be part of the response whenever feature(s) were added or deleted)
@@ -891,18 +1153,26 @@ class CaltopoSession():
             # edit the cache directly: https://stackoverflow.com/a/1157174/3577105
 
             if idsBefore:
+                # diff the old and new id sets per class in one pass, then rebuild the features list once
                 deletedDict={}
-                deletedAnythingFlag=False
+                deletedKeys=set()
                 for c in idsBefore.keys():
-                    for id in idsBefore[c]:
-                        if id not in self.mapData['ids'][c]:
-                            self.mapData['state']['features'][:]=(f for f in self.mapData['state']['features'] if not(f['id']==id and f['properties']['class']==c))
-                            deletedDict.setdefault(c,[]).append(id)
-                            deletedAnythingFlag=True
-                            if self.deletedFeatureCallback:
-                                self.deletedFeatureCallback(id,c)
-                if deletedAnythingFlag:
-                    logging.info('deleted items have been removed from cache:\n'+json.dumps(deletedDict,indent=3))
+                    deletedIds=set(idsBefore[c])-set(self.mapData['ids'].get(c,[]))
+                    if deletedIds:
+                        deletedDict[c]=[id for id in idsBefore[c] if id in deletedIds]
+                        deletedKeys.update((id,c) for id in deletedIds)
+                if deletedKeys:
+                    self.mapData['state']['features'][:]=(f for f in self.mapData['state']['features'] if (f['id'],f['properties']['class']) not in deletedKeys)
+                    for c in deletedDict.keys():
+                        for id in deletedDict[c]:
+                            self._unindexFeature((id,c))
+                    syncLog.info('deleted items have been removed from cache: %s',LogPayload(deletedDict,formatter=json.dumps))
+                    if self.deletedFeatureCallback:
+                        for c in deletedDict.keys():
+                            for id in deletedDict[c]:
+                                callbacks.append((self.deletedFeatureCallback,(id,c)))
+                    if self.deletedFeaturesCallback:
+                        callbacks.append((self.deletedFeaturesCallback,([(id,c) for c in deletedDict.keys() for id in deletedDict[c]],)))
             
 
             # l1=len(self.mapData['state']['features'])
@@ -931,40 +1201,7 @@ class CaltopoSession():
             # #         if self.deletedFeatureCallback:
             # #             self.deletedFeatureCallback(self.mapData['state']['features'][i])
             # #         del self.mapData['state']['features'][i]
-            
-
-            if self.cacheDumpFile:
-                with open(insertBeforeExt(self.cacheDumpFile,'.cache'+str(max(0,self.lastSuccessfulSyncTimestamp))),"w") as f:
-                    f.write('sync cleanup:')
-                    f.write('  mapIDs='+str(self.mapID)+'\n\n')
-                    # f.write('  mapSFIDs='+str(mapSFIDs)+'\n\n')
-                    f.write(json.dumps(self.mapData,indent=3))
-
-            # self.syncing=False
-            self.lastSuccessfulSyncTSLocal=int(time.time()*1000)
-            if self.sync:
-                if not threading.main_thread().is_alive():
-                    logging.info('Main thread has ended; sync is stopping...')
-                    self.sync=False
-                # if threading.main_thread().is_alive():
-                #     # this is where the blocking sleep happens, instead of spawning a new thread;
-                #     #  normally this function is being called in a separate thread anyway, so
-                #     #  the main thread can continue while this thread sleeps
-                #     logging.info('  sleeping for specified sync interval ('+str(self.syncInterval)+' seconds)...')
-                #     time.sleep(self.syncInterval)
-                #     while self.syncPause: # wait until at least one second after sendRequest finishes
-                #         logging.info('  sync is paused - sleeping for one second')
-                #         time.sleep(1)
-                #     self._doSync() # will this trigger the recursion limit eventually?  Rethink looping method!
-                # else:
-                #     logging.info('Main thread has ended; sync is stopping...')
-
-        else:
-            logging.error('Sync returned invalid or no response; sync aborted:'+str(rj))
-            self.sync=False
-            self.apiVersion=-1 # downstream tools may use apiVersion as indicator of link status
-        self.syncing=False
-        logging.info('sync marker: '+self.mapID+' end')
+        return callbacks
 
     # _refresh - update the cache (self.mapData) by calling _doSync once;
     #   only relevant if sync is off; if the latest refresh is within the sync interval value (even when sync is off),
@@ -983,6 +1220,10 @@ class CaltopoSession():
         if self.syncing:
             msg+='sync already in progress'
             logging.info(msg)
+        elif self.sync and self.syncThreadStarted and not forceImmediate:
+            # the sync thread keeps the cache current; don't block the calling thread with a network request
+            msg+='sync thread is running: not syncing now'
+            # logging.info(msg)
         else:
             d=int(time.time()*1000)-self.lastSuccessfulSyncTSLocal # integer ms since last completed sync
             msg+=str(d)+'ms since last completed sync; '
@@ -1071,40 +1312,143 @@ class CaltopoSession():
         avoid blocking of the main thread.  **Calling this method directly could cause sync problems.**
         """        
         if self.syncCompletedCount==0:
-            logging.info('This is the first sync attempt; pausing for the normal sync interval before starting sync.')
+            syncLog.info('This is the first sync attempt; pausing for the normal sync interval before starting sync.')
             time.sleep(self.syncInterval)
         while self.sync:
             if not self.syncPauseManual:
                 self.syncPauseMessageGiven=False
-                while self.syncPause:
+                while self.syncPause or (self._batchCount>0 and self.sync):
                     if not threading.main_thread().is_alive():
-                        logging.info('Main thread has ended; sync is stopping...')
+                        syncLog.info('Main thread has ended; sync is stopping...')
                         self.syncPause=False
                         self.sync=False
                     if not self.syncPauseMessageGiven:
-                        logging.info(self.mapID+': sync pause begins; sync will not happen until sync pause ends')
+                        syncLog.info(self.mapID+': sync pause begins; sync will not happen until sync pause ends')
                         self.syncPauseMessageGiven=True
                     time.sleep(1)
                 if self.syncPauseMessageGiven:
-                    logging.info(self.mapID+': sync pause ends; resuming sync')
+                    syncLog.info(self.mapID+': sync pause ends; resuming sync')
                     self.syncPauseMessageGiven=False
                 syncWaited=0
                 while self.syncing and syncWaited<20: # wait for any current callbacks within _doSync() to complete, with timeout of 20 sec
-                    logging.info(' [sync from _syncLoop is waiting for current sync processing to finish, up to '+str(20-syncWaited)+' more seconds...]')
+                    syncLog.info(' [sync from _syncLoop is waiting for current sync processing to finish, up to '+str(20-syncWaited)+' more seconds...]')
                     time.sleep(1)
                     syncWaited+=1
+                ok=False
                 try:
-                    self._doSync()
-                    self.syncCompletedCount+=1
+                    ok=self._doSync()
+                    if ok:
+                        self.syncCompletedCount+=1
+                except requests.exceptions.RequestException as e:
+                    # network errors are retried with backoff rather than ending sync
+                    syncLog.warning('Network error during sync of map '+self.mapID+'; sync will be retried: '+str(e))
+                    self.syncing=False
                 except Exception as e:
-                    logging.exception('Exception during sync of map '+self.mapID+'; stopping sync:') # logging.exception logs details and traceback
+                    syncLog.exception('Exception during sync of map '+self.mapID+'; stopping sync:') # logging.exception logs details and traceback
                     # remove sync blockers, to let the thread shut down cleanly, avoiding a zombie loop when sync restart is attempted
                     self.syncPause=False
                     self.syncing=False
                     self.syncThreadStarted=False
                     self.sync=False
+                if self.sync and ok is not None: # a skipped sync is neither a success nor a failure
+                    self._nextSyncInterval(ok)
             if self.sync: # don't bother with the sleep if sync is no longer True
-                time.sleep(self.syncInterval)
+                self._syncSleep()
+
+    def _nextSyncInterval(self,ok: bool) -> float:
+        """Internal method to set .currentSyncInterval (and .syncFailureCount) after a sync attempt from the sync loop.\n
+           - after a failure: exponential backoff from syncInterval, up to syncBackoffMax, with jitter
+           - after local writes, a response with changes, or recovery from failures: syncIntervalMin (if adaptiveSync)
+           - after an empty response: 1.5 times the previous interval, up to syncIntervalMax (if adaptiveSync)
+
+        :param ok: True if the sync attempt succeeded
+        :type ok: bool
+        :return: The new value of .currentSyncInterval, in seconds
+        :rtype: float
+        """
+        if not ok:
+            self.syncFailureCount+=1
+            backoff=min(self.syncBackoffMax,self.syncInterval*(2**(self.syncFailureCount-1)))
+            self.currentSyncInterval=backoff*random.uniform(0.5,1.0) # jitter, so that several clients don't retry in lockstep
+            syncLog.warning(self.mapID+': '+str(self.syncFailureCount)+' consecutive sync failure(s); next attempt in '+str(round(self.currentSyncInterval,1))+' seconds')
+            return self.currentSyncInterval
+        recovered=self.syncFailureCount>0
+        if recovered:
+            syncLog.info(self.mapID+': sync recovered after '+str(self.syncFailureCount)+' failure(s)')
+        self.syncFailureCount=0
+        if not self.adaptiveSync:
+            self.currentSyncInterval=self.syncInterval
+        elif self._localWriteFlag or self._lastSyncChanged or recovered:
+            self.currentSyncInterval=self.syncIntervalMin
+        else:
+            self.currentSyncInterval=min(self.syncIntervalMax,max(self.syncIntervalMin,self.currentSyncInterval*1.5))
+        self._localWriteFlag=False
+        return self.currentSyncInterval
+
+    def _syncSleep(self):
+        """Internal method to wait .currentSyncInterval seconds in the sync thread.\n
+        The wait ends early (but not before syncIntervalMin) if a local write happens while the link is healthy,
+        so that the result of the write shows up in the cache soon; it also ends if sync is stopped.
+        """
+        t0=time.time()
+        while self.sync:
+            if not threading.main_thread().is_alive():
+                syncLog.info('Main thread has ended; sync is stopping...')
+                self.sync=False
+                break
+            elapsed=time.time()-t0
+            if elapsed>=self.currentSyncInterval:
+                break
+            if self.adaptiveSync and self._localWriteFlag and self.syncFailureCount==0 and elapsed>=self.syncIntervalMin:
+                break
+            time.sleep(min(0.25,self.currentSyncInterval-elapsed))
+
+    # syncLoopAsync - coroutine alternative to the sync thread; lets one event loop keep several sessions
+    #  in sync, for example:
+    #    cts1=CaltopoSession(...,mapID='ABCD',sync=False)
+    #    cts2=CaltopoSession(...,mapID='EFGH',sync=False)
+    #    async def main():
+    #        await asyncio.gather(cts1.syncLoopAsync(),cts2.syncLoopAsync())
+    #  call .closeAsync (or set .sync to False) to end the loop
+    async def syncLoopAsync(self):
+        """Keep the cache in sync with the hosted map from an asyncio event loop, instead of from the sync thread.\n
+        The session should be created with sync=False; this coroutine runs until .sync is set to False
+        (see .closeAsync) or a sync fails.  While it runs, cache reads such as .getFeatures do not send
+        'since' requests from the calling thread (see ._refresh).
+        """
+        if not self.mapID or self.apiVersion<0:
+            syncLog.error('syncLoopAsync request invalid: this caltopo session is not associated with a map.')
+            return False
+        if self.syncThreadStarted:
+            syncLog.info('Caltopo sync is already running for map '+self.mapID+'.')
+            return False
+        self.sync=True
+        self.syncThreadStarted=True # the loop plays the role of the sync thread
+        syncLog.info('Caltopo async syncing initiated for map '+self.mapID+'.')
+        try:
+            while self.sync:
+                await asyncio.sleep(self.currentSyncInterval)
+                while self.sync and (self.syncPause or self._batchCount>0 or self.syncPauseManual):
+                    await asyncio.sleep(1)
+                if not self.sync:
+                    break
+                ok=False
+                try:
+                    ok=await self._doSyncAsync()
+                    if ok:
+                        self.syncCompletedCount+=1
+                except Exception as e:
+                    if (httpx is not None and isinstance(e,httpx.TransportError)) or isinstance(e,requests.exceptions.RequestException):
+                        syncLog.warning('Network error during async sync of map '+self.mapID+'; sync will be retried: '+str(e))
+                        self.syncing=False
+                    else:
+                        syncLog.exception('Exception during async sync of map '+self.mapID+'; stopping sync:')
+                        self.syncing=False
+                        self.sync=False
+                if self.sync and ok is not None: # a skipped sync is neither a success nor a failure
+                    self._nextSyncInterval(ok)
+        finally:
+            self.syncThreadStarted=False
 
     # return the token needed for signed request
     #  (to be used as they value for the 'signature' key of request params dict)
@@ -1118,11 +1462,36 @@ class CaltopoSession():
         :rtype: str
         """             
         # logging.info("pre-hashed data:"+data)                
-        token=hmac.new(base64.b64decode(self.key),data.encode(),'sha256').digest()
-        token=base64.b64encode(token).decode()
+        # the decoded key is only hashed into an HMAC object once per key value; each token
+        #  is computed on a copy of that object, which is also safe across threads
+        if getattr(self,'_hmacKey',None)!=self.key:
+            self._hmacBase=hmac.new(base64.b64decode(self.key),digestmod='sha256')
+            self._hmacKey=self.key
+        h=self._hmacBase.copy()
+        h.update(data.encode())
+        token=base64.b64encode(h.digest()).decode()
         # logging.info("hashed data:"+str(token))
         return token
 
+    def _signParams(self,params: dict,verbAndPath: str,jsonStr: str):
+        """Internal method to add the id, expiration, and signature of a signed (internet) request to the request parameters.\n
+        Normally only called from _prepareRequest.
+
+        :param params: Request parameters dict, modified in place; for GET and DELETE, the empty 'json' value is also set here
+        :type params: dict
+        :param verbAndPath: HTTP verb and URL path, e.g. 'POST /api/v1/map/ABCD/Marker'
+        :type verbAndPath: str
+        :param jsonStr: Serialized request body for POST requests; empty string for GET and DELETE
+        :type jsonStr: str
+        """
+        expires=int(time.time()*1000)+120000 # 2 minutes from current time, in milliseconds
+        data=verbAndPath+"\n"+str(expires)+"\n"+jsonStr  # for GET and DELETE, the last newline is needed as placeholder for json
+        if not jsonStr:
+            params["json"]=''   # no body, but is required
+        params["id"]=self.id
+        params["expires"]=expires
+        params["signature"]=self._getToken(data)
+
     def _validatePoints(self,geom: list,modify: bool=False):
         """Internal method to find any points from the specified geometry that are 'obviously' lon-lat-swapped.  \n
         Normally only called from _sendRequest.
@@ -1252,6 +1621,84 @@ class CaltopoSession():
         """        
         # objgraph.show_growth()
         # logging.info('RAM:'+str(process.memory_info().rss/1024**2)+'MB')
+        self.syncPause=True
+        if type in ['post','delete']:
+            self._localWriteFlag=True
+        try:
+            req=self._prepareRequest(type,apiUrlEnd,j,id=id,timeout=timeout,domainAndPort=domainAndPort)
+            if not req:
+                return False
+            if type=="post":
+                r=self.s.post(req['url'],timeout=req['timeout'],proxies=self.proxyDict,**req['kwargs'])
+                requestLog.debug('POST:%s -> %s',req['url'],r.status_code) # the request body was logged (redacted) by _prepareRequest
+            elif type=="get":
+                r=self.s.get(req['url'],timeout=req['timeout'],proxies=self.proxyDict,**req['kwargs'])
+            else:
+                r=self.s.delete(req['url'],timeout=req['timeout'],proxies=self.proxyDict,**req['kwargs'])
+                # logging.info("URL:"+str(url))
+                # logging.info("Ris:"+str(r))
+            return self._handleResponse(r,req,returnJson)
+        finally:
+            self.syncPause=False
+
+    async def _sendRequestAsync(self,type: str,apiUrlEnd: str,j: dict,id: str='',returnJson: str='',timeout: int=0,domainAndPort: str=''):
+        """Coroutine equivalent of ._sendRequest, with the same arguments and return values.\n
+        If httpx is installed, the request is sent with an httpx.AsyncClient owned by this session (see ._getAsyncClient),
+        so many requests (from several sessions) can be driven by one event loop without a thread per request.
+        Otherwise, or if the Fiddler proxy is in use, ._sendRequest is run in the event loop's default executor.
+
+        :return: see ._sendRequest
+        """
+        if httpx is None or self.proxyDict:
+            loop=asyncio.get_running_loop()
+            return await loop.run_in_executor(None,functools.partial(self._sendRequest,type,apiUrlEnd,j,id=id,returnJson=returnJson,timeout=timeout,domainAndPort=domainAndPort))
+        self.syncPause=True
+        if type in ['post','delete']:
+            self._localWriteFlag=True
+        try:
+            req=self._prepareRequest(type,apiUrlEnd,j,id=id,timeout=timeout,domainAndPort=domainAndPort)
+            if not req:
+                return False
+            kwargs=dict(req['kwargs'])
+            kwargs.pop('allow_redirects',None) # httpx does not follow redirects by default
+            r=await self._getAsyncClient().request(type.upper(),req['url'],timeout=req['timeout'],**kwargs)
+            if type=="post":
+                requestLog.debug('POST:%s -> %s',req['url'],r.status_code) # the request body was logged (redacted) by _prepareRequest
+            return self._handleResponse(r,req,returnJson)
+        finally:
+            self.syncPause=False
+
+    def _getAsyncClient(self):
+        """Internal method to get this session's httpx.AsyncClient for the running event loop, creating it if needed.\n
+        The client shares cookies with the blocking requests session, and uses the same pool size as the requests adapters.
+
+        :return: httpx.AsyncClient
+        """
+        loop=asyncio.get_running_loop()
+        if getattr(self,'_asyncClientLoop',None) is not loop:
+            limits=httpx.Limits(max_connections=self.poolMaxSize,max_keepalive_connections=self.poolMaxSize)
+            transport=httpx.AsyncHTTPTransport(retries=self.httpRetries,limits=limits)
+            self._asyncClient=httpx.AsyncClient(transport=transport,cookies=self.s.cookies)
+            self._asyncClientLoop=loop
+        return self._asyncClient
+
+    async def closeAsync(self):
+        """Stop .syncLoopAsync (if running) and close this session's async HTTP client, if one was created.\n
+        Call this from the event loop before it is closed.
+        """
+        self.sync=False
+        client=getattr(self,'_asyncClient',None)
+        if client is not None:
+            await client.aclose()
+            self._asyncClient=None
+            self._asyncClientLoop=None
+
+    def _prepareRequest(self,type: str,apiUrlEnd: str,j: dict,id: str='',timeout: int=0,domainAndPort: str=''):
+        """Internal method to build the URL, signature, and arguments for a request; called from ._sendRequest and ._sendRequestAsync.\n
+        The arguments are the same as ._sendRequest.
+
+        :return: dict of request details (type, url, timeout, kwargs, newMap), or False if the request should not be sent
+        """
         # validate coordinates
         if self.validatePoints and j:
             jg=j.get('geometry')
@@ -1259,11 +1706,10 @@ class CaltopoSession():
                 coords=jg.get('coordinates') # may be a triple-nested list to accommodate multipart geometries
                 if coords:
                     j['geometry']['coordinates']=self._validatePoints(coords,modify=self.validatePoints=='modify')
-        self.syncPause=True
         timeout=timeout or self.syncTimeout
         newMap='[NEW]' in apiUrlEnd  # specific mapID that indicates a new map should be created
         if self.apiVersion<0:
-            logging.error("sendRequest: caltopo session is invalid or is not associated with a map; request aborted: type="+str(type)+" apiUrlEnd="+str(apiUrlEnd))
+            requestLog.error("sendRequest: caltopo session is invalid or is not associated with a map; request aborted: type="+str(type)+" apiUrlEnd="+str(apiUrlEnd))
             return False
         mid=self.apiUrlMid
         if 'api/' in apiUrlEnd.lower():
@@ -1291,8 +1737,10 @@ class CaltopoSession():
             apiUrlEnd=apiUrlEnd.replace("[MAPID]",self.mapID)
         domainAndPort=domainAndPort or self.domainAndPort # use arg value if specified
         if not domainAndPort:
-            logging.error("sendRequest was attempted but no valid domainAndPort was specified.")
+            requestLog.error("sendRequest was attempted but no valid domainAndPort was specified.")
             return False
+        if domainAndPort not in self._httpAdapters:
+            self._mountHttpAdapter(domainAndPort)
         prefix='http://'
         # set a flag: is this an internet request?
         accountId=self.accountId
@@ -1304,10 +1752,10 @@ class CaltopoSession():
             #     logging.warning('A request is about to be sent to the internet, but accountIdInternet was not specified.  The request will use accountId, but will fail if that ID does not have valid permissions at the internet host.')
             prefix='https://'
             if newMap:
-                logging.error("New map creation only works with CalTopo Desktop in this version of caltopo_python.")
+                requestLog.error("New map creation only works with CalTopo Desktop in this version of caltopo_python.")
                 return False
             if not self.key or not self.id:
-                logging.error("There was an attempt to send an internet request, but 'id' and/or 'key' was not specified for this session.  The request will not be sent.")
+                requestLog.error("There was an attempt to send an internet request, but 'id' and/or 'key' was not specified for this session.  The request will not be sent.")
                 return False
         url=prefix+domainAndPort+mid+apiUrlEnd
         wrapInJsonKey=True
@@ -1316,82 +1764,60 @@ class CaltopoSession():
         # if '/since/' not in url:
         #     logging.info("sending "+str(type)+" to "+url)
         params={}
-        paramsPrint={}
+        kwargs={} # keyword arguments for the HTTP call, other than url and timeout
         if type=="post":
+            jsonStr=json.dumps(j) # serialized once: used for the request body and for the signature
             if wrapInJsonKey:
-                params["json"]=json.dumps(j)
+                params["json"]=jsonStr
             else:
                 params=j
             if internet:
-                expires=int(time.time()*1000)+120000 # 2 minutes from current time, in milliseconds
-                data="POST "+mid+apiUrlEnd+"\n"+str(expires)+"\n"+json.dumps(j)
-                params["id"]=self.id
-                params["expires"]=expires
-                params["signature"]=self._getToken(data)
-                paramsPrint=copy.deepcopy(params)
-                paramsPrint['id']='.....'
-                paramsPrint['signature']='.....'
-            else:
-                paramsPrint=params
+                self._signParams(params,"POST "+mid+apiUrlEnd,jsonStr)
             # logging.info("SENDING POST to '"+url+"':")
-            # logging.info(json.dumps(paramsPrint,indent=3))
             # don't print the entire PDF generation request - upstream code can print a PDF data summary
-            if 'PDFLink' not in url:
-                logging.info(jsonForLog(paramsPrint))
+            #  (the redacted copy is only built if it will actually be logged)
+            if 'PDFLink' not in url and requestLog.isEnabledFor(logging.DEBUG):
+                paramsPrint=params
+                if internet:
+                    paramsPrint=dict(params,id='.....',signature='.....')
+                requestLog.debug('%s',LogPayload(paramsPrint,formatter=jsonForLog))
             # send the dict in the request body for POST requests, using the 'data' arg instead of 'params'
-            r=self.s.post(url,data=params,timeout=timeout,proxies=self.proxyDict,allow_redirects=False)
-            logging.info("POST:"+str(url)+str(params))
+            kwargs={'data':params,'allow_redirects':False}
         elif type=="get": # no need for json in GET; sending null JSON causes downstream error
             # logging.info("SENDING GET to '"+url+"':")
             if internet:
-                expires=int(time.time()*1000)+120000 # 2 minutes from current time, in milliseconds
-                data="GET "+mid+apiUrlEnd+"\n"+str(expires)+"\n"  #last newline needed as placeholder for json
-                params["json"]=''   # no body, but is required
-                params["id"]=self.id
-                params["expires"]=expires
-                params["signature"]=self._getToken(data)
-                paramsPrint=copy.deepcopy(params)
-                paramsPrint['id']='.....'
-                paramsPrint['signature']='.....'
+                self._signParams(params,"GET "+mid+apiUrlEnd,'')
                 # 'data' argument sends dict in body; 'params' sends dict in URL query string,
                 #   which is needed by signed GET requests such as api/v1/acct/....../since/0
                 #   and for all requests to maps with 'secret' permission; so, might as well just
                 #   sign all GET requests to the internet, rather than try to determine permission
-                r=self.s.get(url,params=params,timeout=timeout,proxies=self.proxyDict,allow_redirects=False)
-            else:
-                r=self.s.get(url,timeout=timeout,proxies=self.proxyDict)
+                kwargs={'params':params,'allow_redirects':False}
             #DEBUG# logging.info("SENDING GET to '"+url+"'")
-            # logging.info(json.dumps(paramsPrint,indent=3))
-            # logging.info('Prepared request URL:')
-            # logging.info(r.request.url)
         elif type=="delete":
             if internet:
-                expires=int(time.time()*1000)+120000 # 2 minutes from current time, in milliseconds
-                data="DELETE "+mid+apiUrlEnd+"\n"+str(expires)+"\n"  #last newline needed as placeholder for json
-                params["json"]=''   # no body, but is required
-                params["id"]=self.id
-                params["expires"]=expires
-                params["signature"]=self._getToken(data)
-                paramsPrint=copy.deepcopy(params)
-                paramsPrint['id']='.....'
-                paramsPrint['signature']='.....'
-            else:
-                paramsPrint=params
-            logging.info("SENDING DELETE to '"+url+"'")
-            # logging.info(json.dumps(paramsPrint,indent=3))
+                self._signParams(params,"DELETE "+mid+apiUrlEnd,'')
+            requestLog.info("SENDING DELETE to '"+url+"'")
             # logging.info("Key:"+str(self.key))
-            r=self.s.delete(url,params=params,timeout=timeout,proxies=self.proxyDict)   ## use params for query vs data for body data
-            # logging.info("URL:"+str(url))
-            # logging.info("Ris:"+str(r))
+            kwargs={'params':params}   ## use params for query vs data for body data
         else:
-            logging.error("sendRequest: Unrecognized request type:"+str(type))
-            self.syncPause=False
+            requestLog.error("sendRequest: Unrecognized request type:"+str(type))
             return False
+        return {'type':type,'url':url,'timeout':timeout,'kwargs':kwargs,'newMap':newMap}
+
+    def _handleResponse(self,r,req: dict,returnJson: str=''):
+        """Internal method to check a response and build the return value of ._sendRequest or ._sendRequestAsync.
 
+        :param r: Response object; requests and httpx responses both work, since only .status_code, .json(), and .text are used
+        :param req: Request details dict, as returned by ._prepareRequest
+        :type req: dict
+        :param returnJson: see ._sendRequest; defaults to ''
+        :type returnJson: str, optional
+        :return: see ._sendRequest
+        """
         if r.status_code!=200:
-            logging.info("response code = "+str(r.status_code))
+            requestLog.info("response code = "+str(r.status_code))
 
-        if newMap:
+        if req['newMap']:
             # for CTD 4221 and newer, and internet, a new map request should return 200, and the response data
             #  should contain the new map ID in response['result']['id']
             # for CTD 4214, a new map request should return 3xx response (redirect); if allow_redirects=False is
@@ -1400,8 +1826,7 @@ class CaltopoSession():
                 try:
                     rj=r.json()
                 except:
-                    logging.error('New map request failed: response had do decodable json:'+str(r.status_code)+':'+r.text)
-                    self.syncPause=False
+                    requestLog.error('New map request failed: response had do decodable json:'+str(r.status_code)+':'+r.text)
                     return False
                 else:
                     rjr=rj.get('result')
@@ -1409,16 +1834,13 @@ class CaltopoSession():
                     if rjr:
                         newUrl=rjr['id']
                     if newUrl:
-                        logging.info('New map URL:'+newUrl)
-                        self.syncPause=False
+                        requestLog.info('New map URL:'+newUrl)
                         return newUrl
                     else:
-                        logging.error('No new map URL was returned in the response json:'+str(r.status_code)+':'+json.dumps(rj))
-                        self.syncPause=False
+                        requestLog.error('No new map URL was returned in the response json:'+str(r.status_code)+':'+json.dumps(rj))
                         return False
             else:
-                logging.error('New map request failed:'+str(r.status_code)+':'+r.text)
-                self.syncPause=False
+                requestLog.error('New map request failed:'+str(r.status_code)+':'+r.text)
                 return False
 
             # old redirect method worked with CTD 4214:
@@ -1452,8 +1874,7 @@ class CaltopoSession():
                 try:
                     rj=r.json()
                 except:
-                    logging.error("sendRequest: response had no decodable json:"+str(r))
-                    self.syncPause=False
+                    requestLog.error("sendRequest: response had no decodable json:"+str(r))
                     return False
                 else:
                     if 'status' in rj and rj['status'].lower()!='ok':
@@ -1461,8 +1882,7 @@ class CaltopoSession():
                         if 'message' in rj and 'error saving object' in rj['message'].lower():
                             msg+='; maybe the user does not have necessary permissions on this map'
                         msg+=':  '+str(rj)
-                        logging.warning(msg)
-                        self.syncPause=False
+                        requestLog.warning(msg)
                         return False
                     if returnJson=="ID":
                         id=None
@@ -1471,14 +1891,11 @@ class CaltopoSession():
                         elif 'id' in rj:
                             id=rj['id']
                         elif not rj['result']['state']['features']:  # response if no new info
-                            self.syncPause=False
                             return 0
                         elif 'result' in rj and 'id' in rj['result']['state']['features'][0]:
                             id=rj['result']['state']['features'][0]['id']
                         else:
-                            logging.info("sendRequest: No valid ID was returned from the request:")
-                            logging.info(json.dumps(rj,indent=3))
-                        self.syncPause=False
+                            requestLog.info("sendRequest: No valid ID was returned from the request: %s",LogPayload(rj,formatter=json.dumps))
                         return id
                     if returnJson=="ALL":
                         # since CTD 4221 returns 'title' as an empty string for all assignments,
@@ -1491,9 +1908,8 @@ class CaltopoSession():
                             alist=[f for f in rj['result']['state']['features'] if 'properties' in f.keys() and 'class' in f['properties'].keys() and f['properties']['class'].lower()=='assignment']
                             for a in alist:
                                 a['properties']['title']=str(a['properties'].get('letter',''))+' '+str(a['properties'].get('number',''))
-                        self.syncPause=False
                         return rj
-        self.syncPause=False
+
 
     def addFolder(self,
             label="New Folder",
@@ -1526,8 +1942,7 @@ class CaltopoSession():
             if rj:
                 rjr=rj['result']
                 id=rjr['id']
-                self.mapData['ids'].setdefault('Folder',[]).append(id)
-                self.mapData['state']['features'].append(rjr)
+                self._cacheFeature(rjr,defaultClass='Folder')
                 return id
             else:
                 return False
@@ -1578,6 +1993,67 @@ class CaltopoSession():
         if not self.mapID or self.apiVersion<0:
             logging.error('addMarker request invalid: this caltopo session is not associated with a map.')
             return False
+        j=self._markerFeature(lat,lon,title,description,color,symbol,rotation,folderId,existingId,update,size)
+        # logging.info("sending json: "+json.dumps(j,indent=3))
+        if queue:
+            self.queue.setdefault('Marker',[]).append(j)
+            return 0
+        else:
+            # return self._sendRequest('post','marker',j,id=existingId,returnJson='ID')
+            # add to .mapData immediately
+            rj=self._sendRequest('post','marker',j,id=existingId,returnJson='ALL',timeout=timeout)
+            if rj:
+                rjr=rj['result']
+                id=rjr['id']
+                self._cacheFeature(rjr,defaultClass='Marker')
+                return id
+            else:
+                return False
+
+    # addMarkers - calls asynchronous non-blocking addFeatures
+    #  each item of markerList is a dict of the keyword arguments that would be used for addMarker
+    #  ex: cts.addMarkers([{'lat':39,'lon':-120,'title':'101'},{'lat':39.1,'lon':-120,'title':'102','folderId':fid}])
+    def addMarkers(self,markerList=[],timeout=0,maxWorkers=10,retries=2):
+        """Add several markers to the current map, in a non-blocking asynchronous batch of requests.\n
+        This convenience function calls .addFeatures.
+
+        :param markerList: List of dicts, each containing keyword arguments for .addMarker (lat, lon, title, description, color, symbol, rotation, folderId, existingId, update, size); defaults to []
+        :type markerList: list, optional
+        :param timeout: Request timeout in seconds; if specified as 0 here, uses the value of .syncTimeout; defaults to 0
+        :type timeout: int, optional
+        :param maxWorkers: Maximum number of requests in flight at the same time; defaults to 10
+        :type maxWorkers: int, optional
+        :param retries: Number of times to retry a request that could not connect; defaults to 2
+        :type retries: int, optional
+        :return: List with one item per item of markerList, in the same sequence: ID of the created marker, or False if that request failed; or False if there was an error prior to the batch
+        :rtype: list
+        """
+        if not self.mapID or self.apiVersion<0:
+            logging.error('addMarkers request invalid: this caltopo session is not associated with a map.')
+            return False
+        if len(markerList)==0:
+            logging.warning('nothing to add: empty list was passed to addMarkers')
+            return False
+        return self.addFeatures([self._markerFeature(**m) for m in markerList],timeout=timeout,maxWorkers=maxWorkers,retries=retries)
+
+    def _markerFeature(self,
+            lat: float,
+            lon: float,
+            title='New Marker',
+            description='',
+            color='#FF0000',
+            symbol='point',
+            rotation=None,
+            folderId=None,
+            existingId=None,
+            update=0,
+            size=1) -> dict:
+        """Internal method to build the feature dict for a marker; called from .addMarker and .addMarkers.
+        See .addMarker for the arguments.
+
+        :return: Marker feature dict, ready to send
+        :rtype: dict
+        """
         j={}
         jp={}
         jg={}
@@ -1599,22 +2075,7 @@ class CaltopoSession():
         j['type']='Feature'
         if existingId is not None:
             j['id']=existingId
-        # logging.info("sending json: "+json.dumps(j,indent=3))
-        if queue:
-            self.queue.setdefault('Marker',[]).append(j)
-            return 0
-        else:
-            # return self._sendRequest('post','marker',j,id=existingId,returnJson='ID')
-            # add to .mapData immediately
-            rj=self._sendRequest('post','marker',j,id=existingId,returnJson='ALL',timeout=timeout)
-            if rj:
-                rjr=rj['result']
-                id=rjr['id']
-                self.mapData['ids'].setdefault('Marker',[]).append(id)
-                self.mapData['state']['features'].append(rjr)
-                return id
-            else:
-                return False
+        return j
 
     def addLine(self,
             points: list,
@@ -1685,8 +2146,7 @@ class CaltopoSession():
             if rj:
                 rjr=rj['result']
                 id=rjr['id']
-                self.mapData['ids'].setdefault('Shape',[]).append(id)
-                self.mapData['state']['features'].append(rjr)
+                self._cacheFeature(rjr,defaultClass='Shape')
                 return id
             else:
                 return False
@@ -1764,8 +2224,7 @@ class CaltopoSession():
             if rj:
                 rjr=rj['result']
                 id=rjr['id']
-                self.mapData['ids'].setdefault('Shape',[]).append(id)
-                self.mapData['state']['features'].append(rjr)
+                self._cacheFeature(rjr,defaultClass='Shape')
                 return id
             else:
                 return False
@@ -1826,8 +2285,7 @@ class CaltopoSession():
             if rj:
                 rjr=rj['result']
                 id=rjr['id']
-                self.mapData['ids'].setdefault('OperationalPeriod',[]).append(id)
-                self.mapData['state']['features'].append(rjr)
+                self._cacheFeature(rjr,defaultClass='OperationalPeriod')
                 return id
             else:
                 return False
@@ -2251,7 +2709,7 @@ class CaltopoSession():
     # delFeatures - asynchronously send a batch of non-blocking delFeature requests
     #  featuresOrIdAndClassList - a list of dicts - entire features, or, two items per dict: 'id' and 'class'
     #  see discussion at https://github.com/ncssar/sartopo_python/issues/34
-    def delFeatures(self,featuresOrIdAndClassList=[],timeout=0):
+    def delFeatures(self,featuresOrIdAndClassList=[],timeout=0,maxWorkers=10,retries=2):
         """Delete one or more features on the current map, in a non-blocking asynchronous batch of delete requests.\n
 
         :param featuresOrIdAndClassList: List of dicts specifying the features to delete; each dict is either a complete feature data object, or this simplified dict; defaults to [] \n
@@ -2260,57 +2718,497 @@ class CaltopoSession():
         :type featuresOrIdAndClassList: list, optional
         :param timeout: Request timeout in seconds; if specified as 0 here, uses the value of .syncTimeout; defaults to 0
         :type timeout: int, optional
-        :return: Return value of the asynchronous delete loop initialization routine, or False if there was an error prior to the loop
+        :param maxWorkers: Maximum number of requests in flight at the same time; defaults to 10
+        :type maxWorkers: int, optional
+        :param retries: Number of times to retry a request after a connection error or timeout; defaults to 2
+        :type retries: int, optional
+        :return: List with one item per feature, in the same sequence: the delete response, or False if that delete failed; or False if there was an error prior to the batch
         """        
+        requestList=self._delFeaturesRequests(featuresOrIdAndClassList)
+        if not requestList:
+            return False
+        return self._sendBatch(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout)
+
+    async def delFeaturesAsync(self,featuresOrIdAndClassList=[],timeout=0,maxWorkers=10,retries=2):
+        """Coroutine equivalent of .delFeatures, with the same arguments and return value.\n
+        Use this instead of .delFeatures from a running event loop, such as the one running .syncLoopAsync;
+        the requests are sent through ._sendBatchAsync.
+        """
+        requestList=self._delFeaturesRequests(featuresOrIdAndClassList)
+        if not requestList:
+            return False
+        return await self._sendBatchAsync(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout)
+
+    def _delFeaturesRequests(self,featuresOrIdAndClassList: list):
+        """Internal method to check the argument of .delFeatures or .delFeaturesAsync and build the list of delete requests.
+
+        :return: list of ._sendRetry request dicts, or None if the argument is not valid
+        """
         if not self.mapID or self.apiVersion<0:
             logging.error('delFeature request invalid: this caltopo session is not associated with a map.')
-            return False
+            return None
         if len(featuresOrIdAndClassList)==0:
             logging.warning('nothing to delete: empty list was passed to delFeatures')
-            return False
+            return None
         if type(featuresOrIdAndClassList[0]) is not dict:
             logging.error('invalid argument in call to delFeatures: '+str(featuresOrIdAndClassList))
-            return False
+            return None
         if 'properties' in featuresOrIdAndClassList[0].keys():
             idAndClassList=[{'id':i['id'],'class':i['properties']['class']} for i in featuresOrIdAndClassList]
         elif 'class' in featuresOrIdAndClassList[0].keys():
             idAndClassList=featuresOrIdAndClassList
         else:
             logging.error('invalid argument in call to delFeatures: '+str(featuresOrIdAndClassList))
-            return False
+            return None
         logging.info('Deleting '+str(len(idAndClassList))+' features in one asynchronous non-blocking batch of requests:')
-        loop=asyncio.get_event_loop()
-        future=asyncio.ensure_future(self._delAsync(idAndClassList,timeout=timeout))
-        loop.run_until_complete(future)
+        return [{'type':'delete','apiUrlEnd':i['class'],'id':str(i['id']),'returnJson':'ALL'} for i in idAndClassList]
+
+    # editFeatures - edit several features in one non-blocking asynchronous batch of requests
+    #  each item of editList is a dict of the keyword arguments that would be used for editFeature
+    #  ex: cts.editFeatures([{'id':id1,'className':'Assignment','properties':{'number':'101'}},
+    #                        {'className':'Marker','title':'t','geometry':{'coordinates':[-120,39,0,0]}}])
+    def editFeatures(self,editList=[],timeout=0,maxWorkers=10,retries=2):
+        """Edit several features on the current map, in a non-blocking asynchronous batch of edit requests.\n
+        Each feature is found and merged with the requested edits in the same way as .editFeature, so the
+        cache is updated as soon as the batch is prepared; the requests are then sent concurrently.
+
+        :param editList: List of dicts, each containing keyword arguments for .editFeature (id, className, title, letter, properties, geometry); defaults to []
+        :type editList: list, optional
+        :param timeout: Request timeout in seconds; if specified as 0 here, uses the value of .syncTimeout; defaults to 0
+        :type timeout: int, optional
+        :param maxWorkers: Maximum number of requests in flight at the same time; defaults to 10
+        :type maxWorkers: int, optional
+        :param retries: Number of times to retry a request after a connection error or timeout; defaults to 2
+        :type retries: int, optional
+        :return: List with one item per item of editList, in the same sequence: ID of the edited feature, or False if that edit failed; or False if there was an error prior to the batch
+        :rtype: list
+        """
+        edits=self._editFeaturesEdits(editList)
+        if edits is None:
+            return False
+        requestList=[{'type':'post','apiUrlEnd':c,'j':j,'id':j['id'],'returnJson':'ID'} for [c,j] in [e for e in edits if e]]
+        logging.info('Editing '+str(len(requestList))+' features in one asynchronous non-blocking batch of requests:')
+        responses=iter(self._sendBatch(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout))
+        return [next(responses) if e else False for e in edits]
+
+    async def editFeaturesAsync(self,editList=[],timeout=0,maxWorkers=10,retries=2):
+        """Coroutine equivalent of .editFeatures, with the same arguments and return value.\n
+        Use this instead of .editFeatures from a running event loop, such as the one running .syncLoopAsync;
+        the requests are sent through ._sendBatchAsync.
+        """
+        edits=self._editFeaturesEdits(editList)
+        if edits is None:
+            return False
+        requestList=[{'type':'post','apiUrlEnd':c,'j':j,'id':j['id'],'returnJson':'ID'} for [c,j] in [e for e in edits if e]]
+        logging.info('Editing '+str(len(requestList))+' features in one asynchronous non-blocking batch of requests:')
+        responses=iter(await self._sendBatchAsync(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout))
+        return [next(responses) if e else False for e in edits]
 
-    # _delAsync - not meant to be called by the user - only called from delFeatures
-    async def _delAsync(self,idAndClassList: list=[],timeout: int=0):
-        """Internal method to delete several features asynchronously, in a sepearate thread pool.
-        **This method should not be called directly.  It is called by .delFeatures.**
+    def _editFeaturesEdits(self,editList: list):
+        """Internal method to check the argument of .editFeatures or .editFeaturesAsync and prepare each edit (see ._prepareEdit).
 
-        :param idAndClassList: list of dicts of features to delete; defaults to [] \n
-            - *id* -> the feature's ID
-            - *class* -> the feature's class name
-        :type idAndClassList: list, optional
+        :return: list with one item per item of editList: [class name, json] of the edit request, or False if that edit could not be prepared; or None if the argument is not valid
+        """
+        if not self.mapID or self.apiVersion<0:
+            logging.error('editFeatures request invalid: this caltopo session is not associated with a map.')
+            return None
+        if len(editList)==0:
+            logging.warning('nothing to edit: empty list was passed to editFeatures')
+            return None
+        return [self._prepareEdit(**e) for e in editList]
+
+    # addFeatures - add several features in one non-blocking asynchronous batch of requests
+    #  each item of featureList is the same feature dict that the add... methods would send, and
+    #  must include properties['class'], e.g.
+    #   {'type':'Feature','properties':{'class':'Marker','title':'m1',...},'geometry':{'type':'Point','coordinates':[-120,39]}}
+    def addFeatures(self,featureList=[],timeout=0,maxWorkers=10,retries=2):
+        """Add several features to the current map, in a non-blocking asynchronous batch of requests.\n
+        The created features are added to the cache in one step after all responses are received.
+
+        :param featureList: List of feature dicts, in the same format as sent by the various .add... methods; each must specify properties['class']; defaults to []
+        :type featureList: list, optional
+        :param timeout: Request timeout in seconds; if specified as 0 here, uses the value of .syncTimeout; defaults to 0
+        :type timeout: int, optional
+        :param maxWorkers: Maximum number of requests in flight at the same time; defaults to 10
+        :type maxWorkers: int, optional
+        :param retries: Number of times to retry a request that could not connect; requests that may have reached the server are not retried, to avoid duplicate features; defaults to 2
+        :type retries: int, optional
+        :return: List with one item per item of featureList, in the same sequence: ID of the created feature, or False if that request failed; or False if there was an error prior to the batch
+        :rtype: list
+        """
+        requestList=self._addFeaturesRequests(featureList)
+        if not requestList:
+            return False
+        responses=self._sendBatch(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout)
+        return self._cacheAddedFeatures(requestList,responses)
+
+    async def addFeaturesAsync(self,featureList=[],timeout=0,maxWorkers=10,retries=2):
+        """Coroutine equivalent of .addFeatures, with the same arguments and return value.\n
+        Use this instead of .addFeatures from a running event loop, such as the one running .syncLoopAsync;
+        the requests are sent through ._sendBatchAsync.
+        """
+        requestList=self._addFeaturesRequests(featureList)
+        if not requestList:
+            return False
+        responses=await self._sendBatchAsync(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout)
+        return self._cacheAddedFeatures(requestList,responses)
+
+    def _addFeaturesRequests(self,featureList: list):
+        """Internal method to check the argument of .addFeatures or .addFeaturesAsync and build the list of requests.\n
+        Only connect timeouts are retried (see ._sendRetry), since a request that may have reached the server could create a duplicate feature.
+
+        :return: list of ._sendRetry request dicts, or None if the argument is not valid
+        """
+        if not self.mapID or self.apiVersion<0:
+            logging.error('addFeatures request invalid: this caltopo session is not associated with a map.')
+            return None
+        if len(featureList)==0:
+            logging.warning('nothing to add: empty list was passed to addFeatures')
+            return None
+        try:
+            classes=[f['properties']['class'] for f in featureList]
+        except (KeyError,TypeError):
+            logging.error('invalid argument in call to addFeatures: each feature must specify properties[\'class\']: '+str(featureList))
+            return None
+        logging.info('Adding '+str(len(featureList))+' features in one asynchronous non-blocking batch of requests:')
+        return [{'type':'post','apiUrlEnd':c,'j':f,'returnJson':'ALL','retryOn':(requests.exceptions.ConnectTimeout,)} for [c,f] in zip(classes,featureList)]
+
+    def _cacheAddedFeatures(self,requestList: list,responses: list) -> list:
+        """Internal method to add the features created by a batch from ._addFeaturesRequests to the cache, in one step.
+
+        :return: List with one item per request: ID of the created feature, or False if that request failed
+        :rtype: list
+        """
+        classes=[r['apiUrlEnd'] for r in requestList]
+        rval=[]
+        with self._cacheLock:
+            for [c,rj] in zip(classes,responses):
+                if rj and isinstance(rj.get('result'),dict) and 'id' in rj['result']:
+                    self._cacheFeature(rj['result'],defaultClass=c)
+                    rval.append(rj['result']['id'])
+                else:
+                    rval.append(False)
+        return rval
+
+    # _sendBatch - not meant to be called by the user - called from delFeatures, editFeatures, and addFeatures
+    def _sendBatch(self,requestList: list,maxWorkers: int=10,retries: int=2,timeout: int=0) -> list:
+        """Internal method to send a batch of requests concurrently, in a separate thread pool.\n
+        Sync is held off for the entire batch (see ._syncLoop), rather than being paused and resumed by each request.
+        **This method should not be called directly.  It is called by .delFeatures, .editFeatures, and .addFeatures.**
+
+        :param requestList: list of dicts of ._sendRequest arguments (type, apiUrlEnd, j, id, returnJson), with optional 'retryOn' (see ._sendRetry)
+        :type requestList: list
+        :param maxWorkers: maximum number of requests in flight at the same time; defaults to 10
+        :type maxWorkers: int, optional
+        :param retries: number of retries per request; defaults to 2
+        :type retries: int, optional
         :param timeout: request timeout in seconds; if specified as 0 here, uses the value of .syncTimeout; defaults to 0
         :type timeout: int, optional
-        """        
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            loop=asyncio.get_event_loop()
+        :return: list of ._sendRequest return values, in the same sequence as requestList; False for any request that failed
+        :rtype: list
+        """
+        with self._batchLock:
+            self._batchCount+=1
+        try:
+            # asyncio.run uses a new event loop, so batches can be sent from any thread
+            return asyncio.run(self._batchAsync(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout))
+        finally:
+            with self._batchLock:
+                self._batchCount-=1
+
+    # _sendBatchAsync - not meant to be called by the user - called from delFeaturesAsync, editFeaturesAsync, and addFeaturesAsync
+    async def _sendBatchAsync(self,requestList: list,maxWorkers: int=10,retries: int=2,timeout: int=0) -> list:
+        """Internal coroutine equivalent of ._sendBatch, for use from a running event loop (where ._sendBatch's asyncio.run would fail).\n
+        If httpx is installed, the requests are sent with ._sendRetryAsync on the calling event loop, at most maxWorkers at a time;
+        otherwise (or if the Fiddler proxy is in use), they are sent in a thread pool, as by ._sendBatch.
+        Sync is held off for the entire batch (see ._syncLoop and .syncLoopAsync).
+        **This method should not be called directly.  It is called by .delFeaturesAsync, .editFeaturesAsync, and .addFeaturesAsync.**
+
+        :return: list of ._sendRequestAsync return values, in the same sequence as requestList; False for any request that failed
+        :rtype: list
+        """
+        with self._batchLock:
+            self._batchCount+=1
+        try:
+            if httpx is None or self.proxyDict:
+                return await self._batchAsync(requestList,maxWorkers=maxWorkers,retries=retries,timeout=timeout)
+            semaphore=asyncio.Semaphore(maxWorkers)
+            async def send(r):
+                async with semaphore:
+                    return await self._sendRetryAsync(r,retries=retries,timeout=timeout)
+            return await asyncio.gather(*[send(r) for r in requestList])
+        finally:
+            with self._batchLock:
+                self._batchCount-=1
+
+    # _batchAsync - not meant to be called by the user - only called from _sendBatch and _sendBatchAsync
+    async def _batchAsync(self,requestList: list,maxWorkers: int=10,retries: int=2,timeout: int=0) -> list:
+        """Internal method to send several requests asynchronously, in a separate thread pool.
+        **This method should not be called directly.  It is called by ._sendBatch.**
+
+        :return: list of ._sendRetry return values, in the same sequence as requestList
+        :rtype: list
+        """
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            loop=asyncio.get_running_loop()
             tasks=[
                 loop.run_in_executor(
                     executor,
                     functools.partial(
-                        self._sendRequest,
-                        'delete',
-                        i['class'],
-                        None,
-                        id=str(i['id']),
-                        returnJson='ALL',
+                        self._sendRetry,
+                        r,
+                        retries=retries,
                         timeout=timeout))
-                    for i in idAndClassList]
-            for response in await asyncio.gather(*tasks):
-                pass
+                    for r in requestList]
+            return await asyncio.gather(*tasks)
+
+    async def _sendRetryAsync(self,r: dict,retries: int=2,timeout: int=0):
+        """Internal coroutine equivalent of ._sendRetry, sending the request with ._sendRequestAsync (httpx).\n
+        Connection failures are retried by the httpx transport (see ._getAsyncClient), for all methods, since the request was not sent;
+        so only read and write failures are retried here, with the same backoff as ._sendRetry, and only for requests that are safe
+        to repeat (those without their own r['retryOn'], i.e. deletes and edits of an existing ID).
+
+        :return: ._sendRequestAsync return value, or False if all attempts failed
+        """
+        retryOn=(httpx.ReadTimeout,httpx.WriteTimeout,httpx.ReadError,httpx.WriteError,httpx.RemoteProtocolError)
+        if 'retryOn' in r:
+            retries=0
+        for attempt in range(retries+1):
+            try:
+                return await self._sendRequestAsync(r['type'],r['apiUrlEnd'],r.get('j'),id=r.get('id',''),returnJson=r.get('returnJson',''),timeout=timeout)
+            except retryOn as e:
+                if attempt<retries:
+                    delay=0.5*(2**attempt)
+                    requestLog.warning('batch request '+str(r['type'])+' '+str(r['apiUrlEnd'])+' failed ('+str(e)+'); retrying in '+str(delay)+' seconds')
+                    await asyncio.sleep(delay)
+                else:
+                    requestLog.error('batch request '+str(r['type'])+' '+str(r['apiUrlEnd'])+' failed after '+str(retries+1)+' attempts: '+str(e))
+            except Exception:
+                requestLog.exception('batch request '+str(r['type'])+' '+str(r['apiUrlEnd'])+' failed:')
+                break
+        return False
+
+    def _sendRetry(self,r: dict,retries: int=2,timeout: int=0):
+        """Internal method to send one request of a batch, retrying transient failures with exponential backoff (0.5, 1, 2, ... seconds).\n
+        Only exceptions listed in r['retryOn'] are retried; the default is connection errors and timeouts, which is safe
+        for edits of an existing ID.  Requests that returned a non-ok response are not retried.  Methods that the
+        http adapter retries (.adapterRetryMethods, i.e. deletes) are only retried there.
+
+        :param r: dict of ._sendRequest arguments (type, apiUrlEnd, j, id, returnJson), with optional 'retryOn' tuple of exception classes
+        :type r: dict
+        :param retries: number of retries after the first attempt; defaults to 2
+        :type retries: int, optional
+        :param timeout: request timeout in seconds; defaults to 0
+        :type timeout: int, optional
+        :return: ._sendRequest return value, or False if all attempts failed
+        """
+        retryOn=r.get('retryOn',(requests.exceptions.ConnectionError,requests.exceptions.Timeout))
+        if str(r['type']).upper() in self.adapterRetryMethods:
+            retries=0 # the http adapter already retries these (see ._mountHttpAdapter); don't compound the retries
+        for attempt in range(retries+1):
+            try:
+                return self._sendRequest(r['type'],r['apiUrlEnd'],r.get('j'),id=r.get('id',''),returnJson=r.get('returnJson',''),timeout=timeout)
+            except retryOn as e:
+                if attempt<retries:
+                    delay=0.5*(2**attempt)
+                    requestLog.warning('batch request '+str(r['type'])+' '+str(r['apiUrlEnd'])+' failed ('+str(e)+'); retrying in '+str(delay)+' seconds')
+                    time.sleep(delay)
+                else:
+                    requestLog.error('batch request '+str(r['type'])+' '+str(r['apiUrlEnd'])+' failed after '+str(retries+1)+' attempts: '+str(e))
+            except Exception:
+                requestLog.exception('batch request '+str(r['type'])+' '+str(r['apiUrlEnd'])+' failed:')
+                break
+        return False
+
+    # cache index - lookup tables into self.mapData['state']['features'], so that
+    #  sync, edit, and getFeatures calls don't need to walk the entire features list
+    #   _idIndex:         id -> {class: feature}
+    #   _classIndex:      class -> {id: feature}  (dicts preserve list sequence)
+    #   _titleIndex:      TITLE (stripped, upper case) -> {(id,class): feature}
+    #   _titleTokenIndex: first word of TITLE -> {(id,class): feature}  (see letterOnly)
+    #   _letterIndex:     LETTER (stripped, upper case) -> {(id,class): feature}
+    #   _folderIndex:     folderId -> {(id,class): feature}
+    #  all index keys are upper case regardless of .caseSensitiveComparisons; callers
+    #  must still filter the candidates with the same comparison the linear scan used.
+    #  The feature dicts in the index are the same objects as in the features list.
+    def _clearIndex(self):
+        """Internal method to reset (empty) the cache index.
+        """
+        self._idIndex={}
+        self._classIndex={}
+        self._titleIndex={}
+        self._titleTokenIndex={}
+        self._letterIndex={}
+        self._folderIndex={}
+        self._indexKeys={} # (id,class) -> secondary keys the feature is currently filed under
+        self._indexSeq={} # (id,class) -> insertion sequence number, to preserve features list order
+        self._nextIndexSeq=0
+        self._geometryRevision={} # (id,class) -> number of geometry changes; see _geometryChanged
+        self._geometryCache={} # (id,class) -> [geometry revision, dict of values computed from the geometry]; see _geometryValue
+
+    def _featureKey(self,f: dict) -> tuple:
+        """Internal method to get the (id,class) index key for a feature.
+
+        :param f: Feature dict
+        :type f: dict
+        :return: (id,class) tuple; class is None if the feature has no class property
+        :rtype: tuple
+        """
+        prop=f.get('properties')
+        c=prop.get('class') if isinstance(prop,dict) else None
+        return (f.get('id'),c)
+
+    def _indexFeature(self,f: dict):
+        """Internal method to add a feature to the cache index; does not modify .mapData.\n
+        If the feature is already indexed, its secondary keys (title, letter, folder) are refreshed.
+
+        :param f: Feature dict, as it appears in .mapData['state']['features']
+        :type f: dict
+        """
+        key=self._featureKey(f)
+        [id,c]=key
+        self.cacheRevision+=1 # every cache addition or property change passes through here
+        if key in self._indexKeys:
+            self._unindexSecondary(key)
+        else:
+            self._indexSeq[key]=self._nextIndexSeq
+            self._nextIndexSeq+=1
+        self._idIndex.setdefault(id,{})[c]=f
+        self._classIndex.setdefault(c,{})[id]=f
+        prop=f.get('properties')
+        if not isinstance(prop,dict):
+            prop={}
+        titleKey=None
+        tokenKey=None
+        letterKey=None
+        t=prop.get('title')
+        if isinstance(t,str):
+            titleKey=t.rstrip().upper()
+            s=t.split()
+            if s:
+                tokenKey=s[0].upper()
+        l=prop.get('letter')
+        if isinstance(l,str):
+            letterKey=l.rstrip().upper()
+        folderId=prop.get('folderId')
+        for [index,k] in [[self._titleIndex,titleKey],[self._titleTokenIndex,tokenKey],[self._letterIndex,letterKey],[self._folderIndex,folderId]]:
+            if k is not None:
+                index.setdefault(k,{})[key]=f
+        self._indexKeys[key]=(titleKey,tokenKey,letterKey,folderId)
+
+    def _unindexSecondary(self,key: tuple):
+        """Internal method to remove a feature from the title, letter, and folder indices.
+
+        :param key: (id,class) index key
+        :type key: tuple
+        """
+        keys=self._indexKeys.pop(key,None)
+        if not keys:
+            return
+        for [index,k] in zip([self._titleIndex,self._titleTokenIndex,self._letterIndex,self._folderIndex],keys):
+            if k is not None and k in index:
+                index[k].pop(key,None)
+                if not index[k]:
+                    del index[k]
+
+    def _unindexFeature(self,key: tuple):
+        """Internal method to remove a feature from the cache index; does not modify .mapData.
+
+        :param key: (id,class) index key
+        :type key: tuple
+        """
+        [id,c]=key
+        self.cacheRevision+=1
+        self._unindexSecondary(key)
+        self._indexSeq.pop(key,None)
+        self._geometryRevision.pop(key,None)
+        self._geometryCache.pop(key,None)
+        byClass=self._idIndex.get(id)
+        if byClass is not None:
+            byClass.pop(c,None)
+            if not byClass:
+                del self._idIndex[id]
+        byId=self._classIndex.get(c)
+        if byId is not None:
+            byId.pop(id,None)
+            if not byId:
+                del self._classIndex[c]
+
+    def _geometryChanged(self,key: tuple):
+        """Internal method to record that a cached feature's geometry has changed, which invalidates the
+        values computed from it (see ._geometryValue).  Call while holding ._cacheLock.
+
+        :param key: (id,class) index key
+        :type key: tuple
+        """
+        self._geometryRevision[key]=self._geometryRevision.get(key,0)+1
+        self.cacheRevision+=1
+
+    def _geometryValue(self,f: dict,name: str,func):
+        """Internal method to get a value computed from a cached feature's geometry, such as its center or bounds.\n
+        The value is computed by func(f) the first time, and cached by feature id, class, and geometry revision,
+        so it is only computed again after a sync or a local edit changes the feature's geometry.
+        Only the feature dict that is in the cache is cached this way; for any other dict (a copy, or a feature
+        without an id) the value is computed every time.
+
+        :param f: Feature dict, as it appears in .mapData['state']['features']
+        :type f: dict
+        :param name: Name of the value, e.g. 'center'
+        :type name: str
+        :param func: Function that computes the value from the feature
+        :type func: function
+        :return: The computed value
+        """
+        key=self._featureKey(f)
+        with self._cacheLock:
+            if key[0] is None or self._classIndex.get(key[1],{}).get(key[0]) is not f:
+                return func(f) # not the cached feature; its geometry may differ
+            rev=self._geometryRevision.get(key,0)
+            cached=self._geometryCache.get(key)
+            if cached is None or cached[0]!=rev:
+                cached=[rev,{}]
+                self._geometryCache[key]=cached
+            if name not in cached[1]:
+                cached[1][name]=func(f)
+            return cached[1][name]
+
+    def _cacheFeature(self,f: dict,defaultClass: str=None) -> dict:
+        """Internal method to add a feature to the cache (.mapData) and the cache index.\n
+        If a feature with the same id and class is already cached, it is updated in place
+        rather than duplicated, so that the features list keeps one entry per feature.
+
+        :param f: Feature dict, typically the 'result' of a POST response
+        :type f: dict
+        :param defaultClass: Class name to file the id under in .mapData['ids'], if the feature has no class property; defaults to None
+        :type defaultClass: str, optional
+        :return: The cached feature dict
+        :rtype: dict
+        """
+        key=self._featureKey(f)
+        [id,c]=key
+        with self._cacheLock:
+            existing=self._classIndex.get(c,{}).get(id)
+            if existing is not None:
+                if existing is not f:
+                    existing.clear()
+                    existing.update(f)
+                self._geometryChanged(key)
+                self._indexFeature(existing)
+                return existing
+            self.mapData['state']['features'].append(f)
+            self.mapData['ids'].setdefault(c or defaultClass,[]).append(id)
+            self._indexFeature(f)
+            return f
+
+    def _sortByIndexSeq(self,features: list) -> list:
+        """Internal method to sort a list of cached features into the same sequence as the features list.
+
+        :param features: List of cached feature dicts
+        :type features: list
+        :return: Sorted list
+        :rtype: list
+        """
+        return sorted(features,key=lambda f: self._indexSeq.get(self._featureKey(f),0))
 
     # getFeatures - attempts to get data from the local cache (self.madData); refreshes and tries again if necessary
     #   determining if a refresh is necessary:
@@ -2326,7 +3224,8 @@ class CaltopoSession():
             allowMultiTitleMatch=False,
             # since=0,
             timeout=0,
-            forceRefresh=False):
+            forceRefresh=False,
+            folderId=None):
         """Get the complete feature data structure/s for one or more features from the local cache, after a refresh if needed. \n
         The features to get data for can be specified / filtered in various methods:\n
             - all features of a given class
@@ -2334,7 +3233,10 @@ class CaltopoSession():
             - one feature with an exact ID
             - feature/s with specified title (can return mutliple features; see allowMultiTitleMatch)
             - assignment features specified by 'letter', regardless of 'number' (see letterOnly)
-            - all features / the entire cache, if none of featureClass, ID, or title are specified
+            - all features in a given folder (see folderId)
+            - all features / the entire cache, if none of featureClass, ID, title, or folderId are specified;
+              this is a snapshot copy of .mapData (the feature dicts themselves are shared), since the sync thread
+              updates the cache in place
 
         :param featureClass: Feature class name used for selection filtering; defaults to None \n
             - if neither ID nor title are specified, then all features of this class will be returned
@@ -2358,6 +3260,8 @@ class CaltopoSession():
         :type timeout: int, optional
         :param forceRefresh: If True, a refresh will be performed before getting the map list, even if the cache has been refreshed within the standard sync interval; defaults to False
         :type forceRefresh: bool, optional
+        :param folderId: If specified, only features in the folder with this ID will be returned; can be combined with the other filters; defaults to None
+        :type folderId: str, optional
         :return: List of data structures (dicts) of feature/s matching the requested filtering; the list will be empty if there are no matches or if there was a failure prior to the cache request
         """                       
         
@@ -2381,39 +3285,49 @@ class CaltopoSession():
         #  was longer than syncInterval ago, but will return without syncing otherwise
         
         # if not self.sync: 
-        if featureClass is None and title is None and id is None:
-            return self.mapData # if no feature class or title or id is specified, return the entire cache
+        if featureClass is None and title is None and id is None and folderId is None:
+            # if no feature class or title or id is specified, return the entire cache
+            with self._cacheLock:
+                state=dict(self.mapData['state'])
+                state['features']=list(state['features'])
+                return {**self.mapData,'ids':{c:list(ids) for [c,ids] in self.mapData['ids'].items()},'state':state}
         else:
-            titleMatchCount=0
-            rval=[]
-            features=self.mapData['state']['features']
-            # logging.info('features:\n'+json.dumps(features,indent=3))
-            for feature in features:
-                prop=feature.get('properties',None)
-                if prop and isinstance(prop,dict):
-                    pk=prop.keys()
-                else:
-                    logging.error('getFeatures: "properties" does not exist or is not a dict:'+str(feature))
-                    return []
-                c=prop['class']
-                # logging.info('checking class='+c+'  id='+feature['id'])
-                if feature['id']==id:
-                    # logging.info(' id match:'+id)
+            with self._cacheLock:
+                # candidates come from the cache index; the filtering below is the same as
+                #  a walk of the entire features list would do, so only the candidates are checked
+                titleMatchCount=0
+                rval=[]
+                if id is not None:
+                    # only one feature is returned for an id match: the first one in features list sequence
+                    byClass=self._idIndex.get(id,{})
                     if featureClass:
-                        # logging.info('   featureClass specified:'+featureClass)
-                        if c.lower()==featureClass.lower():
-                            rval.append(feature)
-                            # logging.info('     match')
-                            break
-                        # else:
-                            # logging.info('     but class '+c+' did not match')
+                        matches=[f for [c,f] in byClass.items() if isinstance(c,str) and c.lower()==featureClass.lower()]
+                    else:
+                        matches=list(byClass.values())
+                    if matches:
+                        rval=self._sortByIndexSeq(matches)[0:1]
+                elif title is None:
+                    if folderId is not None:
+                        candidates=self._sortByIndexSeq(self._folderIndex.get(folderId,{}).values())
+                    elif featureClass is not None:
+                        candidates=list(self._classIndex.get(featureClass,{}).values())
+                    else:
+                        candidates=self.mapData['state']['features']
+                    rval=[f for f in candidates if self._classFilter(f,featureClass,featureClassExcludeList)]
+                else:
+                    tkey=str(title).upper()
+                    if letterOnly:
+                        candidates=list(self._titleTokenIndex.get(tkey,{}).values())
                     else:
-                        rval.append(feature)
-                        break
-                if id is None and (c==featureClass or (featureClass is None and c not in featureClassExcludeList)):
-                    if title is None:
-                        rval.append(feature)
-                    if 'title' in pk:
+                        candidates=list(self._titleIndex.get(tkey,{}).values())
+                        candidates+=[f for f in self._letterIndex.get(tkey,{}).values() if f not in candidates]
+                    for feature in self._sortByIndexSeq(candidates):
+                        if not self._classFilter(feature,featureClass,featureClassExcludeList):
+                            continue
+                        prop=feature['properties']
+                        if 'title' not in prop.keys():
+                            logging.error('getFeatures: no title key exists:'+str(feature))
+                            continue
                         if letterOnly:
                             s=prop['title'].split()
                             # avoid exception when title exists but is blank
@@ -2425,16 +3339,16 @@ class CaltopoSession():
                             if self._caseMatch(prop['title'].rstrip(),title): # since assignments without number could still have a space after letter
                                 titleMatchCount+=1
                                 rval.append(feature)
-                            elif 'letter' in pk: # if the title wasn't a match, try the letter if it exists
+                            elif 'letter' in prop.keys(): # if the title wasn't a match, try the letter if it exists
                                 if prop.get('letter','').rstrip()==title:
                                     titleMatchCount+=1
                                     rval.append(feature)
-                    else:
-                        logging.error('getFeatures: no title key exists:'+str(feature))
+                if folderId is not None:
+                    rval=[f for f in rval if f['properties'].get('folderId')==folderId]
             if len(rval)==0:
                 # question: do we want to try a refresh and try one more time?
                 logging.info('getFeatures: No features match the specified criteria.')
-                logging.info('  (was looking for featureClass='+str(featureClass)+'  title='+str(title)+'  id='+str(id)+')')
+                logging.info('  (was looking for featureClass='+str(featureClass)+'  title='+str(title)+'  id='+str(id)+'  folderId='+str(folderId)+')')
                 return []
             if titleMatchCount>1:
                 if allowMultiTitleMatch:
@@ -2445,6 +3359,21 @@ class CaltopoSession():
             else:
                 return rval
 
+    def _classFilter(self,feature: dict,featureClass: str=None,featureClassExcludeList: list=[]) -> bool:
+        """Internal method to check a feature against the featureClass and featureClassExcludeList arguments of .getFeatures.
+
+        :param feature: Feature dict
+        :type feature: dict
+        :param featureClass: Feature class name; if specified, the feature class must be an exact match; defaults to None
+        :type featureClass: str, optional
+        :param featureClassExcludeList: List of class names to exclude; only relevant if featureClass is not specified; defaults to []
+        :type featureClassExcludeList: list, optional
+        :return: True if the feature passes the class filter
+        :rtype: bool
+        """
+        c=feature['properties'].get('class')
+        return c==featureClass or (featureClass is None and c not in featureClassExcludeList)
+
     # getFeature - same interface as getFeatures, expecting only one result;
     #   if the number of results is not exactly one, return with an error
     def getFeature(self,
@@ -2564,6 +3493,25 @@ class CaltopoSession():
         if not self.mapID or self.apiVersion<0:
             logging.error('editFeature request invalid: this caltopo session is not associated with a map.')
             return False
+        edit=self._prepareEdit(id=id,className=className,title=title,letter=letter,properties=properties,geometry=geometry)
+        if not edit:
+            return False
+        [className,j]=edit
+        return self._sendRequest('post',className,j,id=j['id'],returnJson='ID',timeout=timeout)
+
+    def _prepareEdit(self,
+            id=None,
+            className=None,
+            title=None,
+            letter=None,
+            properties=None,
+            geometry=None):
+        """Internal method to find the feature to edit, merge the requested edits into the cached feature, and build the edit request body.\n
+        Called from .editFeature and .editFeatures; the arguments are the same as .editFeature.
+
+        :return: [className,json] for the edit request, or False if the feature could not be determined
+        :rtype: list
+        """
         # PART 1: determine the exact id of the feature to be edited
         if id is None:
             # first, validate the arguments and adjust as needed
@@ -2592,7 +3540,11 @@ class CaltopoSession():
             # it's probably quicker to filter by letter/title first, since that should only return a very small number of hits,
             #   as opposed to filtering by className first, which could return a large number of hits
 
-            features=[f for f in self.mapData['state']['features'] if self._caseMatch(f['properties'].get(ltKey,None),ltVal) and f['properties']['class'].lower()==className.lower()]
+            # the cache index narrows the search to features with a matching (case-insensitive) letter/title
+            ltIndex=self._titleIndex if ltKey=='title' else self._letterIndex
+            with self._cacheLock:
+                candidates=self._sortByIndexSeq(ltIndex.get(str(ltVal).rstrip().upper(),{}).values())
+                features=[f for f in candidates if self._caseMatch(f['properties'].get(ltKey,None),ltVal) and f['properties']['class'].lower()==className.lower()]
                 
             if len(features)==0:
                 logging.warning(' no feature matched class='+str(className)+' title='+str(title)+' letter='+str(letter))
@@ -2605,7 +3557,8 @@ class CaltopoSession():
 
         else:
             logging.info(' id specified: '+str(id))
-            features=[f for f in self.mapData['state']['features'] if f['id']==id]
+            with self._cacheLock:
+                features=list(self._idIndex.get(id,{}).values())
             # logging.info(json.dumps(self.mapData,indent=3))
             if len(features)==1:
                 feature=features[0]     ## matched feature
@@ -2636,11 +3589,14 @@ class CaltopoSession():
         if properties is not None:
             keys=properties.keys()
             # propToWrite=feature['properties']
-            for key in keys:
-                propToWrite[key]=properties[key]
-            # write the correct title for assignments, since caltopo does not internally recalcualte it
-            if className.lower()=='assignment':
-                propToWrite['title']=(propToWrite['letter']+' '+propToWrite['number']).strip()
+            with self._cacheLock:
+                for key in keys:
+                    propToWrite[key]=properties[key]
+                # write the correct title for assignments, since caltopo does not internally recalcualte it
+                if className.lower()=='assignment':
+                    propToWrite['title']=(propToWrite['letter']+' '+propToWrite['number']).strip()
+                # the cached properties were modified in place; keep the title/letter/folder index current
+                self._indexFeature(feature)
 
         geomToWrite=None
         if geometry is not None:
@@ -2648,16 +3604,17 @@ class CaltopoSession():
                 geometry['size']=len(geometry['coordinates'])
             # logging.info('geometry specified (size was recalculated if needed):\n'+json.dumps(geometry))
             geomToWrite=feature['geometry']
-            for key in geometry.keys():
-                geomToWrite[key]=geometry[key]
+            with self._cacheLock:
+                for key in geometry.keys():
+                    geomToWrite[key]=geometry[key]
+                self._geometryChanged(self._featureKey(feature))
         
         j={'type':'Feature','id':feature['id']}
         if propToWrite is not None:
             j['properties']=propToWrite
         if geomToWrite is not None:
             j['geometry']=geomToWrite
-
-        return self._sendRequest('post',className,j,id=feature['id'],returnJson='ID',timeout=timeout)
+        return [className,j]
 
     # moveMarker - convenience function - calls editFeature
     #   specify either id or title
@@ -3273,24 +4230,10 @@ class CaltopoSession():
             if not objShape:
                 logging.warning('Object shape '+objStr+' not found; operation aborted.')
                 return False
-            og=objShape['geometry']
-            objType=og['type']
-            # logging.info('geometry:'+json.dumps(og,indent=3))
-            if objType=='Polygon':
-                ogc=og['coordinates'][0]
-                ogc=self._removeSpurs(ogc)
-                objGeom=Polygon(self._twoify(ogc)) # Shapely object
-            elif objType=='LineString':
-                ogc=og['coordinates']
-                ogc=self._removeSpurs(ogc)
-                objGeom=LineString(self._twoify(ogc)) # Shapely object
-            elif objType=='Point':
-                ogc=og['coordinates'][0:2]
-                objGeom=Point(self._twoify(ogc)) # Shapely object
-            else:
-                logging.warning('crop: feature '+objStr+' is not a polygon or line or point: '+objType)
+            bbox=self._geometryValue(objShape,'bounds',self._featureBounds)
+            if not bbox:
+                logging.warning('crop: feature '+objStr+' is not a polygon or line or point: '+str(objShape['geometry'].get('type')))
                 return False
-            bbox=objGeom.bounds
             rval=[min(bbox[0],rval[0]),min(bbox[1],rval[1]),max(bbox[2],rval[2]),max(bbox[3],rval[3])]
         if padPct is None: # don't use 'if not padPct' which evaluates True for padPct=0
             pad=padDeg
@@ -3301,6 +4244,74 @@ class CaltopoSession():
         rval=[rval[0]-pad,rval[1]-pad,rval[2]+pad,rval[3]+pad]
         return rval
 
+    # _featureBounds - not meant to be called by the user - called through _geometryValue
+    def _featureBounds(self,f: dict):
+        """Internal method to compute the bounding box of a feature's geometry; see .getBounds.
+
+        :param f: Feature dict
+        :type f: dict
+        :return: [min X, min Y, max X, max Y] as from shapely.bounds, or False if the feature is not a polygon, line, or point
+        """
+        og=f['geometry']
+        objType=og['type']
+        # logging.info('geometry:'+json.dumps(og,indent=3))
+        if objType=='Polygon':
+            ogc=og['coordinates'][0]
+            ogc=self._removeSpurs(ogc)
+            objGeom=Polygon(self._twoify(ogc)) # Shapely object
+        elif objType=='LineString':
+            ogc=og['coordinates']
+            ogc=self._removeSpurs(ogc)
+            objGeom=LineString(self._twoify(ogc)) # Shapely object
+        elif objType=='Point':
+            ogc=og['coordinates'][0:2]
+            objGeom=Point(self._twoify(ogc)) # Shapely object
+        else:
+            return False
+        return list(objGeom.bounds)
+
+    def getCenter(self,featureOrId):
+        """Get a representative point of a feature, e.g. for placing a marker in an assignment.\n
+        For a polygon this is shapely's representative_point, which is always inside the polygon; for a line it
+        is the middle vertex; for a point it is the point itself.  The result is cached, and is only computed
+        again after a sync or a local edit changes the feature's geometry.
+
+        :param featureOrId: Feature ID, or entire feature dict from the cache
+        :return: [lon,lat] of the point, or False if the feature was not found or has no usable geometry
+        :rtype: list
+        """
+        if isinstance(featureOrId,str):
+            feature=self.getFeature(id=featureOrId)
+        else:
+            feature=featureOrId
+        if not feature or not isinstance(feature.get('geometry'),dict):
+            logging.warning('getCenter: feature not found, or it has no geometry: '+str(featureOrId))
+            return False
+        rval=self._geometryValue(feature,'center',self._featureCenter)
+        return list(rval) if rval else False # a copy, so the cached value can't be modified
+
+    # _featureCenter - not meant to be called by the user - called through _geometryValue
+    def _featureCenter(self,f: dict):
+        """Internal method to compute a representative point of a feature's geometry; see .getCenter.
+
+        :param f: Feature dict
+        :type f: dict
+        :return: [lon,lat], or False if the feature is not a polygon, line, or point
+        """
+        og=f['geometry']
+        objType=og.get('type')
+        ogc=og.get('coordinates')
+        if not ogc:
+            return False
+        if objType=='Polygon':
+            mid=Polygon(self._twoify(ogc[0])).representative_point()
+            return [mid.x,mid.y]
+        elif objType=='LineString':
+            return list(ogc[int(len(ogc)/2)][0:2])
+        elif objType=='Point':
+            return list(ogc[0:2])
+        return False
+
     # _twoify - turn four-element-vertex-data into two-element-vertex-data so that
     #  the shapely functions can operate on it
     def _twoify(self,points: list) -> list:
@@ -3678,6 +4689,24 @@ sys.excepthook = handle_exception
 threading.excepthook = handle_exception
 
 # pare down json for logging messages to reduce log size and clutter
+# setLogLevels - set the verbosity of this module's subsystem loggers, and the payload size cap
+#  ex: setLogLevels({'sync':'INFO','request':'WARNING'},payloadLimit=500)
+def setLogLevels(levels={},payloadLimit=None):
+    """Set the log level of each subsystem logger of this module.
+
+    :param levels: Dict of subsystem name ('sync' or 'request') to level name or number; defaults to {}
+    :type levels: dict, optional
+    :param payloadLimit: Maximum number of characters of any one logged payload (see LogPayload); 0 means no limit; defaults to None, which leaves the current limit unchanged
+    :type payloadLimit: int, optional
+    """
+    global payloadLogLimit
+    for [name,level] in levels.items():
+        if isinstance(level,str):
+            level=level.strip().upper()
+        logging.getLogger('caltopo_python.'+name).setLevel(level)
+    if payloadLimit is not None:
+        payloadLogLimit=int(payloadLimit)
+
 def jsonForLog(orig):
     rval=copy.deepcopy(orig)
     try:
@@ -73,10 +73,14 @@ import time
 import io
 import traceback
 import json
+import csv
+import zlib
+import threading
+import queue
+from concurrent.futures import Future
 import random
 import configparser
 import argparse
-from shapely.geometry import Polygon
 from datetime import datetime
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -95,7 +99,7 @@ import sys
 caltopo_python_dir='../caltopo_python/caltopo_python'
 if os.path.isdir(caltopo_python_dir):
     sys.path.insert(1,caltopo_python_dir)
-from caltopo_python import CaltopoSession # import before logging to avoid useless numpy-not-installed message
+from caltopo_python import CaltopoSession,setLogLevels # import before logging to avoid useless numpy-not-installed message
 
 # start logging early, to catch any messages during import of modules
 
@@ -154,6 +158,7 @@ from specifyMap import SpecifyMapDialog
 BG_GREEN = "background-color:#00bb00;"
 BG_RED = "background-color:#bb0000;"
 BG_GRAY = "background-color:#aaaaaa;"
+BG_ORANGE = "background-color:#ff9633;"   # link degraded: sync is failing but still retrying
 
 # rebuild all _ui.py files from .ui files in the same directory as this script as needed
 #   NOTE - this will overwrite any edits in _ui.py files
@@ -286,9 +291,528 @@ def handle_exception(exc_type, exc_value, exc_traceback):
     inform_user_about_issue('Uncaught exception:\n\n'+str(exc_type.__name__)+': '+str(exc_value)+'\n\nCheck log file for details including traceback.  The program will continue if possible when you close this message box.', timeout=4000)
 sys.excepthook = handle_exception
 
+# csv files in watchedDir other than radiolog files: clueLog, fleetsync, and backups
+csvCategoryRegex=regex.compile(r'.*_(?:(clueLog|fleetsync)|(bak)[1-9])\.csv$')
+
 def sortByTitle(item):
     return item["properties"]["title"]
 
+# rowFingerprint - key that identifies a radiolog row independent of its position
+#  in the table, used to restore row colors after a rescan
+def rowFingerprint(timex,callsign,msg):
+    return (timex,callsign,hash(msg))
+
+# CsvRecordReader - incremental reader of radiolog / clueLog csv records:
+#  feed() takes any iterable of lines (normally a Pygtail stream) and returns the
+#  list of complete records (each a list of field strings) found so far.  A record
+#  whose quoted field spans several lines, or whose last line has not been fully
+#  written yet, is held until the rest of it arrives - possibly on a later refresh
+#  tick - so one reader object should persist for the life of each watched file,
+#  and be reset whenever that file is to be read again from the beginning.
+#  A held tail with no line ending (see holdsTail) may also be the last row of a
+#  file that does not end with a newline; the caller decides that - once a later
+#  read finds no more bytes - and gets it with flush().
+#  Line breaks inside a quoted field are replaced with '/' so each record fits on
+#  one table row.
+class CsvRecordReader():
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.partial=[]         # lines of the record in progress
+        self.inQuote=False      # True if the record in progress ends inside a quoted field
+
+    def feed(self,lines):
+        records=[]
+        for line in lines:
+            if self.partial and not self.partial[-1].endswith('\n'):
+                self.partial[-1]+=line      # rest of a line that was still being written at the previous read
+            else:
+                self.partial.append(line)
+            # each double-quote toggles in/out of a quoted field; an escaped quote ("") toggles twice
+            if line.count('"')%2:
+                self.inQuote=not self.inQuote
+            if self.inQuote or not self.partial[-1].endswith('\n'):
+                continue    # record is not complete yet
+            records.append(self._parse())
+        return records
+
+    # holdsTail - True if the record in progress is outside any quoted field and only
+    #  lacks its line ending: either still being written, or the last row of the file
+    def holdsTail(self):
+        return bool(self.partial) and not self.inQuote and not self.partial[-1].endswith('\n')
+
+    # flush - return the record in progress, if any, even though no line ending was seen;
+    #  use at the end of a one-time read of an entire file, or once a held tail is known
+    #  to be the end of the file
+    def flush(self):
+        if not self.partial:
+            return []
+        return [self._parse()]
+
+    def _parse(self):
+        multiLine=len(self.partial)>1
+        record=next(csv.reader(self.partial),[])
+        self.reset()
+        if multiLine:
+            record=[field.replace('\r\n','/').replace('\n','/') for field in record]
+        return record
+
+# LogTableModel - table model for the radiolog and clueLog panels:
+#  rows are stored oldest-first in one list per column (plus one list of row colors),
+#  and shown newest-first, so appending a batch of new log records is a single
+#  insertion at the top of the view.  Row colors live in the model and are served
+#  as the background role, instead of being set on each cell.
+class LogTableModel(QAbstractTableModel):
+    def __init__(self,headers,parent=None):
+        QAbstractTableModel.__init__(self,parent)
+        self.headers=headers
+        self.columns=[[] for h in headers]
+        self.colors=[]
+        self.brushes={} # color name -> QBrush, shared by all rows of that color
+        # change tracking for the session journal - see takeChanges
+        self.resetPending=False
+        self.savedCount=0
+        self.colorChanges={}
+
+    def rowCount(self,parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.colors)
+
+    def columnCount(self,parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    # _storeIndex - index into the column store for the given view row
+    def _storeIndex(self,row):
+        return len(self.colors)-1-row
+
+    def data(self,index,role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i=self._storeIndex(index.row())
+        if role==Qt.DisplayRole:
+            return self.columns[index.column()][i]
+        if role==Qt.BackgroundRole:
+            color=self.colors[i]
+            brush=self.brushes.get(color)
+            if brush is None:
+                brush=QBrush(QColor(color))
+                self.brushes[color]=brush
+            return brush
+        return None
+
+    def headerData(self,section,orientation,role=Qt.DisplayRole):
+        if role==Qt.DisplayRole and orientation==Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    # appendRows - add records (each a list of one value per column) in oldest-first order,
+    #  with one color per record; they appear at the top of the view, newest first;
+    #  saved=True means the rows came from the save file, so takeChanges will not report them
+    #  (only valid if all earlier rows have been saved too)
+    def appendRows(self,rows,colors,saved=False):
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(),0,len(rows)-1)
+        for c in range(len(self.headers)):
+            self.columns[c].extend([row[c] for row in rows])
+        self.colors.extend(colors)
+        self.endInsertRows()
+        if saved:
+            self.savedCount=len(self.colors)
+
+    def clear(self):
+        self.beginResetModel()
+        self.columns=[[] for h in self.headers]
+        self.colors=[]
+        self.endResetModel()
+        self.resetPending=True
+        self.savedCount=0
+        self.colorChanges={}
+
+    # takeChanges - return the changes since the previous call, as
+    #  [reset,newRows,colorChanges]: reset is True if the model was cleared; newRows are
+    #  the rows added since (oldest first, each with its color as the last value); and
+    #  colorChanges is a dict of oldest-first row index -> new color, for older rows
+    def takeChanges(self):
+        n=len(self.colors)
+        changes=[self.resetPending,
+                [[column[i] for column in self.columns]+[self.colors[i]] for i in range(self.savedCount,n)],
+                self.colorChanges]
+        self.resetPending=False
+        self.savedCount=n
+        self.colorChanges={}
+        return changes
+
+    # rowValues - list of the values in the given view row
+    def rowValues(self,row):
+        i=self._storeIndex(row)
+        return [column[i] for column in self.columns]
+
+    def rowColor(self,row):
+        return self.colors[self._storeIndex(row)]
+
+    def setRowColor(self,row,color):
+        i=self._storeIndex(row)
+        self.colors[i]=color
+        if i<self.savedCount:
+            self.colorChanges[i]=color
+        self.dataChanged.emit(self.index(row,0),self.index(row,len(self.headers)-1),[Qt.BackgroundRole])
+
+# DirWatcher - watch the csv files in a directory, and a set of specific files in it:
+#  emits dirChanged when a csv file appears in or disappears from the directory, and
+#  fileChanged(path) when one of the files given to setFiles is modified.
+#  mode:
+#   'notify' - use OS change notifications (QFileSystemWatcher), plus a slow safety
+#      poll in case a notification is missed (e.g. on some network shares)
+#   'poll' - poll every pollInterval msec, with one os.scandir of the directory per poll
+#   'auto' - use 'notify' if the OS accepts the directory watch, otherwise 'poll'
+class DirWatcher(QObject):
+    dirChanged=pyqtSignal()
+    fileChanged=pyqtSignal(str)
+
+    def __init__(self,dirName,parent=None,mode='auto',pollInterval=3000,safetyInterval=30000):
+        QObject.__init__(self,parent)
+        self.dirName=dirName
+        self.files=[]
+        self.snapshot=self.scan()
+        self.notifier=None
+        if mode in ['auto','notify']:
+            self.notifier=QFileSystemWatcher(self)
+            if self.notifier.addPath(dirName):
+                self.notifier.directoryChanged.connect(self.poll)
+                self.notifier.fileChanged.connect(self._notifiedFileChanged)
+            else:
+                logging.warning('DirWatcher: change notifications are not available for '+dirName+'; polling instead')
+                self.notifier=None
+        self.mode='notify' if self.notifier else 'poll'
+        self.pollTimer=QTimer(self)
+        self.pollTimer.timeout.connect(self.poll)
+        self.pollTimer.start(safetyInterval if self.notifier else pollInterval)
+        logging.info('DirWatcher: watching '+dirName+' in '+self.mode+' mode')
+
+    # scan - one directory listing: dict of csv filename -> (mtime,size)
+    #  (DirEntry.stat is served from the directory listing on Windows, with no extra file access)
+    def scan(self):
+        snapshot={}
+        try:
+            with os.scandir(self.dirName) as it:
+                for entry in it:
+                    if entry.name.lower().endswith('.csv'):
+                        try:
+                            st=entry.stat()
+                        except OSError:
+                            continue    # removed since the listing was read
+                        snapshot[entry.name]=(st.st_mtime_ns,st.st_size)
+        except OSError as e:
+            logging.warning('DirWatcher: could not scan '+self.dirName+': '+str(e))
+            return self.snapshot    # keep the last good snapshot; the share may come back
+        return snapshot
+
+    # setFiles - set the list of files whose changes should be reported by fileChanged
+    def setFiles(self,files):
+        self.files=[f for f in files if f]
+        if self.notifier:
+            oldFiles=self.notifier.files()
+            if oldFiles:
+                self.notifier.removePaths(oldFiles)
+            for f in self.files:
+                if os.path.isfile(f):
+                    self.notifier.addPath(f)
+
+    def poll(self):
+        snapshot=self.scan()
+        old=self.snapshot
+        self.snapshot=snapshot
+        if snapshot.keys()!=old.keys():
+            self.dirChanged.emit()
+        for f in self.files:
+            name=os.path.basename(f)
+            if snapshot.get(name)!=old.get(name):
+                self.fileChanged.emit(f)
+
+    def _notifiedFileChanged(self,path):
+        # an atomically replaced file is dropped from the watch list; watch the new one
+        if self.notifier and path not in self.notifier.files() and os.path.isfile(path):
+            self.notifier.addPath(path)
+        self.poll()     # updates the snapshot, and emits fileChanged if the file really changed
+
+# SessionJournal - crash-safe, incremental persistence of the Plans Console session:
+#  the save file (snapshot) holds the complete session as of the last compaction, in the
+#  same format that has always been used: [maps,{'csv':...},radiolog rows,assignment rows,
+#  clue rows] (table rows are newest first), plus a trailing {'seq':n} element.
+#  Each later change is appended as one JSON line to <save file>.journal, with
+#  increasing sequence numbers; reading the session replays the journal lines that are
+#  newer than the snapshot.  Once the journal gets long (compactRecords rows, or compactBytes
+#  bytes), a new snapshot is written to a
+#  temporary file and moved into place with os.replace, and the journal is truncated;
+#  a crash at any point leaves a readable snapshot, and journal lines already included
+#  in the snapshot are skipped by sequence number.
+#  The in-memory state is a dict of:
+#   'maps' - dict, 'csv' - string,
+#   'radiolog' - list of [time,callsign,msg,radioLoc,status,color], oldest first
+#   'assign' - list of [team,assign,type,med], in table order
+#   'clue' - list of [clueNum,time,radioLoc,msg,color], oldest first
+#   'seq' - sequence number of the latest change
+#  Journal ops: 'maps', 'csv', 'assign' (replace), 'rows' (append to 'radiolog' or 'clue'),
+#   'reset' (clear a table), 'color' (set the color of one row of a table)
+#  All file I/O happens on a worker thread, in the order it was requested: changes are
+#  applied to the in-memory state immediately, and their journal lines are queued; the
+#  worker waits coalesceDelay seconds after the first queued line so that a burst of
+#  changes becomes a single write.
+class SessionJournal():
+    radiologKeys=['time','callsign','msg','radioLoc','status','color']
+    assignKeys=['team','assign','type','med']
+    clueKeys=['clueNum','time','radioLoc','msg','color']
+
+    def __init__(self,fileName,compactRecords=5000,compactBytes=1000000,coalesceDelay=0.25):
+        self.fileName=fileName
+        self.journalFileName=fileName+'.journal'
+        self.compactRecords=compactRecords # rows journaled since the last snapshot, before compacting
+        self.compactBytes=compactBytes # journal size, before compacting; counted by the worker as it writes
+        self.journalBytes=0
+        self.compactDue=False   # set by the worker once journalBytes reaches compactBytes
+        self.coalesceDelay=coalesceDelay
+        self.loadFuture=None
+        self.queue=queue.Queue()
+        self.worker=threading.Thread(target=self._ioLoop,name='SessionJournal',daemon=True)
+        self.worker.start()
+        self.reset()
+
+    # reset - start a new, empty session; the save file is overwritten at the next write
+    def reset(self):
+        self.state=self.emptyState()
+        self.started=False  # True once a snapshot of this session has been queued
+        self.pending=0      # rows journaled since the last snapshot
+
+    def emptyState(self):
+        return {'maps':{},'csv':'','radiolog':[],'assign':[],'clue':[],'seq':0}
+
+    # read - return the session state from the save file and its journal, without adopting it
+    def read(self):
+        with open(self.fileName,'r') as fid:
+            state=self.fromSnapshot(json.load(fid))
+        if os.path.exists(self.journalFileName):
+            with open(self.journalFileName,'r') as fid:
+                for line in fid:
+                    try:
+                        rec=json.loads(line)
+                    except ValueError:
+                        logging.warning('Session journal: skipping unreadable record (incomplete write?)')
+                        continue
+                    if rec['seq']>state['seq']:
+                        self.apply(state,rec)
+        return state
+
+    # startLoad - read the saved session on the worker thread; see load
+    def startLoad(self):
+        self.loadFuture=Future()
+        self.queue.put(['read',self.loadFuture])
+
+    # load - adopt the saved session, waiting for startLoad to finish if it was called;
+    #  later changes will be journaled on top of it
+    def load(self):
+        if self.loadFuture:
+            state=self.loadFuture.result()
+            self.loadFuture=None
+        else:
+            state=self.read()
+        self.reset()
+        self.state=state
+        return self.state
+
+    def fromSnapshot(self,l):
+        state=self.emptyState()
+        state['maps']=l[0]
+        state['csv']=l[1]['csv']
+        state['radiolog']=[[r.get(k,'') for k in self.radiologKeys] for r in reversed(list(l[2].values()))]
+        state['assign']=[[r.get(k,'') for k in self.assignKeys] for r in l[3].values()]
+        state['clue']=[[r.get(k,'') for k in self.clueKeys] for r in reversed(list(l[4].values()))]
+        if len(l)>5:
+            state['seq']=l[5].get('seq',0)
+        return state
+
+    def toSnapshot(self,state):
+        n=len(state['radiolog'])
+        rowx={'rowA'+str(n-1-i):dict(zip(self.radiologKeys,r)) for i,r in reversed(list(enumerate(state['radiolog'])))}
+        rowy={'rowB'+str(i):dict(zip(self.assignKeys,r)) for i,r in enumerate(state['assign'])}
+        n=len(state['clue'])
+        rowz={'rowC'+str(n-1-i):dict(zip(self.clueKeys,r)) for i,r in reversed(list(enumerate(state['clue'])))}
+        return [state['maps'],{'csv':state['csv']},rowx,rowy,rowz,{'seq':state['seq']}]
+
+    # apply - apply one journal record to a state dict
+    def apply(self,state,rec):
+        op=rec['op']
+        if op in ['maps','csv','assign']:
+            state[op]=rec['value']
+        elif op=='rows':
+            state[rec['table']].extend([list(r) for r in rec['rows']])
+        elif op=='reset':
+            state[rec['table']]=[]
+        elif op=='color':
+            state[rec['table']][rec['index']][-1]=rec['color']
+        state['seq']=rec['seq']
+
+    # append - apply one change to the in-memory state and queue it for the journal
+    def append(self,op,**kwargs):
+        rec=dict(kwargs,op=op,seq=self.state['seq']+1)
+        self.apply(self.state,rec)
+        if not self.started:
+            self.compact()  # first write of this session: start from a complete snapshot
+            return
+        self.queue.put(['rec',rec])
+        self.pending+=len(rec.get('rows',[0]))
+        if self.pending>=self.compactRecords or self.compactDue:
+            self.compact()
+
+    # compact - queue a snapshot of the current state; the worker atomically replaces the
+    #  save file with it, then truncates the journal
+    def compact(self):
+        self.queue.put(['snapshot',self.toSnapshot(self.state)])   # a copy, so later changes don't leak in
+        self.started=True
+        self.pending=0
+        self.compactDue=False
+
+    # flush - wait until all queued I/O is done
+    def flush(self,timeout=10):
+        f=Future()
+        self.queue.put(['flush',f])
+        f.result(timeout=timeout)
+
+    def close(self):
+        self.queue.put(['stop',None])
+        self.worker.join(timeout=10)
+
+    def _ioLoop(self):
+        journal=None
+        while True:
+            items=[self.queue.get()]
+            if items[0][0]=='rec':
+                time.sleep(self.coalesceDelay)  # let a burst of changes collect into one write
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines=[]
+            for [kind,arg] in items:
+                if kind=='rec':
+                    lines.append(json.dumps(arg)+'\n')
+                    continue
+                journal=self._writeLines(journal,lines)   # keep the requested order
+                lines=[]
+                if kind=='snapshot':
+                    journal=self._writeSnapshot(journal,arg)
+                elif kind=='read':
+                    try:
+                        arg.set_result(self.read())
+                    except Exception as e:
+                        arg.set_exception(e)
+                elif kind=='flush':
+                    arg.set_result(True)
+                elif kind=='stop':
+                    if journal:
+                        journal.close()
+                    return
+            journal=self._writeLines(journal,lines)
+
+    def _writeLines(self,journal,lines):
+        if not lines:
+            return journal
+        try:
+            if journal is None:
+                journal=open(self.journalFileName,'a')
+            data=''.join(lines)
+            journal.write(data)
+            journal.flush()
+            self.journalBytes+=len(data)
+            if self.journalBytes>=self.compactBytes:
+                self.compactDue=True    # the next append compacts
+        except Exception:
+            logging.exception('Session journal: write failed:')
+        return journal
+
+    def _writeSnapshot(self,journal,snapshot):
+        try:
+            tmpFileName=self.fileName+'.tmp'
+            with open(tmpFileName,'w') as fid:
+                json.dump(snapshot,fid)
+                fid.flush()
+                os.fsync(fid.fileno())
+            os.replace(tmpFileName,self.fileName)
+            if journal:
+                journal.close()
+            journal=open(self.journalFileName,'w')
+            self.journalBytes=0
+        except Exception:
+            logging.exception('Session journal: snapshot failed:')
+        return journal
+
+# MapCommandQueue - runs map-reading and map-mutating jobs one at a time, in the order they
+#  were submitted, on a single worker thread, so that the GUI thread never waits on the map
+#  and two jobs never interleave their edits.  A job's optional callback is called with the
+#  job's return value in the GUI thread (through the queued done signal).  Jobs must not touch
+#  any widgets; they can report a problem to the user with warn, which emits the message signal.
+class MapCommandQueue(QObject):
+    done=pyqtSignal(object,object)  # callback, result
+    message=pyqtSignal(str)
+    retryRequested=pyqtSignal(float,object,object)  # delay in seconds, func, args
+    def __init__(self,parent=None):
+        QObject.__init__(self,parent)
+        self.queue=queue.Queue()
+        self.closed=False
+        self.done.connect(self._deliver,Qt.QueuedConnection)
+        self.retryRequested.connect(self._retryLater,Qt.QueuedConnection)
+        self.worker=threading.Thread(target=self._jobLoop,name='MapCommandQueue',daemon=True)
+        self.worker.start()
+
+    # submit - queue func(*args) to run after all previously submitted jobs;
+    #  returns False if the queue has been closed, in which case the job is not run
+    def submit(self,func,*args,callback=None):
+        if self.closed:
+            logging.warning('Map command '+func.__name__+' not run: the map command queue is closed')
+            return False
+        self.queue.put([func,args,callback])
+        return True
+
+    def warn(self,msg):
+        self.message.emit(msg)
+
+    # retry - called from a job: submit func(*args) again after delay seconds, without holding up
+    #  the jobs that are already queued
+    def retry(self,delay,func,*args):
+        self.retryRequested.emit(delay,func,args)
+
+    # close - finish the jobs that are already queued, then stop the worker
+    def close(self,timeout=30):
+        self.closed=True
+        self.queue.put(None)
+        self.worker.join(timeout=timeout)
+
+    def _retryLater(self,delay,func,args):
+        QTimer.singleShot(int(delay*1000),lambda: self.submit(func,*args))
+
+    def _deliver(self,callback,result):
+        if callback:
+            callback(result)
+
+    def _jobLoop(self):
+        while True:
+            item=self.queue.get()
+            if item is None:
+                return
+            [func,args,callback]=item
+            result=None
+            try:
+                result=func(*args)
+            except Exception as e:
+                logging.exception('Map command '+func.__name__+' failed:')
+                self.warn('Map command '+func.__name__+' failed:\n\n'+str(e)+'\n\nCheck log file for details.')
+            self.done.emit(callback,result)
+
 # Working directory structure 4-8-22:
 #  C:\PlansConsole
 #     |
@@ -314,6 +838,7 @@ def sortByTitle(item):
 #                        such as Z:\DebriefMaps, specified in plans_console.cfg)
 
 class PlansConsole(QDialog,Ui_PlansConsole):
+    ctsCacheChangedSignal=pyqtSignal()
     def __init__(self,parent):
         QDialog.__init__(self)
         logging.info('Plans Console Vers '+str(VERSION)+' startup at '+datetime.now().strftime("%a %b %d %Y %H:%M:%S"))
@@ -325,6 +850,10 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.rcFileName=os.path.join(self.pcConfigDir,'plans_console.rc')
         self.configFileName=os.path.join(self.pcConfigDir,'plans_console.cfg')
         self.pcDataFileName=os.path.join(common.pcDir,'save_plans_console.txt')
+        # start reading any saved session now, on the journal's I/O thread, while the GUI is built
+        self.journal=SessionJournal(self.pcDataFileName)
+        if os.path.exists(self.pcDataFileName):
+            self.journal.startLoad()
 
         self.ui=Ui_PlansConsole()
         self.ui.setupUi(self)
@@ -353,7 +882,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.fidMed = None
         self.fidLE = None
         self.sentMsg = []
-        self.savedData = []      # data saved prior to a rescan
+        self.savedColors = {}    # row colors saved prior to a rescan: rowFingerprint -> list of colors, oldest first
         self.FIRST_PASS = True   # unset after first time thru so that warning above is only given once
         self.color = ["#ffff00", "#cccccc"]  # yellow, gray80
                      
@@ -414,7 +943,11 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.feature = {}
         self.feature2 = {}
         # self.setStyleSheet("background-color:#d6d6d6")
-        self.ui.tableWidget.cellClicked.connect(self.tableCellClicked)        
+        self.radiologModel=LogTableModel(['Time','Team','Description','Location','Status'],self)
+        self.ui.tableWidget.setModel(self.radiologModel)
+        self.clueLogModel=LogTableModel(['ClueNum','Time','Location','Description'],self)
+        self.ui.tableWidget_2.setModel(self.clueLogModel)
+        self.ui.tableWidget.clicked.connect(self.tableCellClicked)        
         self.ui.OKbut.clicked.connect(self.assignTab_OK_clicked)
         self.ui.doOper.clicked.connect(self.doOperClicked)
         self.ui.incidentButton.clicked.connect(self.incidentButtonClicked)
@@ -431,7 +964,16 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.offsetFileName2='offset2.csv'
         self.csvFiles=[]
         self.csvFiles2=[]
-
+        self.radiologReader=CsvRecordReader()
+        self.clueLogReader=CsvRecordReader()
+        self.waitingForFile=False
+        self.watchedFilesDirty=True     # read at the first refresh
+        self.dirSnapshot=None           # [directory mtime, classified file lists] - see getDirSnapshot
+        self.tailCheckpoints={}         # watched filename -> [inode,offset,hash] - see tailCheckpoint
+        self.checkBlockSize=4096
+
+        self.restoreBatches=[]          # see restoreRows
+        self.restoreBatchSize=1000
         if os.path.exists(self.pcDataFileName):
             [i,d,n]=self.preview_saved_data()
             if not self.args.norestore:
@@ -451,6 +993,8 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                     # if "y" in name1.lower():
                         self.load_data()
                         self.reloaded = True
+        if not self.reloaded:
+            self.journal.reset()    # start a new session; the save file is replaced at the first save
         if not self.args.nourl and not self.reloaded:
             name1=self.args.mapID
             if name1:
@@ -489,7 +1033,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         
         if self.watchedDir:
             logging.info('watched dir:'+str(self.watchedDir))
-            self.ui.notYet=QMessageBox(QMessageBox.Information,"Waiting...","No valid radiolog file was found.\nRe-scanning every few seconds...",
+            self.ui.notYet=QMessageBox(QMessageBox.Information,"Waiting...","No valid radiolog file was found.\nWaiting for one to appear in the watched directory...",
                         QMessageBox.Abort,self,Qt.WindowTitleHint|Qt.WindowCloseButtonHint|Qt.Dialog|Qt.MSWindowsFixedSizeDialogHint|Qt.WindowStaysOnTopHint)
             self.ui.notYet.setStyleSheet("background-color: lightgray")
             self.ui.notYet.setModal(False)
@@ -498,12 +1042,18 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             self.ui.rescanButton.clicked.connect(self.rescanButtonClicked)
             self.ui.printButton.clicked.connect(self.printButtonClicked)
 
-            self.rescanTimer=QTimer(self)
-            self.rescanTimer.timeout.connect(self.rescan)
+            # rescan when the set of csv files changes, until a radiolog file is found;
+            #  refresh only reads the radiolog and clueLog when they have changed
+            self.watcher=DirWatcher(self.watchedDir,self,mode=self.watchMode)
+            self.watcher.dirChanged.connect(self.watchedDirChanged)
+            self.watcher.fileChanged.connect(self.watchedFileChanged)
             if not self.reloaded:
-                self.rescanTimer.start(2000)     # do not start rescan timer if this is a reload
+                self.waitingForFile=True
+                QTimer.singleShot(2000,self.rescan)     # the file may already be there
             else:
+                self.waitingForFile=False
                 self.ui.notYet.close()           # we have csv file in reload
+                self.watcher.setFiles([self.watchedFile,self.watchedFile2])
         else:
             logging.info('No watched dir specified.')
         
@@ -515,8 +1065,19 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.print_refresh = 0
         self.update_TmAs = 0
         self.update_Tm = 0
-        self.flag_TmAs_getobj = False
-        self.flag_TmAs_Ok = False
+        # map reads for the team/assignment table, and the map edits requested with the OK button,
+        #  run in order on the map command queue's worker thread
+        self.mapQueue=MapCommandQueue(self)
+        self.mapQueue.message.connect(self.mapQueueMessage)
+        self.tmAsRebuildPending = False
+        self.tmAsRevision = None    # cache revision of the rows in the team/assignment table
+        self.titleTokens = {}       # assignment title: parsed tokens; see getObjects
+        self.mapCommandCount = 0    # number of OK button map commands submitted
+        self.unconfirmedMarkers = {}    # marker id: [sync count when added, attempt, markerSpec args]; see confirmMarkers
+        self.markerAttempts = 3
+        self.removalAttempts = 4    # see sendTeamRemoval
+        self.removalRetryDelay = 2  # seconds; doubled for each retry
+        self.markerConfirmSyncCount = -1
 
         self.since={}
         self.since["Folder"]=0
@@ -529,6 +1090,10 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.ui.incidentMapField.setText('<None>')
         self.ui.debriefMapField.setText('<None>')
 
+        # the incident map session syncs in its own thread; its callbacks emit ctsCacheChangedSignal,
+        #  which calls the _ctsCacheChanged slot in the main thread (queued connection)
+        self.ctsCacheChangedSignal.connect(self._ctsCacheChanged,Qt.QueuedConnection)
+
         if self.incidentURL:
             self.ui.incidentMapField.setText(self.incidentURL)
             self.tryAgain=True
@@ -536,8 +1101,9 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 self.createCTS()
         # check and create if not existing, line assignments for IC and TR to use as placeHolders for teams at IC or in transit
         try:
-            assigns = self.updateLettNumb()   # get assignments and update properties letter and number
-            #Z#assigns = self.cts.getFeatures('Assignment') 
+            # read from the cache only; the letter and number updates are sent by the table rebuild
+            #  job that createCTS queued on the map command queue
+            assigns = self.cts.getFeatures('Assignment')
             print("getting assignments for IC and TR, if they exist")
         except:
             pass   # if timeout then just return
@@ -592,13 +1158,21 @@ class PlansConsole(QDialog,Ui_PlansConsole):
 
     def updateLettNumb(self):
         ###  pickup assignment features, then using title separate out assignment letter and string of team numbers
+        ###  only assignments whose letter or number properties don't already match the title are edited
         assigns = self.cts.getFeatures('Assignment') 
+        edits = []
         for assgn in assigns:
-            titl = assgn['properties']['title']
+            prop = assgn['properties']
+            titl = prop['title']
             info = titl.split(' ')
             assg = info[0]
             nmbr = ' '.join(info[1:])      # edit the feature to set properties letter abd number
-            rval2=self.cts.editFeature(className='Assignment', title=titl, properties={'number':nmbr, 'letter':assg})
+            if prop.get('letter') == assg and prop.get('number') == nmbr:
+                continue
+            edits.append({'id':assgn['id'], 'className':'Assignment', 'properties':{'number':nmbr, 'letter':assg}})
+        if edits:
+            rval2=self.cts.editFeatures(edits)    # one concurrent batch
+        logging.info('updateLettNumb: '+str(len(edits))+' assignment edit(s) sent, '+str(len(assigns)-len(edits))+' skipped (letter and number already match title)')
         return assigns    
 
 
@@ -615,25 +1189,16 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         # choose some colors
         c.setStrokeColorRGB(0,0,0)           ## color for lines
         c.setFillColorRGB(0.15,0.15,0.15)    ## color for text
-        self.csvFiles2 = []        
-        f2=glob.glob(self.watchedDir+"\\*.csv")
-        f2x=[x for x in f2 if regex.match('.*_clueLog.csv$',x)]  # get cluelog files
-        f2s=sorted(f2x,key=os.path.getmtime,reverse=True)
-        for file in f2s:
-            l=[file,os.path.getsize(file),os.path.getmtime(file)]
-            self.csvFiles2.append(l)
-        self.watchedFile2=self.csvFiles2[0][0]
+        self.csvFiles2 = list(self.getDirSnapshot()['clueLog'])
+        if self.csvFiles2:
+            self.watchedFile2=self.csvFiles2[0][0]
         ioff = 0.1
         Entries = []
         if (self.watchedDir and self.csvFiles2!=[]):
-          with open(self.watchedFile2, 'r') as fid:  
-                lines = fid.readlines()
-          newl = False   # set to not working a newline within a string
-          for line in lines:      
-              line, newl = self.fixStrg(line, newl)  # fix ' and newline in  string
-              if newl:
-                  continue     # in the middle of a multi-line description
-              Entries.append(line.split(','))
+          reader = CsvRecordReader()    # separate from clueLogReader, so the refresh tail position is not disturbed
+          with open(self.watchedFile2, 'r', newline='') as fid:
+                Entries = reader.feed(fid)
+          Entries += reader.flush()
           for entry in Entries:
             if len(entry)>8:
                 entry=entry[:8]                 
@@ -676,51 +1241,6 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         c.save()
         pdfx = subprocess.Popen(["C:/Program Files/Adobe/Acrobat DC/Acrobat/Acrobat.exe", "report.pdf"])
 
-    def fixStrg(self, line, newl):
-        lineX = line
-        if newl:
-            pass # reading next line as part of prior line; replace
-                 # newline with /
-            lineX = self.savel+lineX    # concatenate lines
-            offset = len(self.savel)  # want to continue scan after nl replacement
-            #newl = False         # reset newl mode until a possible next nl
-            #print("LINE:"+str(self.savel)+":"+str(lineX)+"::")
-        else:
-            self.inStrg = False
-            offset= 0
-        #print("INTER:"+str(lineX)+":"+str(self.inStrg)+":"+str(newl)+":"+str(len(lineX)))    
-        #
-        #
-        #  CHECK -1 removal............
-        #
-        for i in range(offset,len(lineX)): # -1):  # stop b4 last char  REMOVE comma in a string
-                                              # also account for newline in a text string
-            ##QQ print("ERROR:"+str(line)+":"+str(i))
-            if lineX[i] == '"' or self.inStrg :
-                #print("A:"+str(lineX[i])+":"+str(i))
-                if lineX[i] == ',':
-                    lineX = lineX[:i]+';'+lineX[i+1:]       # replace ',' in a string
-                if lineX[i] == '\n' or (newl and i == len(lineX)-2):  # do not want to keep newline character
-                    if lineX[i] == '\n':   # some lines appear to have the nl (get rid of)
-                                           # others do not, so keep the character
-                        j = 0
-                    else:
-                        j = 1
-                    lineX = lineX[:i+j]+'/'       # replace 'nl' in a string OR last char w/o finding nl
-                    #print("MOD:"+str(lineX)+":"+str(i))
-                    self.savel = lineX
-                    newl= True
-                    self.inStrg = True
-                    break     # at end of this line, get some more on next call
-                elif lineX[i] == '"' and self.inStrg:
-                    #print("END:"+str(i))
-                    self.inStrg = False      # end of string
-                    newl = False
-                    continue 
-                self.inStrg = True   # only done inside a string  getting
-
-        return(lineX, newl)
-
     def createCTS(self):
         parse=self.incidentURL.replace("http://","").replace("https://","").split("/")
         domainAndPort=parse[0]
@@ -735,6 +1255,8 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             cacheDumpFile='cachedump.'+mapID
             logging.info('Cache dump file will be written after each "since" request; each filename will begin with '+cacheDumpFile)
             cacheDumpFile+='.txt'
+        if self.cts:
+            self.cts._stop()    # end the previous session's sync thread; it would keep polling and calling ctsCallback
         self.cts=None
         box=QMessageBox(
             QMessageBox.NoIcon, # other values cause the chime sound to play
@@ -751,12 +1273,21 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 self.cts=CaltopoSession(domainAndPort=domainAndPort,mapID=mapID,
                                         configpath=self.ctsconfigpath,
                                         account=self.accountName,
-                                        sync=False,
+                                        sync=True,
                                         syncDumpFile=syncDumpFile,
                                         cacheDumpFile=cacheDumpFile,
+                                        propertyUpdateCallback=self.ctsCallback,
+                                        geometryUpdateCallback=self.ctsCallback,
+                                        newFeatureCallback=self.ctsCallback,
+                                        deletedFeaturesCallback=self.ctsCallback,
                                         useFiddlerProxy=True)
             else:
-                self.cts=CaltopoSession(domainAndPort=domainAndPort+'/',mapID=mapID,sync=False,syncDumpFile=syncDumpFile,cacheDumpFile=cacheDumpFile,useFiddlerProxy=True, syncTimeout=30)
+                self.cts=CaltopoSession(domainAndPort=domainAndPort+'/',mapID=mapID,sync=True,syncDumpFile=syncDumpFile,cacheDumpFile=cacheDumpFile,
+                                        propertyUpdateCallback=self.ctsCallback,
+                                        geometryUpdateCallback=self.ctsCallback,
+                                        newFeatureCallback=self.ctsCallback,
+                                        deletedFeaturesCallback=self.ctsCallback,
+                                        useFiddlerProxy=True, syncTimeout=30)
             self.link=self.cts.apiVersion
         except Exception as e:
             logging.warning('Exception during createCTS:\n'+str(e))
@@ -767,7 +1298,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             logging.info('Successfully connected.')
             self.ui.incidentLinkLight.setStyleSheet(BG_GREEN)
             if not self.reloaded:  
-                self.getObjects()
+                self.queueTmAsRebuild()
             '''
             #Z1
             else:
@@ -790,31 +1321,150 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             else:
                 self.tryAgain=False                 
 
+    # ctsCallback - called from the incident map sync thread when a feature is added, edited, or deleted;
+    #  it must not touch any widgets, so it just emits ctsCacheChangedSignal
+    def ctsCallback(self,*args):
+        self.ctsCacheChangedSignal.emit()
+
+    # _ctsCacheChanged - runs in the main thread; schedule the team/assignment table update for the
+    #  next refresh tick, so that a burst of callbacks from one sync only causes one update
+    def _ctsCacheChanged(self):
+        self.update_TmAs=max(self.update_TmAs,4)
+
+    # queueTmAsRebuild - queue a job that reads the map and rebuilds the team/assignment table;
+    #  only one rebuild is queued at a time
+    def queueTmAsRebuild(self):
+        self.tmAsRebuildPending = True
+        self.mapQueue.submit(self.tmAsRebuildJob,self.mapCommandCount,callback=self.tmAsRebuilt)
+
+    # tmAsRebuildJob - runs on the map command queue worker thread; returns None if the map
+    #  has not changed since the rows that are in the table were read
+    def tmAsRebuildJob(self,commandCount):
+        if self.cts.cacheRevision == self.tmAsRevision:
+            return None
+        self.updateLettNumb()       # update letter and number for any new assignment changes
+        revision = self.cts.cacheRevision   # read before the rows, so a change during the read causes another rebuild
+        return [commandCount,revision,self.getObjects()]
+
+    # tmAsRebuilt - runs in the main thread with the rows read by tmAsRebuildJob
+    def tmAsRebuilt(self,result):
+        self.tmAsRebuildPending = False
+        if result is None:
+            return      # the map has not changed, or the job failed (it has already been logged and reported)
+        [commandCount,revision,rows] = result
+        if rows is None:
+            return      # timeout; keep the current table
+        if commandCount != self.mapCommandCount:
+            # the OK button changed the table after this job was queued; its map edits cause another
+            #  rebuild, so don't briefly show the stale rows
+            logging.info("Discarding team/assignment table rebuild queued before the latest OK button command")
+            self.tmAsRevision = None
+            self.update_TmAs = max(self.update_TmAs,4)
+            return
+        self.tmAsRevision = revision
+        self.applyTmAsRows(rows)
+        self.checkTmAsDuplicates()
+
+    # applyTmAsRows - make the team/assignment table match rows (sorted by team), changing only
+    #  the rows that were added, removed, or changed; a row is keyed by team and assignment,
+    #  and its value is the type and medical columns
+    def applyTmAsRows(self,rows):
+        t = self.ui.tableWidget_TmAs
+        wanted = {}
+        for el in rows:
+            wanted[(el[0].upper(),el[1].upper())] = el
+        current = {}    # key: row number
+        removed = 0
+        for i in range(t.rowCount()-1,-1,-1):   # reverse, so rows can be removed as we go
+            key = (t.item(i,0).text().upper(),t.item(i,1).text().upper())
+            if key not in wanted or key in current:
+                t.removeRow(i)
+                removed += 1
+                continue
+            current[key] = i
+        if removed:     # the rows below a removed row have moved up
+            current = {}
+            for i in range(t.rowCount()):
+                current[(t.item(i,0).text().upper(),t.item(i,1).text().upper())] = i
+        added = changed = 0
+        for [n,el] in enumerate(rows):
+            key = (el[0].upper(),el[1].upper())
+            i = current.get(key)
+            if i is None:
+                i = min(n,t.rowCount())
+                t.insertRow(i)
+                for k in current:
+                    if current[k] >= i:
+                        current[k] += 1
+                current[key] = i
+                for col in range(4):
+                    t.setItem(i, col, QtWidgets.QTableWidgetItem(el[col]))
+                added += 1
+                continue
+            for col in range(4):
+                if t.item(i,col).text() != el[col]:
+                    t.setItem(i, col, QtWidgets.QTableWidgetItem(el[col]))
+                    changed += 1
+        logging.info("Team/assignment table: "+str(removed)+" row(s) removed, "+str(added)+" added, "+str(changed)+" cell(s) changed")
+
+    # checkTmAsDuplicates - warn (once) about each team that is in more than one assignment
+    def checkTmAsDuplicates(self):
+        ## look for multiple entries for a given team. If so, pop up a warning
+        fnd = []
+        resend = []
+        for itm in range(self.ui.tableWidget_TmAs.rowCount()):    # look for team in multiple assignments
+            d = self.ui.tableWidget_TmAs.item(itm, 0).text()
+            if d.upper() not in fnd:              # add team# to queue on first appearance
+                fnd.append(d.upper())
+            else:
+                resend.append(d.upper())
+                if d.upper() not in self.sentMsg:   # only put up message once
+                   self.sentMsg.append(d.upper())
+                   msg = 'Team '+str(d)+' is in multiple assignments'
+                   inform_user_about_issue(msg, title="Warning")
+        for itm in self.sentMsg:
+            if itm not in resend:
+                self.sentMsg.remove(itm)         # if team# count has been corrected, elim from sentMsg
+
+    # mapQueueMessage - runs in the main thread; shows a message from a map command queue job
+    def mapQueueMessage(self,msg):
+        inform_user_about_issue(msg,parent=self)
+
+    # getObjects - returns the team/assignment table rows read from the map, sorted by team, or None on timeout;
+    #  runs on the map command queue worker thread, so it must not touch any widgets
     def getObjects(self):   # run when the map has NOT been reloaded OR needs to be updated
         pass                # look at map to get features to load into the assignment table
         print("Loading assignment table from map")
         #  get Medical marker information
+        #  (getObjects only runs when the map revision changed, so this is built once per revision)
         try:
-            medMarkers=[f for f in self.cts.getFeatures('Marker') if f['properties'].get('marker-symbol','') == 'medevac-site']
+            medKeys=set((f['properties'].get('title'),f['properties'].get('description')) for f in self.cts.getFeatures('Marker')
+                        if f['properties'].get('marker-symbol','') == 'medevac-site')
             print("updating markers")
         except:
-            return   # if timeout then just return
+            return None   # if timeout then just return
         #  get assignments with teams(s) assigned
         try:
             assignmentsWithNumber=[f for f in self.cts.getFeatures('Assignment') if f['properties'].get('number','') != '']
             print("updating assignments with teams")
         except:
-            return   # if timeout then just return
+            return None   # if timeout then just return
         #   Need to parse title to get assignemnt and each team #
+        #   the parsed tokens are cached by title, since most titles don't change between revisions
         l = []   # init list of entries
+        titleTokens = {}
         for a in assignmentsWithNumber:
-            s = re.sub(' +', ' ',a['properties']['title'].strip())   # split at space or comma or slash (get assignment & teams)
-            s = re.split(r'[ ,/]', s)   # split at space or comma or slash (get assignment & teams)
-            #s = re.split(r'[ ,/]', a['properties']['title'].strip())   # split at space or comma or slash (get assignment & teams)
+            title = a['properties']['title']
+            s = self.titleTokens.get(title)
+            if s is None:
+                s = re.sub(' +', ' ',title.strip())   # split at space or comma or slash (get assignment & teams)
+                s = re.split(r'[ ,/]', s)   # split at space or comma or slash (get assignment & teams)
+                #s = re.split(r'[ ,/]', a['properties']['title'].strip())   # split at space or comma or slash (get assignment & teams)
+            titleTokens[title] = s
             print("####### "+str(s)+"::"+str(a['properties']['title'].strip())+"::")
             # pop warning message that Assignment does not exist - skipping
             if s[0] == '' and self.FIRST_PASS:    # no assignment or assignment is in number (team) field
-                inform_user_about_issue("Mostlikely Assignment name, "+str(s[1])+", is in the number field, skipping")
+                self.mapQueue.warn("Mostlikely Assignment name, "+str(s[1])+", is in the number field, skipping")
                 continue
             scnt = len(s)
             #$#if self.flag == 1:
@@ -824,169 +1474,187 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                     x = 'LE'
                 else:
                     x = a['properties'].get('resourceType','')
-                Med = False    
-                for m in medMarkers:
-                    #print("Med Info Chk:"+str(m)+":"+str(s[k+1]+s[0]))
-                    #if m['properties']['title'] == s[k+1] and m['properties']['description'] == s[0]:   #OLD team# was displayed on the map
-                    if m['properties']['title'] == s[k+1] and m['properties'].get('description') == s[k+1]+s[0]:
-                       #print("Found") 
-                       Med = True          #  will get Medical info from the Marker
-                if Med: self.medval = " X"
-                else: self.medval = " "    #  need at least a space so that it is not empty
+                #if m['properties']['title'] == s[k+1] and m['properties']['description'] == s[0]:   #OLD team# was displayed on the map
+                Med = (s[k+1],s[k+1]+s[0]) in medKeys   #  will get Medical info from the Marker
+                if Med: medval = " X"
+                else: medval = " "    #  need at least a space so that it is not empty
  
-                l.append([s[k+1], s[0], x, self.medval])
-                l.sort(key = lambda g: g[0], reverse = True)   # sort by 1st element, team #
+                l.append([s[k+1], s[0], x, medval])
+        self.titleTokens = titleTokens     # only keep the titles that are still on the map
+        l.sort(key = lambda g: g[0])   # sort by 1st element, team #
         self.FIRST_PASS = False   # set after first time thru so that warning above is only given once
-        for el in l:
-                   self.ui.tableWidget_TmAs.insertRow(0)
-                   self.ui.tableWidget_TmAs.setItem(0, 0, QtWidgets.QTableWidgetItem(el[0]))
-                   self.ui.tableWidget_TmAs.setItem(0, 1, QtWidgets.QTableWidgetItem(el[1]))    
-                   self.ui.tableWidget_TmAs.setItem(0, 2, QtWidgets.QTableWidgetItem(el[2]))
-                   self.ui.tableWidget_TmAs.setItem(0, 3, QtWidgets.QTableWidgetItem(el[3]))
+        return l
 
         #     set type to Unk if not type is unknown from map info
 
-    def addMarker(self):
+    # assignTeams - add one or more teams to an assignment: add the Medical or LE marker of each team in one
+    #  concurrent batch, then add all of the teams to the assignment's number in a single edit;
+    #  teams is a list of [team,lat,lon]; runs on the map command queue worker thread
+    def assignTeams(self,teams,assign,resourceType,medval):
         folders=self.cts.getFeatures("Folder")
         self.fidX = True    # set to something other than None for following test
         if not folders:
             self.fidX = self.cts.addFolder("X")   # add unused folder for following test
             print("StatusAddFolder"+str(self.fidX))
         if self.fidX == None:   # could not add    
-            inform_user_about_issue("Mostlikely this session is not connected to the map for write access. Check that the proper account is being used.")
+            self.mapQueue.warn("Mostlikely this session is not connected to the map for write access. Check that the proper account is being used.")
             return
-        logging.info('addMarker folders:'+str(folders))
-        fid=False   # used to help get display of first marker of type Med or LE, see below
+        logging.info('assignTeams folders:'+str(folders))
+        markers = []    # [markerSpec args, addMarker keyword arguments]
+        for [team,lat,lon] in teams:
+            args = [team,assign,resourceType,medval,lat,lon]
+            spec = self.markerSpec(folders,*args)
+            if spec:
+                markers.append([args,spec])
+        rval = "X"   # place holder; no markers for searchers
+        if markers:
+            rval = self.cts.addMarkers([spec for [args,spec] in markers]) or [False]*len(markers)
+            syncCount = self.cts.syncCompletedCount
+            for [[args,spec],mid] in zip(markers,rval):
+                if not mid:
+                    self.mapQueue.warn('Could not add the map marker for team '+args[0]+'.')
+                elif self.cts.sync:
+                    # a new marker sometimes does not show up on the map; check it after the next sync (see confirmMarkers)
+                    self.unconfirmedMarkers[mid] = [syncCount,1,args]
+        teamList = ' '.join([t[0] for t in teams])
+        logging.info("In assignTeams:"+teamList)    
+        ## also add team numbers to assignment
+        numbr = ""
+        for a in self.cts.getFeatures(featureClass='Assignment',title=assign,letterOnly=True,allowMultiTitleMatch=True):   # through the cache index
+            if a['properties'].get('letter','') == assign:
+                numbr = a['properties'].get('number','')
+                break
+        if numbr == '' or numbr is None:
+            numbr = teamList
+        else:
+            print("NUMBER:"+str(numbr)+":"+str(teamList))
+            numbr += " "+teamList  #  set the team# and resource from table entry  
+        assign = assign.upper()    
+        if assign == 'IC':
+            assign = 'ICX'  # using ICX to avoid conflict with IC marker
+        if assign == 'ICX' or assign == 'TR':
+            resourceType = ' '    # when at IC or in TR team type is blanked
+        rval2=self.cts.editFeature(className='Assignment', letter=assign, properties={'number':numbr, \
+                                   'resourceType':resourceType})
+        if rval2 == False:
+            self.mapQueue.warn('Could not edit map object, probably do not have access to EDIT this map.')
+        logging.info("RVAL rtn:"+str(rval)+' : '+str(rval2))
+
+
+    
+    # markerSpec - returns the cts.addMarker keyword arguments for the Medical or LE marker of a team,
+    #  creating its folder if needed, or None if the team does not get a marker;
+    #  runs on the map command queue worker thread
+    def markerSpec(self,folders,team,assign,resourceType,medval,lat,lon):
         for folder in folders:
             if folder["properties"]["title"]=="Medical":
                 self.fidMed=folder["id"]
-                fid = True     # use here or below?
             if folder["properties"]["title"]=="LE":
                 self.fidLE=folder["id"]
-                fid = True     # use here or below?
-        #if not self.fidMed:
-        #    self.fidMed = self.cts.addFolder("Medical")
-        #if not self.fidLE:
-        #    self.fidLE = self.cts.addFolder("LE")
         ## icons
-        if self.medval == " X":
+        if medval == " X":
             if not self.fidMed:
                 self.fidMed = self.cts.addFolder("Medical")
-                fid = True
             markr = "medevac-site"     # medical +
             clr = "FF0000"
-            #rval=self.cts.addMarker(self.latField,self.lonField,self.curTeam,self.curAssign, \  # OLD: team# was displayed on the map
-            rval=self.cts.addMarker(self.latField,self.lonField,self.curTeam,self.curTeam+self.curAssign, \
-                                            clr,markr,None,self.fidMed)
-            if fid:                  # temporary fix   NOW (10/25/2023) does not seem to help
-              print("At reADD marker")
-              time.sleep(4)          # the delay, delete and redo seems to get display of marker
-              self.delMarker()       # removes most recent
-              rval=self.cts.addMarker(self.latField,self.lonField,self.curTeam,self.curTeam+self.curAssign, \
-                                            clr,markr,None,self.fidMed)
-        elif self.curType == "LE":     # law enforcement
+            #description=assign   # OLD: team# was displayed on the map
+            return {'lat':lat,'lon':lon,'title':team,'description':team+assign,'color':clr,'symbol':markr,'folderId':self.fidMed}
+        elif resourceType == "LE":     # law enforcement
             if not self.fidLE:
                 self.fidLE = self.cts.addFolder("LE")
-                fid = True
             markr = "icon-ERJ4011P-24-0.5-0.5-ff"     # red dot with blue circle
             clr = "FF0000"           
-            rval=self.cts.addMarker(self.latField,self.lonField,self.curTeam, \
-                                    self.curAssign,clr,markr,None,self.fidLE)
-            if fid:                  # temporary fix   NOW (10/25/2023) does not seem to help
-              print("At reADD marker")
-              time.sleep(4)          # the delay, delete and redo seems to get display of marker
-              self.delMarker()
-              rval=self.cts.addMarker(self.latField,self.lonField,self.curTeam, \
-                                     self.curAssign,clr,markr,None,self.fidLE)
+            return {'lat':lat,'lon':lon,'title':team,'description':assign,'color':clr,'symbol':markr,'folderId':self.fidLE}
         else:
             pass #X# don't place marker for searcher
             #X# markr = "hiking"       # default 
             #X# clr = "FFFF00"
-            rval = "X"   # place holder
-        logging.info("In addMarker:"+self.curTeam)    
-        ## also add team number to assignment
-        rval2 = self.cts.mapData['state']['features']
-        numbr = ""
-        for props in rval2:
-            lettr = props['properties'].get('letter','')
-            if lettr is None:  continue
-            print("PROPS:"+str(self.curAssign)+":"+str(lettr))
-            if lettr == self.curAssign:
-                numbr = props['properties'].get('number','')
-                break
-        if numbr == '' or numbr is None:
-            numbr = self.curTeam
-        else:
-            print("NUMBER:"+str(numbr)+":"+str(self.curTeam))
-            numbr += " "+self.curTeam  #  set the team# and resource from table entry  
-        assign = self.curAssign.upper()    
-        if assign == 'IC':
-            assign = 'ICX'  # using ICX to avoid conflict with IC marker
-        if assign == 'ICX' or assign == 'TR':
-            self.curType = ' '    # when at IC or in TR team type is blanked
-        rval2=self.cts.editFeature(className='Assignment', letter=assign, properties={'number':numbr, \
-                                   'resourceType':self.curType})
-        if rval2 == False:
-            inform_user_about_issue('Could not edit map object, probably do not have access to EDIT this map.',parent=self)
-        logging.info("RVAL rtn:"+str(rval)+' : '+str(rval2))
-
-
-    
-    def delMarker(self):     # does a lot more than deleting a marker
-        rval = self.cts.getFeatures("Folder")     # get Folders
-        rval2 = self.cts.getFeatures("Marker")
-        ##print("Folders:"+json.dumps(rval))
-        fidLE = None
-        fidMed = None
-        for self.feature2 in rval:
-            if self.feature2['properties'].get("title") == 'LE':   # find LE folder Match                
-                fidLE=self.feature2.get("id")
-            if self.feature2['properties'].get("title") == 'Medical':   # find Medical folder Match                
-                fidMed=self.feature2.get("id")
-            if fidLE != None or fidMed != None:    
-                logging.info("id:"+str(fidLE))
-                ##print("Marker:"+json.dumps(rval2))                  
-                # get Markers
-                for self.feature2 in rval2:
-                    if (self.feature2['properties'].get('folderId') == fidLE or self.feature2['properties'].get('folderId') == fidMed) and \
-                        self.feature2['properties'].get('title').upper() == self.curTeam.upper(): # both folder and Team match
-                            logging.info("Marker ID:"+self.feature2['id']+" of team: "+self.curTeam)
-                            rval3 = self.cts.delMarker(self.feature2['id'])
-
+            return None
+
+    # confirmMarkers - check the markers added by assignTeams, once a sync that started after the marker
+    #  was added has completed: the marker is confirmed if that sync kept it in the cache; otherwise it is
+    #  added again, up to markerAttempts times.  Runs on the map command queue worker thread, so it is
+    #  ordered with the OK button commands (delMarker drops the markers it removes).
+    def confirmMarkers(self):
+        syncCount=self.cts.syncCompletedCount
+        for [mid,[addedSyncCount,attempt,args]] in list(self.unconfirmedMarkers.items()):
+            # the first sync to complete may have started before the marker was added
+            if syncCount < addedSyncCount+2:
+                continue
+            del self.unconfirmedMarkers[mid]
+            if self.cts.getFeatures(featureClass='Marker',id=mid):
+                logging.info('Marker for team '+args[0]+' confirmed by sync ('+mid+')')
+                continue
+            if attempt >= self.markerAttempts:
+                self.mapQueue.warn('The map marker for team '+args[0]+' could not be confirmed after '+str(attempt)+' attempts; please check the map.')
+                continue
+            logging.warning('Marker for team '+args[0]+' ('+mid+') was not in the map after sync; adding it again')
+            rval=self.cts.addMarker(**self.markerSpec(self.cts.getFeatures("Folder"),*args))
+            if rval:
+                self.unconfirmedMarkers[rval]=[self.cts.syncCompletedCount,attempt+1,args]
+
+    # delMarker - delete a team's LE/Medical markers and remove the team from any assignment numbers;
+    #  runs on the map command queue worker thread
+    def delMarker(self,team):     # does a lot more than deleting a marker
+        for mid in [mid for [mid,m] in self.unconfirmedMarkers.items() if m[2][0].upper() == team.upper()]:
+            del self.unconfirmedMarkers[mid]    # being removed; don't confirm or re-add it
+        # find the team's markers (including any Medical marker) through the cache's folder index
+        deletes = []
+        for folderTitle in ['LE','Medical']:
+            for folder in self.cts.getFeatures(featureClass='Folder',title=folderTitle,allowMultiTitleMatch=True):
+                if folder['properties'].get('title') != folderTitle:   # the title lookup is case-insensitive; only the exact folder holds team markers
+                    continue
+                for marker in self.cts.getFeatures(featureClass='Marker',folderId=folder['id']):
+                    if (marker['properties'].get('title') or '').upper() == team.upper():   # both folder and Team match
+                        logging.info("Marker ID:"+marker['id']+" of team: "+team)
+                        deletes.append({'id':marker['id'],'class':'Marker'})
         # remove the team number from any assignments that contain it
-        assignmentsWithThisNumber=[f for f in self.cts.getFeatures('Assignment') if self.curTeam.upper() in f['properties'].get('number','').upper()]
-        for a in assignmentsWithThisNumber:
+        edits = []
+        for a in self.cts.getFeatures('Assignment'):
             n=a['properties'].get('number','')
+            nList=n.upper().split()
+            if team.upper() not in nList:
+                continue
             pe=a['properties'].get('previousEfforts','')   # if non-existent returns ''
             logging.info('changing assignment "'+a['properties']['title']+'": old number = "'+n+'"')
-            nList=n.upper().split()
-            if self.curTeam.upper() in nList:
-                nList.remove(self.curTeam.upper())
-            else:
-                return
+            nList.remove(team.upper())
             n=' '.join(nList)
             logging.info('  new number = "'+n+'"')
-            pe += ' T'+self.curTeam+datetime.now().strftime("-%d%b%y_%H%M")                # append info to previousEfforts field
-            try:
-                self.cts.editFeature(id=a['id'],properties={'number':n,'previousEfforts':pe})  # removes this team# from assignment
-            except:
-                time.sleep(2)  # wait 2 seconds and retry
-                try:
-                    self.cts.editFeature(id=a['id'],properties={'number':n,'previousEfforts':pe})  # removes this team# from assignment
-                except:
-                    logging.error("Could not connect to Caltopo, please retry request")
-                    return
-###@@@@###            
-        ##print("RestDel:"+json.dumps(rval3,indent=2))
-        # check for Medical marker and also remove
-        if self.ui.Med.isChecked(): 
-            pass # remove marker from map and from Medical folder
-            for md in rval:
-                if md['properties'].get("title") == 'Medical': # find Medical folder match
-                    fid = md.get('id')
-                    for md in rval2:      # match both folder and Team
-                        if md['properties'].get('folderId') == fid and md['properties'].get('title').upper() == self.curTeam.upper():
-                            rval4 = self.cts.delMarker(md['id'])
+            pe += ' T'+team+datetime.now().strftime("-%d%b%y_%H%M")                # append info to previousEfforts field
+            edits.append({'id':a['id'],'className':'Assignment','properties':{'number':n,'previousEfforts':pe}})  # removes this team# from assignment
+        self.sendTeamRemoval(team,deletes,edits,1)
+
+    # sendTeamRemoval - send the marker deletes and assignment edits of delMarker, each as one concurrent batch;
+    #  any that fail are sent again later, with backoff, as a new job (see MapCommandQueue.retry), so that
+    #  neither the GUI nor the other map commands wait.  A retry is dropped if the feature has been deleted,
+    #  or if the assignment's number was changed by a later command.  Runs on the map command queue worker thread.
+    def sendTeamRemoval(self,team,deletes,edits,attempt):
+        if attempt > 1:
+            deletes = [d for d in deletes if self.cts.getFeatures(featureClass='Marker',id=d['id'])]
+            stale = [e for e in edits if not self.assignmentNumberIs(e['id'],e['properties']['number'])]
+            if stale:
+                logging.warning('Not retrying '+str(len(stale))+' assignment edit(s) for team '+team+', since the assignment number has changed since')
+                edits = [e for e in edits if e not in stale]
+        if deletes:
+            rval = self.cts.delFeatures(deletes) or [False]*len(deletes)
+            deletes = [d for [d,r] in zip(deletes,rval) if not r]
+        if edits:
+            rval = self.cts.editFeatures(edits) or [False]*len(edits)
+            edits = [e for [e,r] in zip(edits,rval) if not r]
+        if not deletes and not edits:
+            return
+        if attempt >= self.removalAttempts:
+            logging.error("Could not connect to Caltopo, please retry request")
+            self.mapQueue.warn("Could not connect to Caltopo to finish removing team "+team+" from the map; please retry request.")
+            return
+        delay = self.removalRetryDelay*2**(attempt-1)
+        logging.warning('Team '+team+' removal: '+str(len(deletes))+' marker delete(s) and '+str(len(edits))+' assignment edit(s) failed; retrying in '+str(delay)+' seconds')
+        self.mapQueue.retry(delay,self.sendTeamRemoval,team,deletes,edits,attempt+1)
+
+    # assignmentNumberIs - True if the cached assignment with this id has this number
+    def assignmentNumberIs(self,id,number):
+        a = self.cts.getFeatures(featureClass='Assignment',id=id)
+        return bool(a) and a[0]['properties'].get('number','') == number
              
 ##   APPEARS to not be used
     def updateFeatureList(self,featureClass,filterFolderId=None):
@@ -1054,6 +1722,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 
         # specify defaults here
         # self.watchedDir="Z:\\"
+        self.watchMode='auto'
         
         logging.info(' Reading config file '+self.configFileName)
         # configFile=QFile(self.configFileName)
@@ -1084,6 +1753,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.watchedDir=cpc.get('watchedDir','"Z:\\"')
         self.accountName=cpc.get('accountName',None)
         self.defaultDomainAndPort=cpc.get('defaultDomainAndPort',None)
+        self.watchMode=cpc.get('watchMode','auto').lower()
 
         # while not inStr.atEnd():
         #     line=inStr.readLine()
@@ -1106,6 +1776,23 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 configErr+="WARNING: specified watchedDir '"+self.watchedDir+"' does not exist.\n"
                 configErr+="  Radiolog traffic will not be monitored.\n\n"
 
+        # per-subsystem caltopo_python log levels: the root logger is at DEBUG, so default these to INFO
+        #  to keep full sync responses and request bodies out of the log unless specifically requested
+        logc=self.config['Logging'] if 'Logging' in self.config.sections() else {}
+        try:
+            setLogLevels({'sync':logc.get('sync','INFO'),'request':logc.get('request','INFO')},
+                    payloadLimit=logc.get('payloadLimit',None))
+        except ValueError as e:
+            configErr+="WARNING: invalid [Logging] setting: "+str(e)+"\n"
+            configErr+="  Default log levels will be used.\n\n"
+            setLogLevels({'sync':'INFO','request':'INFO'})
+
+        # validate watchMode
+        if self.watchMode not in ['auto','notify','poll']:
+            configErr+="WARNING: unrecognized watchMode '"+self.watchMode+"'; must be auto, notify, or poll.\n"
+            configErr+="  'auto' will be used.\n\n"
+            self.watchMode='auto'
+
         if configErr:
             self.configErrMsgBox=QMessageBox(QMessageBox.Warning,"Non-fatal Configuration Error(s)","Error(s) encountered in config file "+self.configFileName+":\n\n"+configErr,
                              QMessageBox.Ok,self,Qt.WindowTitleHint|Qt.WindowCloseButtonHint|Qt.Dialog|Qt.MSWindowsFixedSizeDialogHint|Qt.WindowStaysOnTopHint)
@@ -1113,14 +1800,20 @@ class PlansConsole(QDialog,Ui_PlansConsole):
 
     def notYetButtonClicked(self):
         # exit()
-        self.rescanTimer.stop()
+        self.waitingForFile=False
+
+    def watchedDirChanged(self):
+        if self.waitingForFile:
+            self.rescan()
+
+    def watchedFileChanged(self,path):
+        self.watchedFilesDirty=True
 
     
     def doOperClicked(self):  # map editor functions
         # eventually, we can use CTSFeatureComboBox to allow autocomplete on each feature name;
-        #  that will also do an immediate cache refresh when the fields are opened; until then,
-        #  we can force an immediate refresh now, when the button is clicked.
-        self.cts._refresh(forceImmediate=True)
+        #  the lookups below read the cache, which the sync thread keeps current - no network
+        #  request is made from the GUI thread
         op=self.ui.geomOpButtonGroup.checkedButton().text()
         selFeatureTitle=self.ui.selFeature.text()
         ## check that the shapes exist
@@ -1215,6 +1908,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
 
     def rescanButtonClicked(self):
         self.createCTS()      # besides rescanning the radiolog info, reconnect to the map
+        self.dirSnapshot=None # the user asked for a rescan, so don't trust any cached directory listing
         self.forceRescan = 1
         self.rescan()    #force a rescan/refresh
             
@@ -1227,7 +1921,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         #  added section for self.csvFiles2
         #
         if self.csvFiles!=[]:
-            self.rescanTimer.stop()
+            self.waitingForFile=False
             self.ui.notYet.close()
             self.watchedFile=self.csvFiles[0][0]
             self.setWindowTitle("Plans_console - "+os.path.basename(self.watchedFile)+"  Version "+VERSION)
@@ -1237,11 +1931,12 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             self.offsetFileName=self.watchedFile+".offset"+str(os.getpid())
             if os.path.isfile(self.offsetFileName):
                 os.remove(self.offsetFileName)
+            self.radiologReader.reset()     # discard any partial record from the previous read
             logging.info("  found "+self.watchedFile)
             self.get_data()   # get saved data to set color
             #self.refresh()
         if self.csvFiles2!=[]:
-            self.rescanTimer.stop()
+            self.waitingForFile=False
             self.ui.notYet.close()
             self.watchedFile2=self.csvFiles2[0][0]
             # remove the pygtail offset file, if any, so pygtail will
@@ -1250,8 +1945,10 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             self.offsetFileName2=self.watchedFile2+".offset"+str(os.getpid())
             if os.path.isfile(self.offsetFileName2):
                 os.remove(self.offsetFileName2)
+            self.clueLogReader.reset()
             logging.info("  found "+self.watchedFile2)
             #self.refresh()
+        self.watcher.setFiles([self.watchedFile if self.csvFiles else None,self.watchedFile2 if self.csvFiles2 else None])
         if (self.csvFiles!=[] or self.csvFiles2!=[]) and self.link > -1:  # chk that csvfiles exist and that map is connected
             self.forceRescan = 1   #QQ      ### clear rows by setting to no rows
             self.refresh()
@@ -1263,12 +1960,31 @@ class PlansConsole(QDialog,Ui_PlansConsole):
     #  - read any new lines from the log file
     #  - process each new line
     #    - add a row to the appropriate panel's table    
+    # updateIncidentLinkLight - show the state of the incident map sync on the link light:
+    #  green = syncing normally, orange = recent syncs failed but sync is retrying, red = sync has stopped
+    def updateIncidentLinkLight(self):
+        if not self.cts or self.link<0:
+            return      # leave the light as set by createCTS
+        if self.cts.apiVersion<0 or not self.cts.sync:
+            style=BG_RED
+        elif self.cts.syncFailureCount>0:
+            style=BG_ORANGE
+        else:
+            style=BG_GREEN
+        if self.ui.incidentLinkLight.styleSheet()!=style:
+            if style!=BG_GREEN:
+                logging.info('incident map link: sync failure count='+str(self.cts.syncFailureCount)+'  current sync interval='+str(round(self.cts.currentSyncInterval,1))+'s  sync='+str(self.cts.sync))
+            self.ui.incidentLinkLight.setStyleSheet(style)
+
     def refresh(self):
-        if self.update_Tm == 200:       # 10 minutes    ## why is there a rescan timeout???
-               # maybe do this, but reset timeout if activity (refresh w/new data) has occurred??
-            logging.info("Calling rescan timeout...")
+        self.updateIncidentLinkLight()
+        if self.update_Tm == 200:       # 10 minutes with no new data
+            # only do a full rescan if the files already read have been replaced, truncated, or
+            #  rewritten, or if a newer radiolog or clueLog has appeared
             self.update_Tm = 0
-            self.rescan()
+            if self.watchedDir and not self.watchedFilesIntact():
+                logging.info("Calling rescan timeout...")
+                self.rescan()
         self.update_Tm += 1
         if self.print_refresh == 20:    # does this do anything??
             logging.info("Refreshing print...")
@@ -1277,42 +1993,23 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         ##
         # updating the team/assignment table
         ##
-        if self.update_TmAs >= 4:
-            self.updateLettNumb()       # update letter and number for any new assignment changes
-            while self.flag_TmAs_Ok:    # wait until Ok button operation is complete
-                pass
-            self.flag_TmAs_getobj = True
-            logging.info("Refreshing...")
+        if self.update_TmAs >= 4 and self.cts and self.link>-1 and not self.tmAsRebuildPending:
             self.update_TmAs = 0
-            rC = self.ui.tableWidget_TmAs.rowCount()
-            for i in range(rC-1,-1,-1):  # appears to clear table when run in reverse
-                self.curAssign = self.ui.tableWidget_TmAs.item(i,1).text().upper()
-                #S#if self.curAssign not in ["TR", "IC"]:   # keep these entries; they do not have assignments on map
-                #S#    self.ui.tableWidget_TmAs.removeRow(i)
-                self.ui.tableWidget_TmAs.removeRow(i)
-            self.getObjects()       # read objects on the map and update the table
-            self.flag_TmAs_getobj = False
-            ## look for multiple entries for a given team. If so, pop up a warning
-            fnd = []
-            resend = []
-            for itm in range(self.ui.tableWidget_TmAs.rowCount()):    # look for team in multiple assignments
-                d = self.ui.tableWidget_TmAs.item(itm, 0).text()
-                if d.upper() not in fnd:              # add team# to queue on first appearance
-                    fnd.append(d.upper())
-                else:
-                    resend.append(d.upper())
-                    if d.upper() not in self.sentMsg:   # only put up message once
-                       self.sentMsg.append(d.upper())
-                       msg = 'Team '+str(d)+' is in multiple assignments'
-                       inform_user_about_issue(msg, title="Warning")
-            for itm in self.sentMsg:
-                if itm not in resend:
-                    self.sentMsg.remove(itm)         # if team# count has been corrected, elim from sentMsg
+            self.queueTmAsRebuild()     # runs after any map commands already queued by the OK button
+        # check newly added markers once per completed sync, in order with the other map commands
+        if self.unconfirmedMarkers and self.cts and self.cts.syncCompletedCount != self.markerConfirmSyncCount:
+            self.markerConfirmSyncCount = self.cts.syncCompletedCount
+            self.mapQueue.submit(self.confirmMarkers)
         self.update_TmAs += 1
         ##
         #    updating the radiolog listing table
         ##
-        if (self.watchedDir and (self.csvFiles!=[] or self.csvFiles2!=[])):
+        # only read the files if the watcher saw a change, if a rescan is reloading them, or if a
+        #  record with no line ending is held from the last read (see readWatchedFile)
+        if (self.watchedDir and (self.csvFiles!=[] or self.csvFiles2!=[])
+                and (self.watchedFilesDirty or self.forceRescan or self.radiologReader.holdsTail() or self.clueLogReader.holdsTail())
+                and not self.restoreBatches):
+            self.watchedFilesDirty=False    # clear before reading, so a change during the read is not lost
             newEntries, newEntries2=self.readWatchedFile()
             #
             #  add newEntries section
@@ -1323,18 +2020,15 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 #Zirow = 0     #QQ top row
                 #Z1self.totalRows = 0 #QQ
                 if self.forceRescan == 1:   #QQ      ### clear rows by setting to no rows
-                    self.ui.tableWidget.setRowCount(0) #QQ
-                    #  if forced, previous rows will be reloaded.  So, we need to get their prior color
-                    #  therefore, need to correlate the saved file info with lines in watchedFile (oldest lines)
-                    #  Should be able to compare the first line in saved data with lines from watchedFile.  When it
-                    #     matches pickup at least the color (maybe all data) from the saved file
-                    #  Can do match on watchedFile[0, 2 and 3] and savedFile[0, 1 and 2]
+                    self.radiologModel.clear() #QQ
+                    #  if forced, previous rows will be reloaded.  So, we need to get their prior color;
+                    #  get_data indexed the saved colors by rowFingerprint (time, callsign and message)
                 logging.info("Num entries:"+str(len(newEntries))) 
                 prev_entry = ''    
-                fndMatch = False   # looking for savedData match to entry in watchedFile
-                savedRow = 0       # initialize
+                restored = 0       # number of rows whose color was restored from savedColors
+                newRows = []       # added to the table in one batch, after the loop
+                newColors = []
                 for entry in newEntries:
-                    irow = 0       # forcing to 0 keeps the most recent at the top #QQ
                     logging.info("In loop: %s"% entry)
                     #14: get rid of any elements after 10 (e.g. 11 = operator ID - not needed here)
                     if len(entry)>10:
@@ -1357,39 +2051,26 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                         else:
                             if prev_entry == entry:
                                 continue       # skip as must have been a hiccup
-                            self.ui.tableWidget.insertRow(irow)
-                            self.ui.tableWidget.setItem(irow, 0, QtWidgets.QTableWidgetItem(timex))
-                            self.ui.tableWidget.setItem(irow, 1, QtWidgets.QTableWidgetItem(callsign))    
-                            self.ui.tableWidget.setItem(irow, 2, QtWidgets.QTableWidgetItem(msg))    
-                            self.ui.tableWidget.setItem(irow, 3, QtWidgets.QTableWidgetItem(radioLoc))    
-                            self.ui.tableWidget.setItem(irow, 4, QtWidgets.QTableWidgetItem(status))    
-                            ### modified 8/3/2025 
-                            if self.savedData and len(self.savedData) > savedRow and self.forceRescan and self.savedData[savedRow]:   
-                                # implies there was prior stored data to use
-                                logging.info("DATA:"+str(self.savedData[savedRow][0])+":"+str(timex)+":"+str(self.savedData[savedRow][1]) \
-                                            +":"+str(callsign)+":"+str(self.savedData[savedRow][2])+":"+str(msg))
-                                if (self.savedData[0][0] == timex and self.savedData[0][1] == callsign and self.savedData[0][2] == msg) \
-                                    or fndMatch:
-                                    logging.info("In match check")    
-                                    self.setRowColor(self.ui.tableWidget,irow,self.savedData[savedRow][3])
-                                    if self.savedData[savedRow][0] != timex or self.savedData[savedRow][1] != callsign or  \
-                                        self.savedData[savedRow][2] != msg:
-                                            logging.error("Row "+str(savedRow)+" does not match corresponding row in watchedFile")
-                                    savedRow += 1      # get ready for next row
-                                    fndMatch = True    # found first matched row
-                                    # may want to get data from the savedData as well as the color (but not doing it now)
-                            else:
-                                prevColor=self.ui.tableWidget.item(irow,1).background().color().name()
-                                newColor=stateColorDict.get(prevColor,self.color[0])
-                                self.setRowColor(self.ui.tableWidget,irow,newColor)
+                            newRows.append([timex,callsign,msg,radioLoc,status])
+                            color = self.color[0]   # new rows start out yellow
+                            if self.forceRescan and self.savedColors:
+                                # restore the color this row had before the rescan, by lookup rather than by
+                                #  position, so inserted or skipped rows do not shift the colors of later rows
+                                colors = self.savedColors.get(rowFingerprint(timex,callsign,msg))
+                                if colors:
+                                    color = colors.pop(0)    # identical rows take their colors in order
+                                    restored += 1
+                            newColors.append(color)
                             logging.info("status:"+status+"  color:"+statusColorDict.get(status,["eeeeee",""])[0])
                             ##irow = irow + 1   #QQ
                             prev_entry = entry
                     else:
                         logging.info('Entry with '+str(len(entry))+' element(s) skipped.')
-                self.totalRows = self.ui.tableWidget.rowCount()
-                if self.savedData and self.forceRescan and not fndMatch:
-                    logging.error("Did not find match in savedData and watchedFile information")
+                self.radiologModel.appendRows(newRows,newColors)
+                self.totalRows = self.radiologModel.rowCount()
+                if self.forceRescan and self.savedColors:
+                    logging.info("Restored the saved color of "+str(restored)+" of "+str(len(newRows))+" row(s)")
+                    self.savedColors = {}
             if newEntries2:
                 self.update_Tm = 0   # reset timeout since we got new data
                 #Z1ix = 0
@@ -1398,9 +2079,9 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 if self.forceRescan == 1:   #QQ   ### clear rows by setting to no rows
                     # for clue log could do this for normal rescan in that we do not have marking of already 
                     #    reviewed rows as for radiolog lines
-                    self.ui.tableWidget_2.setRowCount(0) #QQ
+                    self.clueLogModel.clear() #QQ
+                newRows = []
                 for entry in newEntries2:
-                    irow = 0       # forcing to 0 keeps the most recent at the top #QQ
                     #logging.info("In loop2: %s"% entry)
                     #14: get rid of any elements after 8 (e.g. 11 = operator ID - not needed here)
                     if len(entry)>8:
@@ -1418,153 +2099,125 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                         if msg.find('Radio Log Begins') > -1:    
                             logging.info('Entry with Radio Log Begins skipped.')
                         else:
-                            self.ui.tableWidget_2.insertRow(irow)
-                            self.ui.tableWidget_2.setItem(irow, 0, QtWidgets.QTableWidgetItem(clueNum))
-                            self.ui.tableWidget_2.setItem(irow, 1, QtWidgets.QTableWidgetItem(timex))    
-                            self.ui.tableWidget_2.setItem(irow, 2, QtWidgets.QTableWidgetItem(radioLoc))    
-                            self.ui.tableWidget_2.setItem(irow, 3, QtWidgets.QTableWidgetItem(msg))    
-                            prevColor=self.ui.tableWidget_2.item(irow,1).background().color().name()
-                            newColor=stateColorDict.get(prevColor,self.color[0])  # clue rows do not change color if clicked
-                            self.setRowColor(self.ui.tableWidget_2,irow,newColor)
+                            newRows.append([clueNum,timex,radioLoc,msg])  # clue rows do not change color if clicked
                             #logging.info("status2:"+status+"  color:"+statusColorDict.get(status,["eeeeee",""])[0])
                             #Zirow = irow + 1 #QQ
                     else:
                         logging.info('Entry with '+str(len(entry))+' element(s) skipped.')
-                self.totalRows2 = self.ui.tableWidget_2.rowCount()
+                self.clueLogModel.appendRows(newRows,[self.color[0]]*len(newRows))
+                self.totalRows2 = self.clueLogModel.rowCount()
                         
 ## save data
             if newEntries2 or newEntries:
                 self.save_data()            
             self.forceRescan = 0
 
-    def save_data(self):  
+    def save_data(self):  # record the changes since the previous save in the session journal
         # logging.info("In savedata")
-        data1 = {}
-        rowx = {}
-        rowy = {}
-        rowz = {}
-        for itm in range(self.ui.tableWidget.rowCount()): # data for radiolog table
-            data1['time'] = self.ui.tableWidget.item(itm, 0).text()
-            data1['callsign'] = self.ui.tableWidget.item(itm, 1).text()
-            data1['msg'] = self.ui.tableWidget.item(itm, 2).text()
-            data1['radioLoc'] = self.ui.tableWidget.item(itm, 3).text()
-            data1['status'] = self.ui.tableWidget.item(itm, 4).text()
-            data1['color'] = self.ui.tableWidget.item(itm,1).background().color().name()
-            rowx['rowA'+str(itm)] = data1.copy()
-        for itm2 in range(self.ui.tableWidget_TmAs.rowCount()): # data for team assignment table 
-            data1.update({'team': self.ui.tableWidget_TmAs.item(itm2, 0).text()})
-            data1.update({'assign': self.ui.tableWidget_TmAs.item(itm2, 1).text()})
-            data1.update({'type': self.ui.tableWidget_TmAs.item(itm2, 2).text()})
-            data1.update({'med': self.ui.tableWidget_TmAs.item(itm2, 3).text()})
-            rowy['rowB'+str(itm2)] = data1.copy()
-        for itm3 in range(self.ui.tableWidget_2.rowCount()): # data for cluelog table
-            data1.update({'clueNum': self.ui.tableWidget_2.item(itm3, 0).text()})
-            data1.update({'time': self.ui.tableWidget_2.item(itm3, 1).text()})
-            data1.update({'radioLoc': self.ui.tableWidget_2.item(itm3, 2).text()})
-            data1.update({'msg': self.ui.tableWidget_2.item(itm3, 3).text()})
-            data1.update({'color': self.ui.tableWidget_2.item(itm3,1).background().color().name()}) # doesn't matter - not clickable
-            rowz['rowC'+str(itm3)] = data1.copy()
-        
+        j = self.journal
         maps={}
         maps['incidentURL']=self.incidentURL
         if self.dmg and self.dmg.cts2 and self.dmg.cts2.apiVersion>=0:
             maps['debriefURL']=self.debriefURL
-        alld = json.dumps([maps,{'csv':self.watchedFile+'%'+self.offsetFileName+'%'+str(self.csvFiles)+\
-                '%'+self.watchedFile2+'%'+self.offsetFileName2+'%'+str(self.csvFiles2)},\
-                rowx, rowy, rowz])     
-        fid = open(self.pcDataFileName,'w')
-        fid.write(alld)
-        fid.close()
+        if maps != j.state['maps']:
+            j.append('maps',value=maps)
+        csvInfo = self.watchedFile+'%'+self.offsetFileName+'%'+str(self.csvFiles)+\
+                '%'+self.watchedFile2+'%'+self.offsetFileName2+'%'+str(self.csvFiles2)
+        if csvInfo != j.state['csv']:
+            j.append('csv',value=csvInfo)
+        for [table,model] in [['radiolog',self.radiologModel],['clue',self.clueLogModel]]:
+            [reset,rows,colors] = model.takeChanges()
+            if reset:
+                j.append('reset',table=table)
+            if rows:
+                j.append('rows',table=table,rows=rows)
+            for index,color in colors.items():
+                j.append('color',table=table,index=index,color=color)
+        assign = []
+        for itm2 in range(self.ui.tableWidget_TmAs.rowCount()): # data for team assignment table 
+            assign.append([self.ui.tableWidget_TmAs.item(itm2, col).text() for col in range(4)])
+        if assign != j.state['assign']:
+            j.append('assign',value=assign)
 
     def preview_saved_data(self):
-        with open(self.pcDataFileName,'r') as fid:
-            alld=fid.read()
-            l=json.loads(alld)
-            incidentURL = l[0]['incidentURL']
-            debriefURL=l[0].get('debriefURL',None)
-            n=len(l[2])
+        try:
+            state = self.journal.load()
+        except Exception as e:
+            logging.error('Could not read saved session file '+self.pcDataFileName+': '+str(e))
+            self.journal.reset()
+            return [None,None,0]
+        incidentURL = state['maps'].get('incidentURL',None)
+        debriefURL = state['maps'].get('debriefURL',None)
+        n=len(state['radiolog'])
         return [incidentURL,debriefURL,n]
 
     def load_data(self):  # loading radiolog data table and assignments table from save file
         # logging.info("In load data")
-        fid = open(self.pcDataFileName,'r')
-        alld = fid.read()
-        l = json.loads(alld)
-        logging.info("Get:"+str(l))
-        self.incidentURL = l[0]['incidentURL']
-        self.debriefURL=l[0].get('debriefURL',None)
-        self.watchedFile,self.offsetFileName,self.csvFiles,self.watchedFile2,self.offsetFileName2,self.csvFiles2 = l[1]['csv'].split('%')
-        irow = 0
-        for key in l[2]:
-            self.ui.tableWidget.insertRow(irow)            
-            self.ui.tableWidget.setItem(irow, 0, QtWidgets.QTableWidgetItem(l[2][key]['time']))
-            self.ui.tableWidget.setItem(irow, 1, QtWidgets.QTableWidgetItem(l[2][key]['callsign']))
-            self.ui.tableWidget.setItem(irow, 2, QtWidgets.QTableWidgetItem(l[2][key]['msg']))
-            self.ui.tableWidget.setItem(irow, 3, QtWidgets.QTableWidgetItem(l[2][key]['radioLoc']))
-            self.ui.tableWidget.setItem(irow, 4, QtWidgets.QTableWidgetItem(l[2][key]['status']))
-            self.setRowColor(self.ui.tableWidget,irow,l[2][key]['color'])
-            irow = irow + 1
+        state = self.journal.state      # read and replayed by preview_saved_data
+        self.incidentURL = state['maps'].get('incidentURL',None)
+        self.debriefURL=state['maps'].get('debriefURL',None)
+        self.watchedFile,self.offsetFileName,self.csvFiles,self.watchedFile2,self.offsetFileName2,self.csvFiles2 = state['csv'].split('%')
         irow = 0    
-        for key in l[3]:
+        for r in state['assign']:
             self.ui.tableWidget_TmAs.insertRow(irow)            
-            self.ui.tableWidget_TmAs.setItem(irow, 0, QtWidgets.QTableWidgetItem(l[3][key]['team']))
-            self.ui.tableWidget_TmAs.setItem(irow, 1, QtWidgets.QTableWidgetItem(l[3][key]['assign']))    
-            self.ui.tableWidget_TmAs.setItem(irow, 2, QtWidgets.QTableWidgetItem(l[3][key]['type']))
-            self.ui.tableWidget_TmAs.setItem(irow, 3, QtWidgets.QTableWidgetItem(l[3][key]['med']))
+            for col in range(4):
+                self.ui.tableWidget_TmAs.setItem(irow, col, QtWidgets.QTableWidgetItem(r[col]))
             irow = irow + 1
-        irow = 0
-        for key in l[4]:
-            self.ui.tableWidget_2.insertRow(irow)            
-            self.ui.tableWidget_2.setItem(irow, 0, QtWidgets.QTableWidgetItem(l[4][key]['clueNum']))
-            self.ui.tableWidget_2.setItem(irow, 1, QtWidgets.QTableWidgetItem(l[4][key]['time']))
-            self.ui.tableWidget_2.setItem(irow, 2, QtWidgets.QTableWidgetItem(l[4][key]['radioLoc']))
-            self.ui.tableWidget_2.setItem(irow, 3, QtWidgets.QTableWidgetItem(l[4][key]['msg']))
-            self.setRowColor(self.ui.tableWidget_2,irow,l[4][key]['color'])
-            irow = irow + 1
-        fid.close()
-        
+        # large logs are added to the tables a batch at a time, from the event loop - see restoreRows
+        for [model,rows,n] in [[self.radiologModel,state['radiolog'],5],[self.clueLogModel,state['clue'],4]]:
+            for i in range(0,len(rows),self.restoreBatchSize):
+                batch=rows[i:i+self.restoreBatchSize]
+                self.restoreBatches.append([model,[r[:n] for r in batch],[r[n] for r in batch]])
+        if self.restoreBatches:
+            QTimer.singleShot(0,self.restoreRows)
+
+    # restoreRows - add the next batch of restored rows to its table, and schedule the
+    #  next batch, so that the window stays responsive during a large restore; new log
+    #  records are not read until the restore is complete (see refresh), so that they
+    #  end up above the restored rows
+    def restoreRows(self):
+        [model,rows,colors]=self.restoreBatches.pop(0)
+        model.appendRows(rows,colors,saved=True)
+        if self.restoreBatches:
+            QTimer.singleShot(0,self.restoreRows)
+        else:
+            logging.info('Restore complete: '+str(self.radiologModel.rowCount())+' radiolog and '+str(self.clueLogModel.rowCount())+' clue rows')
         
     def get_data(self):  # getting Full radiolog data table and putting in a list (rescan)
         # logging.info("In get data")
-        with open(self.pcDataFileName,'r')  as fid:
-            alld = fid.read()
-            l = json.loads(alld)
-            #logging.info("Get:"+str(l))
-            self.savedData = []
-            for key in reversed(l[2]):    # skip the first 2 row entries as header info
-                self.savedData.append([l[2][key]['time'], l[2][key]['callsign'], l[2][key]['msg'], l[2][key]['color']])
-
-
-    def setRowColor(self,table,row,color):     # sets each column to the desired color
-        for col in range(table.columnCount()):
-            table.item(row,col).setBackground(QColor(color))
-
-    def tableCellClicked(self,row,col):
-        table=self.sender()
-        i=table.item(row,col)
-        if i:
-            prevColor=i.background().color().name()
+        # the journal state always matches the save file, so there is no need to read it
+        self.savedColors = {}
+        for r in self.journal.state['radiolog']:   # oldest first
+            self.savedColors.setdefault(rowFingerprint(r[0],r[1],r[2]),[]).append(r[5])
+
+    def tableCellClicked(self,index):   # toggles the color of the clicked radiolog row
+        if index.isValid():
+            row=index.row()
+            prevColor=self.radiologModel.rowColor(row)
             if prevColor == self.color[1]:
                 newColor=stateColorDict.get(prevColor,self.color[0])
             else:
                 newColor=stateColorDict.get(prevColor,self.color[1])
-            self.setRowColor(self.ui.tableWidget,row,newColor)
+            self.radiologModel.setRowColor(row,newColor)
 ## save data
         self.save_data()
 
+    # submitMapCommand - queue a map edit requested with the OK button; it runs after any
+    #  earlier edits and table rebuilds
+    def submitMapCommand(self,func,*args):
+        self.mapCommandCount += 1
+        self.tmAsRevision = None    # rebuild the table from the map afterward, even if the command changed nothing
+        self.mapQueue.submit(func,*args)
+
     def assignTab_OK_clicked(self):   # add, delete, modify entry
         if self.cts == None:
             msg = "Not connected to a map"
             inform_user_about_issue(msg)
             return                    # skip as not connected
-        while self.flag_TmAs_getobj:  # wait until getObject operation is complete
-            pass
-        self.flag_TmAs_Ok = True
         self.curAssign = self.ui.Assign.text().upper().strip()
         if self.curAssign == 'IC':
             self.curAssign = 'ICX'    # using ICX to avoid conflict with marker IC
         if self.curAssign == '':      # may be due to double click as things were slow
-            self.flag_TmAs_Ok = False
             return                    # No entry, so ignore
         a=self.cts.getFeatures(featureClass='Assignment',title=self.curAssign,letterOnly=True,allowMultiTitleMatch=True)
         print("at top of New assignment into table")
@@ -1576,7 +2229,6 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 msg='Multiple assignments have the letters "'+self.curAssign+'" - no operation performed.  Remedy that situation and try again.'
             inform_user_about_issue(msg)
             logging.warning(msg)
-            self.flag_TmAs_Ok = False
             return
         #print("Ok button clicked, team is:"+self.ui.Team.text())
         rval = self.cts.getFeatures("Assignment")     # get assignments
@@ -1600,7 +2252,6 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         if self.ui.Team.text() == "" or ifnd == 0:  # error - checking select below when entry does not exist
             pass  # beepX1
             logging.error("Issue with Assign inputs: "+str(self.ui.Team.text())+" : "+str(ifnd))
-            self.flag_TmAs_Ok = False
             return
         ifnd = 0                                    # flag for found existing Team assignment
         irow = 0
@@ -1624,7 +2275,6 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 pass  # beepX1
                 inform_user_about_issue("Expected Team Type to be set", timeout=2000)
                 logging.info("Issue with Assign inputs2")
-                self.flag_TmAs_Ok = False
                 return
             else:
                 indx = self.ui.comboBox.findText(self.ui.tableWidget_TmAs.item(ix,2).text())
@@ -1636,7 +2286,7 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             if ifnd == 1:               # want to remove; presently in table AND on map
                 self.curTeam = self.ui.Team.text().strip()
                 ## if team has medical, need to remove that entry, also
-                self.delMarker()        # uses curTeam to find
+                self.submitMapCommand(self.delMarker,self.curTeam)
             if ifnd == 1 or ifnd == 2:  # want to remove; presently only in table
                 self.ui.tableWidget_TmAs.removeRow(irow)
             # clear fields
@@ -1649,7 +2299,6 @@ class PlansConsole(QDialog,Ui_PlansConsole):
                 self.ui.Med.setChecked(False)
 ## save data
             self.save_data()    
-            self.flag_TmAs_Ok = False
             return
         ##  ifnd=0  not in table and not on map  - add team and marker
         ##  ifnd=1  in table and on map          - update/moving
@@ -1668,7 +2317,6 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             if self.ui.Med.isChecked(): self.medval = " X"
             else: self.medval = " "    #  need at least a space so that it is not empty
             self.ui.tableWidget_TmAs.setItem(irow, 3, QtWidgets.QTableWidgetItem(self.medval))  # we don't want marker
-            self.flag_TmAs_Ok = True
             self.save_data()    
             return
         '''    
@@ -1676,9 +2324,10 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         if ifnd == 1:                                 # moving so remove present loc on map
             self.curTeam = self.ui.tableWidget_TmAs.item(irow,0).text()
             print("del marker?")
-            self.delMarker()                          # uses curTeam to find
+            self.submitMapCommand(self.delMarker,self.curTeam)
         cntComma = self.ui.Team.text().count(',')+1   # add 1 for first element
         tok = self.ui.Team.text().split(',')
+        teams = []    # [team,lat,lon] for assignTeams
         for ix in range(cntComma):     # go thru list of teams in the assignment, add a row for each
             if ifnd == 0: self.ui.tableWidget_TmAs.insertRow(0)
             print("ifnd is "+str(ifnd)+":"+str(tok)+":"+str(irow)+":"+str(self.curAssign))
@@ -1701,12 +2350,13 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             if self.curType == "LE" and self.curAssign.upper() == "IC":         # moving LE to 'IC' (away)
                 self.lonField = self.NCSO[1]+random.uniform(-1.0, 1.0)*0.001    # temp location; randomly adjust
                 self.latField = self.NCSO[0]+random.uniform(-1.0, 1.0)*0.001    # +/-0.001 deg lat and long
-            else:   
-                self.calcLatLon_center()              # use self.ui.Assign.text() to find shape
-        # set marker type (in addMarker) based on Med or if type=LE
-            print("B4 addMark:"+str(self.curAssign))
-            ##if (self.curAssign != "IC" and self.curAssign != "TR") or self.curType == "LE":
-            self.addMarker()       # uses self.ui.Team, medval
+            elif ix == 0:   
+                self.calcLatLon_center()              # use self.ui.Assign.text() to find shape; same for all teams
+            teams.append([self.curTeam,self.latField,self.lonField])
+        # set marker type (in assignTeams) based on Med or if type=LE
+        print("B4 addMark:"+str(self.curAssign))
+        ##if (self.curAssign != "IC" and self.curAssign != "TR") or self.curType == "LE":
+        self.submitMapCommand(self.assignTeams,teams,self.curAssign,self.curType,self.medval)   # all teams in one command
 
         # clear fields
         self.ui.Team.setText("")
@@ -1715,24 +2365,17 @@ class PlansConsole(QDialog,Ui_PlansConsole):
         self.ui.Med.setChecked(False)
 ## save data            
         self.save_data()
-        self.flag_TmAs_Ok = False
         
     def calcLatLon_center(self):
         logging.info("in LATLOG")
-        loc = self.feature['geometry'].get("coordinates")   # of an assignment
-        loc_lat = 0
-        loc_long = 0
-        ipt = 0
-        lenloc = len(loc)
-        if type(loc[0][0]) is list:     # polygon is list of list
-            p = Polygon(loc[0])                # make shapely Polygon
-            mid = p.representative_point()     # get point in shape (shapely)
-            avg_lat = list(mid.coords)[0][1]   # convert shapely object back to tuple in list
-            avg_lon = list(mid.coords)[0][0]
-        else:    # line
-            loca = loc[int(lenloc/2)]          # use its mid point
-            avg_lat = loca[1]
-            avg_lon = loca[0]
+        # point in the shape of an assignment (polygon) or its mid point (line); cached by the session
+        #  until the assignment's geometry changes
+        mid = self.cts.getCenter(self.feature)
+        if not mid:
+            logging.warning("No center found for assignment "+str(self.feature['properties'].get('title')))
+            return     # keep the previous location
+        avg_lat = mid[1]
+        avg_lon = mid[0]
         logging.info("Loc-lat:"+str(avg_lat)+" loc-long:"+str(avg_lon))
         self.latField = avg_lat
         self.lonField = avg_lon
@@ -1742,29 +2385,48 @@ class PlansConsole(QDialog,Ui_PlansConsole):
     #  file is the first item in the list)
     def readDir(self):
         logging.info("in readDir")
-        f=glob.glob(self.watchedDir+"\\*.csv")
-        f2 = f
-        # logging.info("Files: %s"%f)
-        f=[x for x in f if not regex.match('.*_clueLog.csv$',x)]
-        f=[x for x in f if not regex.match('.*_fleetsync.csv$',x)]
-        f=[x for x in f if not regex.match('.*_bak[123456789].csv$',x)]
-        f2=[x for x in f2 if regex.match('.*_clueLog.csv$',x)]  # get cluelog files
-        f=sorted(f,key=os.path.getmtime,reverse=True)
-        f2=sorted(f2,key=os.path.getmtime,reverse=True)
-        for file in f:
-            l=[file,os.path.getsize(file),os.path.getmtime(file)]
-            self.csvFiles.append(l)
-        for file in f2:
-            l=[file,os.path.getsize(file),os.path.getmtime(file)]
-            self.csvFiles2.append(l)
+        snapshot=self.getDirSnapshot()
+        self.csvFiles+=snapshot['radiolog']
+        self.csvFiles2+=snapshot['clueLog']
         print("LIST:"+str(self.csvFiles))    
 
+    # getDirSnapshot - list and classify the csv files in watchedDir in one pass, with
+    #  one stat per file; returns a dict of category ('radiolog','clueLog','fleetsync','bak')
+    #  to a list of [filename,size,mtime], most recent first.  The result is cached until the
+    #  directory's own mtime changes (i.e. a file is added, removed, or renamed), so repeated
+    #  calls cost a single stat of the directory - which matters on a network share.
+    def getDirSnapshot(self,force=False):
+        try:
+            dirMtime=os.stat(self.watchedDir).st_mtime_ns
+        except OSError as e:
+            logging.warning('could not read watched dir '+str(self.watchedDir)+': '+str(e))
+            return {'radiolog':[],'clueLog':[],'fleetsync':[],'bak':[]}
+        if self.dirSnapshot and self.dirSnapshot[0]==dirMtime and not force:
+            return self.dirSnapshot[1]
+        snapshot={'radiolog':[],'clueLog':[],'fleetsync':[],'bak':[]}
+        with os.scandir(self.watchedDir) as it:
+            for entry in it:
+                if not entry.name.lower().endswith('.csv'):
+                    continue
+                try:
+                    st=entry.stat()
+                except OSError:
+                    continue    # removed since the listing was read
+                m=csvCategoryRegex.match(entry.name)
+                category=(m.group(1) or m.group(2)) if m else 'radiolog'
+                snapshot[category].append([entry.path,st.st_size,st.st_mtime])
+        for files in snapshot.values():
+            files.sort(key=lambda x:x[2],reverse=True)
+        self.dirSnapshot=[dirMtime,snapshot]
+        return snapshot
+
     def readWatchedFile(self):
         newEntries=[]       # these are supposed to be NEW entries as using Pygtail to analyze watchedFile
         newEntries2=[]      #   How does forced reload work if only passing NEW lines to rescan/refresh?
         #print("Watched:"+str(self.watchedFile))
-        if self.csvFiles !=[]:
-          newl = False  
+        if self.csvFiles !=[] and self.radiologReader.holdsTail() and self.readToEnd(self.watchedFile):
+          newEntries = self.radiologReader.flush()     # nothing was appended since the last read: the held tail is the last row
+        elif self.csvFiles !=[]:
           try:    # Note if offset file does not exist, whole file is returned
                   #   rescan removes the offset file, hence upon rescan the whole file is read
               lines = Pygtail(self.watchedFile, offset_file=self.offsetFileName, copytruncate=False)
@@ -1772,27 +2434,82 @@ class PlansConsole(QDialog,Ui_PlansConsole):
               lines = Pygtail(self.watchedFile, offset_file=self.offsetFileName, copytruncate=False)
               print("At 2nd attempt to read...")
           ## for line in Pygtail(self.watchedFile, offset_file=self.offsetFileName, copytruncate=False):
-          for line in lines:
-            #print("LINEZZ:"+str(line))  
-            line, newl = self.fixStrg(line, newl)  # fix ' and newline in  string
-            if newl:
-                #print("In middle")
-                continue     # in the middle of a multi-line description
-            #print("FIXED:"+str(line)+":"+str(newl))
-            newEntries.append(line.split(','))
-        if self.csvFiles2 !=[]:
-          newl = False  
+          # records split across ticks (multi-line description, or a line still being written)
+          #  are held by the reader until complete
+          newEntries = self.radiologReader.feed(lines)
+        if self.csvFiles2 !=[] and self.clueLogReader.holdsTail() and self.readToEnd(self.watchedFile2):
+          newEntries2 = self.clueLogReader.flush()
+        elif self.csvFiles2 !=[]:
           try:
               lines = Pygtail(self.watchedFile2, offset_file=self.offsetFileName2, copytruncate=False)
           except:   # retry if first connection fails
               lines = Pygtail(self.watchedFile2, offset_file=self.offsetFileName2, copytruncate=False)
           ## for line in Pygtail(self.watchedFile2, offset_file=self.offsetFileName2, copytruncate=False):
-          for line in lines:
-            line, newl = self.fixStrg(line, newl)  # fix ' and newline in  string
-            if newl:
-                continue     # in the middle of a multi-line description
-            newEntries2.append(line.split(','))
+          newEntries2 = self.clueLogReader.feed(lines)
+        for [fileName,offsetFileName,csvFiles] in [[self.watchedFile,self.offsetFileName,self.csvFiles],[self.watchedFile2,self.offsetFileName2,self.csvFiles2]]:
+            if csvFiles != []:
+                self.tailCheckpoints[fileName] = self.tailCheckpoint(fileName,offsetFileName)
         return newEntries,newEntries2
+
+    # readToEnd - True if the watched file has not grown since the last read, i.e. its
+    #  size is still the offset recorded in its tail checkpoint
+    def readToEnd(self,fileName):
+        checkpoint = self.tailCheckpoints.get(fileName)
+        try:
+            return checkpoint is not None and os.stat(fileName).st_size == checkpoint[1]
+        except OSError:
+            return False
+
+    # tailCheckpoint - [inode,offset,hash of the last block before offset] for a watched file,
+    #  where inode and offset are what pygtail recorded in its offset file after the last read;
+    #  None if not available
+    def tailCheckpoint(self,fileName,offsetFileName):
+        try:
+            with open(offsetFileName,'r') as fid:
+                [inode,offset] = [int(line.strip()) for line in fid]
+            with open(fileName,'rb') as fid:
+                start = max(0,offset-self.checkBlockSize)
+                fid.seek(start)
+                block = fid.read(offset-start)
+        except (OSError,ValueError):
+            return None
+        return [inode,offset,zlib.crc32(block)]
+
+    # watchedFilesIntact - cheap check that a full rescan is not needed: each watched file
+    #  has the same identity as when it was read, has not shrunk, and still has the same
+    #  content just before the read position; and no newer radiolog or clueLog has appeared
+    def watchedFilesIntact(self):
+        snapshot = self.getDirSnapshot()
+        for [fileName,category,csvFiles] in [[self.watchedFile,'radiolog',self.csvFiles],[self.watchedFile2,'clueLog',self.csvFiles2]]:
+            if snapshot[category] and (csvFiles == [] or snapshot[category][0][0] != fileName):
+                logging.info("Newer "+category+" file found: "+snapshot[category][0][0])
+                return False
+            if csvFiles == []:
+                continue
+            checkpoint = self.tailCheckpoints.get(fileName)
+            if checkpoint is None:
+                logging.info("No read checkpoint for "+fileName)
+                return False
+            [inode,offset,crc] = checkpoint
+            try:
+                st = os.stat(fileName)
+                with open(fileName,'rb') as fid:
+                    start = max(0,offset-self.checkBlockSize)
+                    fid.seek(start)
+                    block = fid.read(offset-start)
+            except OSError as e:
+                logging.info("Could not check "+fileName+": "+str(e))
+                return False
+            if inode and st.st_ino and st.st_ino != inode:
+                logging.info(fileName+" has been replaced (rotated)")
+                return False
+            if st.st_size < offset:
+                logging.info(fileName+" has been truncated")
+                return False
+            if zlib.crc32(block) != crc:
+                logging.info(fileName+" has been rewritten before the last read position")
+                return False
+        return True
                 
     def updateClock(self):
         self.ui.clock.display(time.strftime("%H:%M"))
@@ -1981,6 +2698,12 @@ class PlansConsole(QDialog,Ui_PlansConsole):
             return
         logging.info(cleanShutdownText)
         self.saveRcFile()
+        self.mapQueue.close()   # finish any queued map edits
+        if self.cts:
+            self.cts._stop()    # end the sync thread, so the process can exit
+        if self.journal.started:
+            self.journal.compact()  # leave a single, complete save file
+        self.journal.close()    # finish any queued writes
         event.accept()
         self.parent.quit()
 
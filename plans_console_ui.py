@@ -42,34 +42,12 @@ class Ui_PlansConsole(object):
         self.mainHorizLayout.setObjectName("mainHorizLayout")
         self.leftVerticalLayout = QtWidgets.QVBoxLayout()
         self.leftVerticalLayout.setObjectName("leftVerticalLayout")
-        self.tableWidget = QtWidgets.QTableWidget(PlansConsole)
+        self.tableWidget = QtWidgets.QTableView(PlansConsole)
         self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(5)
-        self.tableWidget.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(4, item)
         self.tableWidget.verticalHeader().setVisible(False)
         self.leftVerticalLayout.addWidget(self.tableWidget)
-        self.tableWidget_2 = QtWidgets.QTableWidget(PlansConsole)
+        self.tableWidget_2 = QtWidgets.QTableView(PlansConsole)
         self.tableWidget_2.setObjectName("tableWidget_2")
-        self.tableWidget_2.setColumnCount(4)
-        self.tableWidget_2.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_2.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_2.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_2.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_2.setHorizontalHeaderItem(3, item)
         self.tableWidget_2.verticalHeader().setVisible(False)
         self.leftVerticalLayout.addWidget(self.tableWidget_2)
         self.leftVerticalLayout.setStretch(0, 5)
@@ -392,24 +370,6 @@ class Ui_PlansConsole(object):
     def retranslateUi(self, PlansConsole):
         _translate = QtCore.QCoreApplication.translate
         PlansConsole.setWindowTitle(_translate("PlansConsole", "Plans Console"))
-        item = self.tableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("PlansConsole", "Time"))
-        item = self.tableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("PlansConsole", "Team"))
-        item = self.tableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("PlansConsole", "Description"))
-        item = self.tableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("PlansConsole", "Location"))
-        item = self.tableWidget.horizontalHeaderItem(4)
-        item.setText(_translate("PlansConsole", "Status"))
-        item = self.tableWidget_2.horizontalHeaderItem(0)
-        item.setText(_translate("PlansConsole", "ClueNum"))
-        item = self.tableWidget_2.horizontalHeaderItem(1)
-        item.setText(_translate("PlansConsole", "Time"))
-        item = self.tableWidget_2.horizontalHeaderItem(2)
-        item.setText(_translate("PlansConsole", "Location"))
-        item = self.tableWidget_2.horizontalHeaderItem(3)
-        item.setText(_translate("PlansConsole", "Description"))
         item = self.tableWidget_TmAs.horizontalHeaderItem(0)
         item.setText(_translate("PlansConsole", "Team"))
         item = self.tableWidget_TmAs.horizontalHeaderItem(1)
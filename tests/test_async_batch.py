@@ -0,0 +1,51 @@
+# tests for the awaitable batch methods (CaltopoSession.delFeaturesAsync etc.), which must work
+#  from a running event loop; requests are answered by a fake ._sendRequestAsync
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+import caltopo_python
+from caltopo_python import CaltopoSession
+
+pytestmark=pytest.mark.skipif(caltopo_python.httpx is None,reason='httpx is not installed')
+
+def makeSession(sent):
+    cts=object.__new__(CaltopoSession)
+    cts.mapID='TEST'
+    cts.apiVersion=1
+    cts.sync=False
+    cts.proxyDict=None
+    cts._batchLock=threading.Lock()
+    cts._batchCount=0
+    async def sendRequestAsync(type,apiUrlEnd,j,id='',returnJson='',timeout=0):
+        sent.append((type,apiUrlEnd,id,cts._batchCount))
+        await asyncio.sleep(0)
+        return {'status':'ok','result':{'id':id}}
+    cts._sendRequestAsync=sendRequestAsync
+    return cts
+
+def test_delFeaturesAsyncRunsOnTheCallingLoop():
+    sent=[]
+    cts=makeSession(sent)
+    async def main():
+        return await cts.delFeaturesAsync([{'id':'a','class':'Marker'},{'id':'b','class':'Shape'}])
+    rval=asyncio.run(main())
+    assert [r['result']['id'] for r in rval]==['a','b']
+    assert sorted(sent)==[('delete','Marker','a',1),('delete','Shape','b',1)] # sync is held off during the batch
+    assert cts._batchCount==0
+
+def test_failedRequestIsFalse():
+    sent=[]
+    cts=makeSession(sent)
+    async def fail(*args,**kwargs):
+        raise ValueError('bad response')
+    cts._sendRequestAsync=fail
+    rval=asyncio.run(cts.delFeaturesAsync([{'id':'a','class':'Marker'}],retries=0))
+    assert rval==[False]
+    assert cts._batchCount==0
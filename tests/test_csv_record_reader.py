@@ -0,0 +1,75 @@
+# tests for reading the radiolog / clueLog csv files incrementally: CsvRecordReader, and
+#  PlansConsole.readWatchedFile holding a row with no line ending until the file stops growing;
+#  the code is taken from plans_console.py without importing it, since importing it
+#  regenerates the ui modules and opens the log file
+
+import ast
+import csv
+import os
+import zlib
+
+from pygtail import Pygtail
+
+srcFile=os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','plans_console.py')
+
+def loadCode():
+    with open(srcFile) as f:
+        tree=ast.parse(f.read())
+    ns={'csv':csv,'os':os,'zlib':zlib,'Pygtail':Pygtail}
+    methods={}
+    for node in tree.body:
+        if isinstance(node,ast.ClassDef) and node.name=='CsvRecordReader':
+            exec(compile(ast.Module(body=[node],type_ignores=[]),srcFile,'exec'),ns)
+        if isinstance(node,ast.ClassDef) and node.name=='PlansConsole':
+            for item in node.body:
+                if isinstance(item,ast.FunctionDef) and item.name in ['readWatchedFile','readToEnd','tailCheckpoint']:
+                    exec(compile(ast.Module(body=[item],type_ignores=[]),srcFile,'exec'),ns)
+                    methods[item.name]=ns[item.name]
+    return ns['CsvRecordReader'],methods
+
+CsvRecordReader,consoleMethods=loadCode()
+
+class FakeConsole():
+    checkBlockSize=4096
+    locals().update(consoleMethods)
+    def __init__(self,fileName):
+        self.watchedFile=fileName
+        self.offsetFileName=fileName+'.offset'
+        self.csvFiles=[[fileName]]
+        self.watchedFile2='watched2.csv'
+        self.offsetFileName2='offset2.csv'
+        self.csvFiles2=[]
+        self.radiologReader=CsvRecordReader()
+        self.clueLogReader=CsvRecordReader()
+        self.tailCheckpoints={}
+
+def test_multiLineRecord():
+    r=CsvRecordReader()
+    assert r.feed(['a,"b\n','c",d\n'])==[['a','b/c','d']]
+
+def test_splitLastFieldIsHeld():
+    r=CsvRecordReader()
+    assert r.feed(['a,b,c,d,e,f,g,h,i,1'])==[]
+    assert r.holdsTail()
+    assert r.feed(['2\n','x,y\n'])==[['a','b','c','d','e','f','g','h','i','12'],['x','y']]
+    assert not r.holdsTail()
+
+def test_openQuoteIsNotATail():
+    r=CsvRecordReader()
+    assert r.feed(['a,"b'])==[]
+    assert not r.holdsTail()
+
+def test_heldTailIsReturnedOnceTheFileStopsGrowing(tmp_path):
+    fileName=str(tmp_path/'radiolog.csv')
+    with open(fileName,'w') as f:
+        f.write('a,b\nc,1')
+    console=FakeConsole(fileName)
+    assert console.readWatchedFile()[0]==[['a','b']]
+    with open(fileName,'a') as f:
+        f.write('2')
+    assert console.readWatchedFile()[0]==[]      # the file grew: the rest of the last field is read
+    assert console.radiologReader.holdsTail()
+    assert console.readWatchedFile()[0]==[['c','12']]    # no more bytes: the tail is the last row
+    with open(fileName,'a') as f:
+        f.write('d,e\n')
+    assert console.readWatchedFile()[0]==[['d','e']]
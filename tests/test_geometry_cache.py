@@ -0,0 +1,56 @@
+# tests for the per-feature geometry value cache used by CaltopoSession.getCenter and .getBounds;
+#  the session is built without connecting to a map
+
+import os
+import sys
+import threading
+import copy
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+from caltopo_python import CaltopoSession
+
+def makeSession():
+    cts=object.__new__(CaltopoSession)
+    cts.mapID='TEST'
+    cts.apiVersion=1
+    cts.lastSuccessfulSyncTimestamp=0
+    cts.sync=False
+    cts.cacheRevision=0
+    cts._cacheLock=threading.RLock()
+    cts.mapData={'ids':{},'state':{'features':[]}}
+    cts._clearIndex()
+    return cts
+
+def line(id,points):
+    f={'type':'Feature','properties':{'class':'Shape','title':'L'},'geometry':{'type':'LineString','coordinates':points}}
+    if id:
+        f['id']=id
+    return f
+
+def test_featuresWithoutIdAreNotCached():
+    cts=makeSession()
+    a=line(None,[[0,0],[1,1]])
+    b=line(None,[[10,10],[20,20]])
+    assert cts.getBounds([a],padDeg=0)==[0,0,1,1]
+    assert cts.getBounds([b],padDeg=0)==[10,10,20,20]
+    assert cts.getCenter(a)==[1,1]
+    assert cts.getCenter(b)==[20,20]
+    assert cts._geometryCache=={}
+
+def test_copyOfCachedFeatureUsesItsOwnGeometry():
+    cts=makeSession()
+    f=cts._cacheFeature(line('s1',[[0,0],[1,1],[2,2]]))
+    assert cts.getCenter(f)==[1,1]
+    g=copy.deepcopy(f)
+    g['geometry']['coordinates']=[[5,5],[6,6],[7,7]]
+    assert cts.getCenter(g)==[6,6]
+    assert cts.getCenter(f)==[1,1]
+
+def test_cachedFeatureIsRecomputedAfterGeometryChange():
+    cts=makeSession()
+    f=cts._cacheFeature(line('s1',[[0,0],[1,1],[2,2]]))
+    assert cts.getCenter(f)==[1,1]
+    f['geometry']={'type':'LineString','coordinates':[[5,5],[6,6],[7,7]]}
+    cts._geometryChanged(cts._featureKey(f))
+    assert cts.getCenter(f)==[6,6]
@@ -0,0 +1,40 @@
+# tests for merging a 'since' response into the cache (CaltopoSession._mergeSyncResult);
+#  the session is built without connecting to a map
+
+import os
+import sys
+import threading
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+from caltopo_python import CaltopoSession
+
+def makeSession(**callbacks):
+    cts=object.__new__(CaltopoSession)
+    cts.mapID='TEST'
+    cts.apiVersion=1
+    cts.sync=False
+    cts.cacheRevision=0
+    cts._cacheLock=threading.RLock()
+    cts.mapData={'ids':{},'state':{'features':[]}}
+    for name in ['propertyUpdateCallback','geometryUpdateCallback','newFeatureCallback','deletedFeatureCallback','deletedFeaturesCallback']:
+        setattr(cts,name,callbacks.get(name))
+    cts._clearIndex()
+    return cts
+
+def marker(id,title):
+    return {'type':'Feature','id':id,'properties':{'class':'Marker','title':title},'geometry':{'type':'Point','coordinates':[0,0]}}
+
+def test_deletedFeaturesCallbackIsCalledOncePerSync():
+    batches=[]
+    singles=[]
+    cts=makeSession(deletedFeaturesCallback=batches.append,deletedFeatureCallback=lambda id,c: singles.append((id,c)))
+    for n in range(5):
+        cts._cacheFeature(marker('m'+str(n),'M'+str(n)))
+    callbacks=cts._mergeSyncResult({'ids':{'Marker':['m0','m2','m4']},'state':{'features':[]}})
+    for [callback,args] in callbacks:
+        callback(*args)
+    assert batches==[[('m1','Marker'),('m3','Marker')]]
+    assert singles==[('m1','Marker'),('m3','Marker')]
+    assert [f['id'] for f in cts.mapData['state']['features']]==['m0','m2','m4']
+    assert 'm1' not in cts._classIndex['Marker'] and not cts._titleIndex.get('M1')